@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
-import re
+
+from Modules.utils.rvq_engine import factorize_columns, first_number, scan_rules
+from Modules.utils.storage import as_objects
 
 
 def apply_rvq_rules(
@@ -12,6 +15,7 @@ def apply_rvq_rules(
     negative_rule_enabled=False,
     negative_rvq_code=None,
     negative_exceptions=None,
+    rvq_as_category=False,
     **kwargs
 ):
     """
@@ -62,6 +66,11 @@ def apply_rvq_rules(
     keep_original : bool, optional
         If False, matched values are replaced with empty strings.
 
+    rvq_as_category : bool, optional
+        If True, RVQ columns are stored as pandas Categoricals (one small
+        integer per row) instead of text. Mostly-empty RVQ columns on wide
+        or long files then take a fraction of the memory.
+
     Returns
     -------
     cleaned_df : pandas.DataFrame
@@ -97,133 +106,185 @@ def apply_rvq_rules(
     # -----------------------------------------------------
     # 2. PREP - Remove missing columns (widget handles soft validation)
     # -----------------------------------------------------
-    columns = [c for c in columns if c in cleaned_df.columns]
+    columns = [c for c in dict.fromkeys(columns) if c in cleaned_df.columns]
 
     if negative_exceptions is None:
         negative_exceptions = []
 
+    n_rows = len(cleaned_df)
+
+    # -----------------------------------------------------
+    # 3. CORE PROCESSING (all selected columns in one pass)
+    # -----------------------------------------------------
+    rvq_counts = {col: {} for col in columns}          # {column: {rvq_code: count}}
+    detection_limits = {col: {} for col in columns}    # {column: {rvq_code: {limit: count}}}
+
+    # The selected columns are stacked end to end (row i of columns[k] is
+    # at k * n_rows + i) and rules are evaluated once on the UNIQUE values.
+    # Factorizing the input df (same values as the copy) reuses the widget
+    # pre-scan's factorization of this data.
+    codes, uniques = factorize_columns(df, columns)
+    hits = scan_rules(uniques, rules)
+
+    # RVQ labels are kept as integer codes into `categories` ("" = no RVQ)
+    categories = {"": 0}
+    label_codes = np.zeros(len(uniques), dtype=np.int32)   # RVQ per unique value
+    matched = np.zeros(len(uniques), dtype=bool)          # matched by any rule
+
     # -----------------------------------------------------
-    # 3. CORE PROCESSING
+    # 3A. APPLY USER-DEFINED RVQ RULES (per unique value)
     # -----------------------------------------------------
-    rvq_counts = {}          # {column: {rvq_code: count}}
-    detection_limits = {}    # {column: {rvq_code: {limit: count}}}
+    # Rules run in order, so the LAST matching rule sets the RVQ.
+    for rule, positions in zip(rules, hits):
+        if len(positions) == 0:
+            continue
+
+        rvq = rule["rvq_code"]
+        label_codes[positions] = categories.setdefault(rvq, len(categories))
+        matched[positions] = True
+
+        # FULL MATCH: the detection limit comes from the data code
+        if rule["match_type"] == "full":
+            limit = first_number(rule["data_code"])
+            if limit is not None:
+                label_codes[positions] = categories.setdefault(f"{rvq} [{limit}]", len(categories))
+
+        # CONTAINS: the detection limit comes from each value
+        if rule["match_type"] == "contains":
+            for pos in positions:
+                limit = first_number(uniques[pos])
+                if limit is not None:
+                    label_codes[pos] = categories.setdefault(f"{rvq} [{limit}]", len(categories))
 
-    for col in columns:
+    # -----------------------------------------------------
+    # 3B. COUNT MATCHED VALUES PER COLUMN
+    # -----------------------------------------------------
+    # {unique position: row count} per column, in order of first appearance
+    # in that column, so limits are recorded like a row-by-row scan would.
+    found = [{} for _ in columns]
 
-        rvq_col = f"{col}_RVQ"
+    matched_rows = np.flatnonzero(matched[codes])
+    if len(matched_rows):
+        pair_keys = (matched_rows // n_rows) * len(uniques) + codes[matched_rows]
+        pair_keys, first_rows, pair_counts = np.unique(pair_keys, return_index=True, return_counts=True)
 
-        # Remove existing RVQ column if present
-        if rvq_col in cleaned_df.columns:
-            cleaned_df = cleaned_df.drop(columns=[rvq_col])
+        for i in np.argsort(first_rows, kind="stable"):
+            k, pos = divmod(int(pair_keys[i]), len(uniques))
+            found[k][pos] = int(pair_counts[i])
 
-        # Insert RVQ column beside the data column
-        col_pos = cleaned_df.columns.get_loc(col)
-        cleaned_df.insert(col_pos + 1, rvq_col, "")
+    hit_sets = [set(positions.tolist()) for positions in hits]
 
-        rvq_counts[col] = {}
-        detection_limits[col] = {}
+    outputs = {}   # {column: (values, RVQ label codes)}
 
-        series = cleaned_df[col].astype(str)
+    for k, col in enumerate(columns):
 
         # -------------------------------------------------
-        # 3A. APPLY USER-DEFINED RVQ RULES
+        # Counts and detection limits of the manual rules
         # -------------------------------------------------
-        for rule in rules:
-            code = rule["data_code"]
+        for rule, hit_set in zip(rules, hit_sets):
+            present = [pos for pos in found[k] if pos in hit_set]
+            if not present:
+                continue
+
             rvq = rule["rvq_code"]
-            match = rule["match_type"]
-
-            # Determine matching rows
-            if match == "full":
-                mask = series == code
-
-            elif match == "contains":
-                if code.lower() == "nan":
-                    mask = (
-                        series.str.contains("nan", case=False, na=False)
-                        | (series.str.strip() == "")
-                        | (series == "nan")
-                        | (series == "NaN")
-                        | (series == "NAN")
-                    )
-                else:
-                    mask = series.str.contains(re.escape(code), na=False)
+            count = sum(found[k][pos] for pos in present)
+            rvq_counts[col][rvq] = rvq_counts[col].get(rvq, 0) + count
 
-            else:
-                mask = False
+            if rule["match_type"] == "full":
+                limit = first_number(rule["data_code"])
+                if limit is not None:
+                    detection_limits[col].setdefault(rvq, {})
+                    detection_limits[col][rvq][limit] = detection_limits[col][rvq].get(limit, 0) + count
 
-            if not mask.any():
-                continue
+            if rule["match_type"] == "contains":
+                for pos in present:
+                    limit = first_number(uniques[pos])
+                    if limit is None:
+                        continue
 
-            # Assign RVQ code
-            cleaned_df.loc[mask, rvq_col] = rvq
-            rvq_counts[col][rvq] = rvq_counts[col].get(rvq, 0) + mask.sum()
-
-            # -------------------------------------------------
-            # Extract detection limits (FULL MATCH)
-            # -------------------------------------------------
-            if match == "full":
-                nums = re.findall(r"([0-9]*\.?[0-9]+)", code)
-                if nums:
-                    limit = float(nums[0])
                     detection_limits[col].setdefault(rvq, {})
                     detection_limits[col][rvq][limit] = (
-                        detection_limits[col][rvq].get(limit, 0) + mask.sum()
+                        detection_limits[col][rvq].get(limit, 0) + found[k][pos]
                     )
 
-                    cleaned_df.loc[mask, rvq_col] = cleaned_df.loc[mask, rvq_col].apply(
-                        lambda x: f"{rvq} [{limit}]" if x == rvq else x
-                    )
+        # Back to rows
+        col_codes = codes[k * n_rows:(k + 1) * n_rows]
+        row_labels = label_codes[col_codes]
+        blank_rows = matched[col_codes] if not keep_original else np.zeros(n_rows, dtype=bool)
 
-            # -------------------------------------------------
-            # Extract detection limits (CONTAINS)
-            # -------------------------------------------------
-            if match == "contains":
-                number_lists = series[mask].str.findall(r"([0-9]*\.?[0-9]+)")
-
-                for idx, nums in zip(series[mask].index, number_lists):
-                    if nums:
-                        limit = float(nums[0])
-                        detection_limits[col].setdefault(rvq, {})
-                        detection_limits[col][rvq][limit] = (
-                            detection_limits[col][rvq].get(limit, 0) + 1
-                        )
-
-                        if cleaned_df.at[idx, rvq_col] == rvq:
-                            cleaned_df.at[idx, rvq_col] = f"{rvq} [{limit}]"
-
-            # Optionally remove original data code
-            if not keep_original:
-                cleaned_df.loc[mask, col] = ""
-
-        # -----------------------------------------------------
-        # 3B. NEGATIVE VALUE RULE
-        # -----------------------------------------------------
+        # -------------------------------------------------
+        # 3C. NEGATIVE VALUE RULE
+        # -------------------------------------------------
         if negative_rule_enabled and col not in negative_exceptions and negative_rvq_code:
 
-            numeric = pd.to_numeric(cleaned_df[col], errors="coerce")
-            neg_mask = (numeric < 0) & (cleaned_df[rvq_col] == "")
+            # Values already blanked by a rule are no longer numbers
+            numeric = pd.to_numeric(as_objects(cleaned_df[col]), errors="coerce").mask(blank_rows)
+            neg_mask = ((numeric < 0) & (row_labels == 0)).to_numpy()
 
             if neg_mask.any():
 
-                cleaned_df.loc[neg_mask, rvq_col] = cleaned_df.loc[neg_mask].apply(
-                    lambda row: f"{negative_rvq_code} [{abs(float(row[col]))}]",
-                    axis=1
-                )
+                # Label with the value as written (abs(float(text)))
+                neg_values = cleaned_df[col][neg_mask]
+                neg_labels = {
+                    value: categories.setdefault(f"{negative_rvq_code} [{abs(float(value))}]", len(categories))
+                    for value in pd.unique(neg_values)
+                }
+                row_labels[neg_mask] = neg_values.map(neg_labels).to_numpy()
 
                 rvq_counts[col][negative_rvq_code] = (
-                    rvq_counts[col].get(negative_rvq_code, 0) + neg_mask.sum()
+                    rvq_counts[col].get(negative_rvq_code, 0) + int(neg_mask.sum())
                 )
 
-                for val in numeric[neg_mask].dropna():
-                    limit = abs(float(val))
+                # Limits in order of first appearance
+                limit_codes, limits = pd.factorize(numeric[neg_mask].abs())
+                for limit, count in zip(limits, np.bincount(limit_codes, minlength=len(limits))):
+                    limit = float(limit)
                     detection_limits[col].setdefault(negative_rvq_code, {})
                     detection_limits[col][negative_rvq_code][limit] = (
-                        detection_limits[col][negative_rvq_code].get(limit, 0) + 1
+                        detection_limits[col][negative_rvq_code].get(limit, 0) + int(count)
                     )
 
                 if not keep_original:
-                    cleaned_df.loc[neg_mask, col] = ""
+                    blank_rows = blank_rows | neg_mask
+
+        # Optionally remove the data codes from the variable column
+        values = cleaned_df[col]
+        if blank_rows.any():
+            values = values.where(~blank_rows, "")
+
+        outputs[col] = (values._values, row_labels)
+
+    # -----------------------------------------------------
+    # 3D. BUILD THE OUTPUT FRAME (one allocation)
+    # -----------------------------------------------------
+    # Each RVQ column sits right after its variable; old RVQ columns of the
+    # selected variables are replaced. Untouched columns share their arrays.
+    if columns:
+        labels = pd.Index(list(categories), dtype=object)
+        rvq_dtype = pd.CategoricalDtype(labels)
+        replaced = {f"{col}_RVQ" for col in columns} - set(columns)
+
+        names, arrays = [], []
+        for i, name in enumerate(cleaned_df.columns):
+            if name in replaced:
+                continue
+
+            if name not in outputs:
+                names.append(name)
+                arrays.append(cleaned_df.iloc[:, i]._values)
+                continue
+
+            values, row_labels = outputs[name]
+            if rvq_as_category:
+                rvq_values = pd.Categorical.from_codes(row_labels, dtype=rvq_dtype)
+            else:
+                rvq_values = labels.to_numpy()[row_labels]
+
+            names += [name, f"{name}_RVQ"]
+            arrays += [values, rvq_values]
+
+        cleaned_df = pd.DataFrame(dict(enumerate(arrays)), index=cleaned_df.index, copy=False)
+        cleaned_df.columns = pd.Index(names, name=df.columns.name)
 
     # -----------------------------------------------------
     # 4. BUILD METADATA TABLE
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from Modules.utils.datetime_parsing import parse_datetimes
+
 def assign_datatype(
     df: pd.DataFrame,
     *,
@@ -44,9 +46,9 @@ def assign_datatype(
         raise ValueError("type_mapping must be a dictionary.")
 
     converters = {
-        "date": lambda s: pd.to_datetime(s, errors="coerce"),
-        "date_only": lambda s: pd.to_datetime(s, errors="coerce").dt.date,
-        "time_only": lambda s: pd.to_datetime(s, errors="coerce").dt.time,
+        "date": lambda s: parse_datetimes(s),
+        "date_only": lambda s: parse_datetimes(s).dt.date,
+        "time_only": lambda s: parse_datetimes(s).dt.time,
         "integer": lambda s: pd.to_numeric(s, errors="coerce").astype("Int64"),
         "float": lambda s: pd.to_numeric(s, errors="coerce").astype(float),
         "string": lambda s: s.astype("string"),
@@ -1,7 +1,12 @@
 import re
+import threading
 import unicodedata
+from collections import OrderedDict
+
 import pandas as pd
 
+from Modules.utils.unit_map_loader import current_unit_map
+
 
 # =========================================================
 # UNIT NORMALIZATION HELPERS
@@ -46,34 +51,193 @@ def normalize_unit_string(unit_raw):
 
 
 # ---------------------------------------------------------
-# LOAD UNIT MAP FROM GOOGLE SHEET
+# UNIT MAP (Google Sheet, cached on disk; see Modules/utils/unit_map_loader.py)
 # ---------------------------------------------------------
-GOOGLE_SHEET_CSV_URL = ("https://docs.google.com/spreadsheets/d/e/2PACX-1vS-NlRtFkD24tm2P6v5WjMioxGqggjb9bzalVsg664tHgWX1IPiLxhSpnySSTEe4i7IbzYkfuKXt9OH/pub?gid=1618419054&single=true&output=csv")
-
-unit_map_dict = None
 def load_unit_map():
-    global unit_map_dict
-    if unit_map_dict is not None:
-        return unit_map_dict
+    """The current unit map {raw unit: normalized unit}. Never blocks on the network."""
+    return current_unit_map().units
+
+
+
+# =========================================================
+# PER-HEADER CLEANING (memoized)
+# ---------------------------------------------------------
+# Many files share the same instrument headers, and pivoted files repeat
+# header names thousands of times. Each distinct header is cleaned once
+# per (naming style, unit options, unit-map version); the results live in
+# a process-wide LRU shared by clean_headers() and basic_cleaning().
+# =========================================================
+HEADER_CACHE_ENTRIES = 8192
+
+# These units are ambiguous because they could possibly be apart of the variable name 
+# (they are too short essentially; not unique enough to be clearly identified as units)
+AMBIGUOUS_UNITS = {"m", "g", "s", "%", "h", "l"}
+
+_header_cache = OrderedDict()
+_header_lock = threading.Lock()
+
+
+# ---------------------------------------------------------
+# UNIT DETECTION HELPER
+# ---------------------------------------------------------
+def detect_units(text, unit_map):
+    # Find bracketed units first
+    bracket_match = re.findall(r"\[(.*?)\]|\((.*?)\)", text) # checks for content in () or [] - this is assumed to be the units (returns a list of tuples). eg, [("m/s", "")]
+
+    if bracket_match:
+        content = next(filter(None, bracket_match[0])) # filters out the non empty string or any falsey value out of the first tuple. next() takes the first item from the filtered results. 
+        return content.strip() # return units
+
+    # Fallback: UNIT_MAP search
+    # Token-based fallback (index lookup: the first unit in map order wins)
+    tokens = re.split(r"[^a-zA-Z0-9]+", text.lower())
+    return unit_map.find_token(tokens)
+
+
+# ---------------------------------------------------------
+# VARIABLE NAME CLEANING HELPER
+# ---------------------------------------------------------
+def clean_variable_name(name):
+    name = name.lower()
+    name = re.sub(r"[^a-z0-9]+", "_", name)
+    name = re.sub(r"_+", "_", name).strip("_")
+    return name
+
+
+# ---------------------------------------------------------
+# ONE HEADER
+# ---------------------------------------------------------
+def _clean_header(raw, naming_style, preserve_units, no_units_in_header, unit_map):
+    """
+    Clean one header. Returns its metadata entry:
+        {"cleaned_header": ..., "units_raw": ..., "units_clean": ...}
+    """
+    # Handle empty headers
+    if not isinstance(raw, str) or raw.strip() == "":
+        return {
+            "units_raw": None,
+            "units_clean": None,
+            "cleaned_header": "unnamed_column",
+        }
 
     try:
-        df = pd.read_csv(GOOGLE_SHEET_CSV_URL) # read google sheet with units
-        df = df.dropna(subset=["raw_unit", "normalized_unit"])  # Required columns: raw_unit, normalized_unit
+        # ASCII normalize
+        new = unicodedata.normalize("NFKD", raw) # This breaks apart characters into their simplest ASCII‑friendly components.
+        new = new.encode("ascii", "ignore").decode("ascii") # Ignore any character that can't be represented in ASCII, thn decode back from byte sting to regular python string
+
+        # -----------------------------
+        # UNIT EXTRACTION
+        # -----------------------------
+        raw_units = None if no_units_in_header else detect_units(new, unit_map)
+        cleaned_units = None
+        units_raw_original = None
+        
+
+        if raw_units:
+            normalized = normalize_unit_string(raw_units).lower()
+
+            # 1. Try lookup using normalized raw unit
+            cleaned_units = unit_map.units.get(normalized)
+
+            # 2. Fallback: use normalized itself
+            if cleaned_units is None:
+                cleaned_units = normalized
+
+            # Capture the exact raw_units regardless of case (we want to store this in the metadata table as the original units)
+            match = re.search(re.escape(raw_units), new, flags=re.IGNORECASE)
+            if match:
+                units_raw_original = match.group(0) #group(0) returns teh the full matched substring
+
+        # Remove units from variable name
+        variable = new
+        if raw_units:
+            variable = re.sub(re.escape(raw_units), "", variable, flags=re.IGNORECASE) # Find all instances of the exact raw_units in variable (case insensitive)
+
+        # Remove any left over bracketed content or just the empty brackets themselves
+        variable = re.sub(r"\[[^\]]*\]|\([^\)]*\)", "", variable)
+        variable = variable.strip().rstrip(",")
+
+        # Clean variable name
+        variable_clean = clean_variable_name(variable)
+
+        # Ambiguous unit suffixes - check if the last token matches an ambiguous unit e.g., _g, 
+        if not no_units_in_header and cleaned_units is None:
+            tokens = variable_clean.split("_")
+            last = tokens[-1]
+            if last in AMBIGUOUS_UNITS:
+                cleaned_units = last
+                variable_clean = "_".join(tokens[:-1])
+
+
+        # -----------------------------
+        # FINAL HEADER ASSEMBLY
+        # -----------------------------
+        # HEre we are putting the units in square bracktes as it is more machine compatible
+        if preserve_units and cleaned_units:
+            header = f"{variable_clean} [{cleaned_units}]"
+        else:
+            header = variable_clean
 
-        # Build unit map dict raw -> normalized
-        unit_map_dict = {
-            normalize_unit_string(row["raw_unit"]): str(row["normalized_unit"]).strip()
-            for _, row in df.iterrows()
+        # Naming style
+        if naming_style == "camelCase":
+            parts = variable_clean.split("_")
+            header = parts[0] + "".join(p.capitalize() for p in parts[1:])
+            if preserve_units and cleaned_units:
+                header = f"{header} [{cleaned_units}]"
+
+        elif naming_style == "Title Case":
+            header = " ".join(p.capitalize() for p in variable_clean.split("_"))
+            if preserve_units and cleaned_units:
+                header = f"{header} [{cleaned_units}]"
+
+
+        # Fallback for empty header
+        if header == "":
+            header = "unnamed_column"
+
+        # The metadata entry looks like: {"units_raw": "C", "units_clean": "degC", "cleaned_header": "temp [degC]"}
+        return {
+            "cleaned_header": header,
+            "units_raw": units_raw_original,
+            "units_clean": cleaned_units,
+        }
+
+
+    except Exception:
+        # If anything fails, preserve original header
+        return {
+            "cleaned_header": raw,
+            "units_raw": None,
+            "units_clean": None,
         }
-        return unit_map_dict
 
-    except Exception as e:
-        print("Failed to load unit map from Google Sheet:", e)
-        unit_map_dict = {}
-        return unit_map_dict
 
-UNIT_MAP = load_unit_map()
+def clean_header(raw, *, naming_style, preserve_units, no_units_in_header, unit_map):
+    """
+    Memoized _clean_header(). unit_map is a UnitMap; its version is part of
+    the key, so a refreshed map never serves stale results.
+    """
+    key = (type(raw), raw, naming_style, preserve_units, no_units_in_header, unit_map.version)
+
+    with _header_lock:
+        entry = _header_cache.get(key)
+        if entry is not None:
+            _header_cache.move_to_end(key)
+            return dict(entry)
+
+    entry = _clean_header(raw, naming_style, preserve_units, no_units_in_header, unit_map)
+
+    with _header_lock:
+        _header_cache[key] = entry
+        while len(_header_cache) > HEADER_CACHE_ENTRIES:
+            _header_cache.popitem(last=False)
 
+    return dict(entry)
+
+
+def clear_header_cache():
+    with _header_lock:
+        _header_cache.clear()
 
 
 # =========================================================
@@ -112,152 +276,29 @@ def clean_headers(
     # 2. CORE PROCESSING LOGIC
     # -----------------------------------------------------
 
-    # These units are ambiguous because they could possibly be apart of the variable name 
-    # (they are too short essentially; not unique enough to be clearly identified as units)
-    AMBIGUOUS_UNITS = {"m", "g", "s", "%", "h", "l"}
-
-
-    # -----------------------------------------------------
-    # UNIT DETECTION HELPER
-    # -----------------------------------------------------
-    def detect_units(text):
-        # Find bracketed units first
-        bracket_match = re.findall(r"\[(.*?)\]|\((.*?)\)", text) # checks for content in () or [] - this is assumed to be the units (returns a list of tuples). eg, [("m/s", "")]
-
-        if bracket_match:
-            content = next(filter(None, bracket_match[0])) # filters out the non empty string or any falsey value out of the first tuple. next() takes the first item from the filtered results. 
-            return content.strip() # return units
-
-        # Fallback: UNIT_MAP search
-        # Token-based fallback
-        tokens = re.split(r"[^a-zA-Z0-9]+", text.lower())
-        for raw_unit in UNIT_MAP:
-            if raw_unit in tokens:
-                return raw_unit
-
-        return None
+    # One version of the unit map for the whole run
+    unit_map = current_unit_map()
 
     # -----------------------------------------------------
-    # VARIABLE NAME CLEANING HELPER
-    # -----------------------------------------------------
-    def clean_variable_name(name):
-        name = name.lower()
-        name = re.sub(r"[^a-z0-9]+", "_", name)
-        name = re.sub(r"_+", "_", name).strip("_")
-        return name
-
-    # -----------------------------------------------------
-    # BEGIN PROCESSING EACH HEADER
+    # BEGIN PROCESSING EACH HEADER (memoized per distinct header)
     # -----------------------------------------------------
     original = list(df.columns)
     cleaned = []
     metadata = {}
 
     for raw in original:
+        entry = clean_header(
+            raw,
+            naming_style=naming_style,
+            preserve_units=preserve_units,
+            no_units_in_header=no_units_in_header,
+            unit_map=unit_map,
+        )
+        cleaned.append(entry["cleaned_header"])
+
+        # The metadata dict looks like: "{ Temp (°C)": {"variable": "temp", "units_raw": "C", "units_clean": "degC", "cleaned_header": "temp [degC]"} , ... },
+        metadata[raw] = entry
 
-        # Handle empty headers
-        if not isinstance(raw, str) or raw.strip() == "":
-            fallback = "unnamed_column"
-            cleaned.append(fallback)
-            metadata[raw] = {
-                "units_raw": None,
-                "units_clean": None,
-                "cleaned_header": fallback,
-            }
-            continue
-
-        try:
-            # ASCII normalize
-            new = unicodedata.normalize("NFKD", raw) # This breaks apart characters into their simplest ASCII‑friendly components.
-            new = new.encode("ascii", "ignore").decode("ascii") # Ignore any character that can't be represented in ASCII, thn decode back from byte sting to regular python string
-
-            # -----------------------------
-            # UNIT EXTRACTION
-            # -----------------------------
-            raw_units = None if no_units_in_header else detect_units(new)
-            cleaned_units = None
-            units_raw_original = None
-            
-
-            if raw_units:
-                normalized = normalize_unit_string(raw_units).lower()
-
-                # 1. Try lookup using normalized raw unit
-                cleaned_units = UNIT_MAP.get(normalized)
-
-                # 2. Fallback: use normalized itself
-                if cleaned_units is None:
-                    cleaned_units = normalized
-
-                # Capture the exact raw_units regardless of case (we want to store this in the metadata table as the original units)
-                match = re.search(re.escape(raw_units), new, flags=re.IGNORECASE)
-                if match:
-                    units_raw_original = match.group(0) #group(0) returns teh the full matched substring
-
-            # Remove units from variable name
-            variable = new
-            if raw_units:
-                variable = re.sub(re.escape(raw_units), "", variable, flags=re.IGNORECASE) # Find all instances of the exact raw_units in variable (case insensitive)
-
-            # Remove any left over bracketed content or just the empty brackets themselves
-            variable = re.sub(r"\[[^\]]*\]|\([^\)]*\)", "", variable)
-            variable = variable.strip().rstrip(",")
-
-            # Clean variable name
-            variable_clean = clean_variable_name(variable)
-
-            # Ambiguous unit suffixes - check if the last token matches an ambiguous unit e.g., _g, 
-            if not no_units_in_header and cleaned_units is None:
-                tokens = variable_clean.split("_")
-                last = tokens[-1]
-                if last in AMBIGUOUS_UNITS:
-                    cleaned_units = last
-                    variable_clean = "_".join(tokens[:-1])
-
-
-            # -----------------------------
-            # FINAL HEADER ASSEMBLY
-            # -----------------------------
-            # HEre we are putting the units in square bracktes as it is more machine compatible
-            if preserve_units and cleaned_units:
-                header = f"{variable_clean} [{cleaned_units}]"
-            else:
-                header = variable_clean
-
-            # Naming style
-            if naming_style == "camelCase":
-                parts = variable_clean.split("_")
-                header = parts[0] + "".join(p.capitalize() for p in parts[1:])
-                if preserve_units and cleaned_units:
-                    header = f"{header} [{cleaned_units}]"
-
-            elif naming_style == "Title Case":
-                header = " ".join(p.capitalize() for p in variable_clean.split("_"))
-                if preserve_units and cleaned_units:
-                    header = f"{header} [{cleaned_units}]"
-
-
-            # Fallback for empty header
-            if header == "":
-                header = "unnamed_column"
-
-            cleaned.append(header)
-
-            # The metadata dict looks like: "{ Temp (°C)": {"variable": "temp", "units_raw": "C", "units_clean": "degC", "cleaned_header": "temp [degC]"} , ... },
-            metadata[raw] = {
-                "cleaned_header": header,
-                "units_raw": units_raw_original,
-                "units_clean": cleaned_units,
-            }
-
-        except Exception:
-            # If anything fails, preserve original header
-            cleaned.append(raw)
-            metadata[raw] = {
-                "cleaned_header": raw,
-                "units_raw": None,
-                "units_clean": None,
-            }
     # -----------------------------------------------------
     # 3d. ENSURE UNIQUENESS
     # -----------------------------------------------------
@@ -1,6 +1,9 @@
 import pandas as pd
 import re
 
+from Modules.utils.datetime_parsing import parse_datetimes
+from Modules.utils.storage import as_text
+
 
 def convert_to_iso(
     df: pd.DataFrame,
@@ -43,7 +46,7 @@ def convert_to_iso(
         raise ValueError(f"Column '{date_time_col}' does not exist.")
 
     cleaned_df = df.copy()
-    series = cleaned_df[date_time_col].astype(str)
+    series = as_text(cleaned_df[date_time_col])
 
     # -----------------------------------------------------
     # 2. Determine how to parse
@@ -64,55 +67,29 @@ def convert_to_iso(
         dayfirst = None
         force_year_first = False
 
-    iso_values = []
-
     # -----------------------------------------------------
-    # 3. Parse each row
+    # 3. Parse each UNIQUE value once (whole-array operations)
     # -----------------------------------------------------
-    for value in series:
-
-        # YEAR-FIRST strict branch
-        if force_year_first and re.match(r"^\d{4}[\-/]", value.strip()):
-            try:
-                parsed = pd.to_datetime(value, errors="raise")
-                iso_values.append(parsed)
-                continue
-            except Exception:
-                pass  # fall through to flexible parsing
-
-        # Flexible parsing
-        try:
-            d1 = pd.to_datetime(value, errors="coerce", dayfirst=True)
-            d2 = pd.to_datetime(value, errors="coerce", dayfirst=False)
-        except Exception:
-            iso_values.append(pd.NaT)
-            continue
-
-        # Both failed
-        if pd.isna(d1) and pd.isna(d2):
-            iso_values.append(pd.NaT)
-            continue
-
-        # Ambiguous
-        if not pd.isna(d1) and not pd.isna(d2) and d1 != d2:
-            if dayfirst is None:
-                iso_values.append(pd.NaT)
-                continue
-            parsed = pd.to_datetime(value, errors="coerce", dayfirst=dayfirst)
-            iso_values.append(parsed)
-            continue
-
-        # Only one succeeded
-        parsed = d1 if not pd.isna(d1) else d2
-        iso_values.append(parsed)
+    # Logger files repeat the same timestamps heavily, so parsing the
+    # uniques and mapping back with the codes does far less work.
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques, dtype=object)
+
+    try:
+        parsed = _parse_uniques(uniques, dayfirst, force_year_first)
+    except (ValueError, TypeError):
+        # Mixed time zones (or tz-aware + naive) cannot share one array
+        parsed = None
+
+    if parsed is None:
+        parsed = [_parse_scalar(value, dayfirst, force_year_first) for value in uniques]
 
     # -----------------------------------------------------
     # 4. Build ISO column
     # -----------------------------------------------------
-    # Convert the parsed datetime values into a Series before formatting.
-    # pd.to_datetime(iso_values) sometimes returns a DatetimeIndex (not a Series)and DatetimeIndex does NOT support the `.dt` accessor. 
-    # Wrapping it in pd.Series(...) guarantees we always have a Series, so `.dt.strftime(...)` works reliably for all inputs.
-    iso_series = pd.Series(pd.to_datetime(iso_values)).dt.strftime("%Y-%m-%dT%H:%M:%S")
+    # Format the uniques, then expand to every row with the codes.
+    iso_uniques = pd.Series(pd.to_datetime(parsed)).dt.strftime("%Y-%m-%dT%H:%M:%S")
+    iso_series = pd.Series(iso_uniques.to_numpy()[codes], index=cleaned_df.index)
 
     new_col = f"{date_time_col}_ISO"
 
@@ -120,3 +97,109 @@ def convert_to_iso(
     cleaned_df.insert(orig_index + 1, new_col, iso_series)
 
     return cleaned_df
+
+
+# ---------------------------------------------------------
+# Vectorized parser (one call per parse mode, not per value)
+# ---------------------------------------------------------
+YEAR_FIRST = r"^\d{4}[\-/]"
+YMD_TOKENS = r"^\s*(\d{4})([-/. ])(\d{1,2})\2(\d{1,2})(?!\d)"
+
+
+def _parse_uniques(values, dayfirst, force_year_first):
+    """
+    Parse an Index of strings with the same rules as _parse_scalar().
+
+    Returns a DatetimeIndex, or None when the values need the scalar path
+    (results that do not fit one datetime dtype, e.g. mixed time zones).
+    """
+    d1 = parse_datetimes(values, format="mixed", dayfirst=True)
+    d2 = parse_datetimes(values, format="mixed", dayfirst=False)
+
+    if not (isinstance(d1, pd.DatetimeIndex) and isinstance(d2, pd.DatetimeIndex)) or d1.dtype != d2.dtype:
+        return None
+
+    d1 = _dayfirst_year_first(values, d1)
+
+    ok1 = d1.notna()
+    ok2 = d2.notna()
+
+    # Only one succeeded (or both agree) ---> take whichever worked
+    result = d1.where(ok1, d2)
+
+    # Ambiguous: both parsed but disagree
+    ambiguous = ok1 & ok2 & (d1 != d2)
+    if ambiguous.any():
+        if dayfirst is None:
+            result = result.where(~ambiguous, pd.NaT)
+        elif not dayfirst:
+            result = result.where(~ambiguous, d2)
+
+    # YEAR-FIRST strict branch (wins whenever it parses)
+    if force_year_first:
+        year_first = values.str.strip().str.match(YEAR_FIRST)
+        if year_first.any():
+            dy = parse_datetimes(values.where(year_first), format="mixed")
+            if not isinstance(dy, pd.DatetimeIndex) or dy.dtype != result.dtype:
+                return None
+            result = dy.where(year_first & dy.notna(), result)
+
+    return result
+
+
+def _dayfirst_year_first(values, d1):
+    """
+    Match scalar day-first parsing of year-first dates.
+
+    Parsing ONE value with dayfirst=True reads "2020-01-05" as Y-D-M
+    (2020-05-01) whenever the last number is <= 12, while the array parser
+    reads it as ISO. The per-row code relied on that (it is why such dates
+    are ambiguous), so the swap is applied here to keep the same results.
+    """
+    parts = values.str.extract(YMD_TOKENS)
+    month = pd.to_numeric(parts[2]).to_numpy()
+    day = pd.to_numeric(parts[3]).to_numpy()
+
+    swap = (day <= 12) & (month != day) & d1.notna()
+    if not swap.any():
+        return d1
+
+    base = d1[swap]
+    naive = base.tz_localize(None) if base.tz is not None else base
+    target = pd.to_datetime(pd.DataFrame({"year": naive.year, "month": day[swap], "day": month[swap]}))
+
+    swapped = pd.Series(d1)
+    swapped[swap] = base + (pd.DatetimeIndex(target) - naive.normalize())
+    return pd.DatetimeIndex(swapped)
+
+
+def _parse_scalar(value, dayfirst, force_year_first):
+    """
+    Parse one value (fallback when the uniques cannot share one array).
+    """
+    # YEAR-FIRST strict branch
+    if force_year_first and re.match(YEAR_FIRST, value.strip()):
+        try:
+            return pd.to_datetime(value, errors="raise")
+        except Exception:
+            pass  # fall through to flexible parsing
+
+    # Flexible parsing
+    try:
+        d1 = pd.to_datetime(value, errors="coerce", dayfirst=True)
+        d2 = pd.to_datetime(value, errors="coerce", dayfirst=False)
+    except Exception:
+        return pd.NaT
+
+    # Both failed
+    if pd.isna(d1) and pd.isna(d2):
+        return pd.NaT
+
+    # Ambiguous
+    if not pd.isna(d1) and not pd.isna(d2) and d1 != d2:
+        if dayfirst is None:
+            return pd.NaT
+        return d1 if dayfirst else d2
+
+    # Only one succeeded
+    return d1 if not pd.isna(d1) else d2
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from Modules.utils.datetime_parsing import format_datetimes, parse_datetimes
+
 
 def merge_date_time(
     df: pd.DataFrame,
@@ -54,11 +56,7 @@ def merge_date_time(
     #
     # 2. Parse DATE column
     # -----------------------------------------------------
-    parsed_dates = pd.to_datetime(
-        cleaned_df[date_column],
-        format="mixed",
-        errors="coerce"
-    )
+    parsed_dates = parse_datetimes(cleaned_df[date_column], format="mixed")
 
     cleaned_df["_temp_date"] = parsed_dates.dt.date
 
@@ -67,10 +65,7 @@ def merge_date_time(
     # -----------------------------------------------------
     cleaned_df["_temp_time_raw"] = cleaned_df[time_column].replace("", pd.NA)
 
-    parsed_times = pd.to_datetime(
-        cleaned_df["_temp_time_raw"],
-        errors="coerce"
-    )
+    parsed_times = parse_datetimes(cleaned_df["_temp_time_raw"])
 
     cleaned_df["_temp_time"] = parsed_times.dt.time
 
@@ -82,14 +77,13 @@ def merge_date_time(
     # -----------------------------------------------------
     # 4. Combine DATE + TIME
     # -----------------------------------------------------
-    combined = pd.to_datetime(
+    combined = parse_datetimes(
         cleaned_df["_temp_date"].astype(str)
         + " "
-        + cleaned_df["_temp_time"].astype(str),
-        errors="coerce"
+        + cleaned_df["_temp_time"].astype(str)
     )
 
-    iso_series = pd.Series(combined).dt.strftime("%Y-%m-%dT%H:%M:%S")
+    iso_series = format_datetimes(combined, "%Y-%m-%dT%H:%M:%S")
 
     # Insert new column beside original date column
     orig_index = cleaned_df.columns.get_loc(date_column)
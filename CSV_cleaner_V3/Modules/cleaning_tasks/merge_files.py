@@ -1,5 +1,7 @@
 import pandas as pd
 
+from Modules.utils.reshape_backends import get_backend
+
 def merge_files(
     dfs_dict: dict,
     *,
@@ -13,7 +15,8 @@ def merge_files(
     This task is designed for workflows where a user uploads several files
     that share the same structure (same columns) and wants them combined into
     one dataset. The function performs safe copying, optional source tracking,
-    and concatenation with index reset.
+    and concatenation with index reset (run by the reshape backend, see
+    Modules/utils/reshape_backends.py).
 
     Parameters
     ----------
@@ -57,7 +60,8 @@ def merge_files(
     frames = []
 
     for filename, df in dfs_dict.items():
-        temp = df.copy()
+        # Shallow copy: the concatenation below copies the data anyway
+        temp = df.copy(deep=False)
 
         # Optional provenance tracking
         if add_source:
@@ -65,7 +69,7 @@ def merge_files(
 
         frames.append(temp)
 
-    merged_df = pd.concat(frames, ignore_index=True)
+    merged_df = get_backend().concat_rows(frames)
 
     # -----------------------------------------------------
     # 3. RETURN
@@ -1,12 +1,11 @@
 import pandas as pd
-import streamlit as st
+from Modules.task_orchestration.frame import TaskFrame
 
 
 def merge_header_rows(
-    df: pd.DataFrame,
+    frame,
     *,
     row: int,
-    filename: str,
     **kwargs
 ):
     """
@@ -15,39 +14,28 @@ def merge_header_rows(
         - Merges values from that row into the header
         - Drops the merged row
         - Updates row_map accordingly
-        - Returns only cleaned_df
+        - Returns a new TaskFrame (df + row_map)
 
     Parameters
     ----------
-    df : pd.DataFrame
-        The input dataframe.
+    frame : TaskFrame
+        The file to process. frame.row_map is the authoritative mapping of
+        current rows to ORIGINAL row numbers.
     row : int or None
         The ORIGINAL row number (1-based) to merge into the header.
         This is supplied by the widget layer.
-    filename : str or None
-        The name of the file being processed. Required in Streamlit mode
-        to retrieve the authoritative row_map from session_state.
 
     ----------------------------------------------------------------------
     OFFLINE / NON‑STREAMLIT USAGE
     ----------------------------------------------------------------------
-    If running this task outside Streamlit (e.g., in a notebook), you can
-    manually construct a row_map like this:
+    If running this task outside Streamlit (e.g., in a notebook), wrap the
+    DataFrame in a frame. Rows are numbered from the current order:
 
-        row_map = list(range(1, len(df) + 1))
+        frame = TaskFrame.from_df(df)
+        frame = merge_header_rows(frame, row=2)
 
-    And replace the session_state lookup:
-
-        # Instead of:
-        row_map = st.session_state.row_map[filename]
-
-        # Use:
-        row_map = list(range(1, len(df) + 1))
-
-    IMPORTANT:
-        - This will renumber rows after each merge.
-        - Undo/redo and provenance will NOT be preserved.
-        - This is only recommended for simple, one‑off usage.
+    Keep passing the returned frame to later tasks so row numbers stay
+    consistent across merges.
     ----------------------------------------------------------------------
     """
 
@@ -55,22 +43,18 @@ def merge_header_rows(
     # 1. VALIDATION – Hard Errors
     # -----------------------------------------------------
 
+    if not isinstance(frame, TaskFrame):
+        raise ValueError("Input must be a TaskFrame.")
+
+    df = frame.df
+
     if not isinstance(df, pd.DataFrame):
         raise ValueError("Input must be a pandas DataFrame.")
 
     if row is None:
         raise ValueError("A row number must be provided for merging.")
 
-    if not filename:
-        raise ValueError("filename must be provided to retrieve row_map.")
-
-    if "row_map" not in st.session_state:
-        raise ValueError("row_map not found in session_state.")
-
-    if filename not in st.session_state.row_map:
-        raise ValueError(f"No row_map found for file '{filename}'.")
-
-    row_map = st.session_state.row_map[filename]
+    row_map = frame.row_map
 
     if len(row_map) != len(df):
         raise ValueError(
@@ -89,7 +73,7 @@ def merge_header_rows(
         idx = row_map.index(row)
     except ValueError:
         # Row not found → nothing to merge
-        return cleaned_df
+        return frame.updated(cleaned_df)
 
     # Merge selected row into header
     header = list(cleaned_df.columns.astype(str))
@@ -104,29 +88,14 @@ def merge_header_rows(
     cleaned_df = cleaned_df.drop(index=[idx]).reset_index(drop=True)
 
     # -----------------------------------------------------
-    # 3. UPDATE ROW MAP (Streamlit mode)
+    # 3. UPDATE ROW MAP
     # -----------------------------------------------------
     new_row_map = [row_map[i] for i in range(len(row_map)) if i != idx]
-    st.session_state.row_map[filename] = new_row_map
-
-    # -----------------------------------------------------
-    # 4. PURE PYTHON MODE (no Streamlit)
-    # -----------------------------------------------------
-    # If using this function outside Streamlit, you must maintain your own row_map.
-    #
-    # Example:
-    #     # ORIGINAL row_map before merging
-    #     row_map = list(range(1, len(df) + 1))
-    #
-    #     # Remove the merged row (idx is the CURRENT index)
-    #     new_row_map = [row_map[i] for i in range(len(row_map)) if i != idx]
-    #
-    # The task itself does NOT depend on Streamlit; only the row_map update does.
 
     # Apply new header
     cleaned_df.columns = merged_header
 
     # -----------------------------------------------------
-    # 5. RETURN
+    # 4. RETURN
     # -----------------------------------------------------
-    return cleaned_df
+    return frame.updated(cleaned_df, row_map=new_row_map)
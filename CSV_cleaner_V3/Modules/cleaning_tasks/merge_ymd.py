@@ -1,5 +1,7 @@
 import pandas as pd
 
+from Modules.utils.datetime_parsing import format_datetimes
+
 def merge_ymd(
     df: pd.DataFrame,
     *,
@@ -47,7 +49,7 @@ def merge_ymd(
     )
 
     # --- Format as ISO date ---
-    iso_series = combined.dt.strftime("%Y-%m-%d")
+    iso_series = format_datetimes(combined, "%Y-%m-%d")
 
     # Insert new column beside the original year column
     orig_index = cleaned_df.columns.get_loc(year_column)
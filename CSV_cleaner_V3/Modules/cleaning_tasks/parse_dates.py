@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from Modules.utils.datetime_parsing import parse_datetimes
+
 
 def parse_dates(
     df: pd.DataFrame,
@@ -62,8 +64,8 @@ def parse_dates(
     # -----------------------------------------------------
     cleaned_df = df.copy()
 
-    # Parse datetime column (coerce errors → NaT)
-    parsed = pd.to_datetime(cleaned_df[date_time_col], errors="coerce")
+    # Parse datetime column (coerce errors → NaT; unique values only, cached)
+    parsed = parse_datetimes(cleaned_df[date_time_col])
 
     # Temporary parsed column
     cleaned_df["_parsed_dt"] = parsed
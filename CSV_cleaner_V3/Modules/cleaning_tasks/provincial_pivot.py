@@ -1,5 +1,7 @@
 import pandas as pd
 
+from Modules.utils.reshape_backends import get_backend
+
 
 def provincial_pivot(
     df: pd.DataFrame,
@@ -61,53 +63,19 @@ def provincial_pivot(
             if col not in df.columns:
                 raise ValueError(f"Metadata column '{col}' listed in additional_params does not exist.")
 
-    cleaned_df = df.copy()
-
     # -----------------------------------------------------
     # 2. CORE PROCESSING
     # -----------------------------------------------------
 
-    # Drop rows where variable is missing
-    cleaned_df = cleaned_df[cleaned_df[var_col].notna()].copy()
-
-    variables = cleaned_df[var_col].unique().tolist()
-    filtered_dfs = []
-
-    for var in variables:
-        sub = cleaned_df[cleaned_df[var_col] == var].copy()
-
-        # Base column name
-        new_col_name = var
-
-        # Merge metadata into header
-        if additional_params:
-            meta_values = []
-            for param in additional_params:
-                first_val = sub[param].dropna().iloc[0] if sub[param].notna().any() else "NA"
-                meta_values.append(str(first_val))
-
-            meta_str = "_".join(meta_values)
-            new_col_name = f"{var}_{meta_str}"
-
-            # Drop metadata columns
-            sub = sub.drop(columns=additional_params)
-
-        # Rename value column
-        sub = sub.rename(columns={value_col: new_col_name})
-
-        # Drop variable column
-        sub = sub.drop(columns=[var_col])
-
-        # Move new column to end
-        extracted = sub[new_col_name]
-        sub = sub.drop(columns=[new_col_name])
-        sub[new_col_name] = extracted
-
-        sub = sub.reset_index(drop=True)
-        filtered_dfs.append(sub)
-
-    # Merge vertically
-    final_df = pd.concat(filtered_dfs, ignore_index=True)
+    # Drop rows where variable is missing, then stack the rows of each
+    # variable with its values in a column of its own (reshape backend,
+    # see Modules/utils/reshape_backends.py)
+    final_df = get_backend().spread_by_variable(
+        df,
+        var_col=var_col,
+        value_col=value_col,
+        additional_params=additional_params
+    )
 
     # -----------------------------------------------------
     # 3. RETURN
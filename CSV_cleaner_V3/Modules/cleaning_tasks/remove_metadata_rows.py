@@ -1,12 +1,13 @@
 import pandas as pd
-import streamlit as st
+from Modules.task_orchestration.frame import TaskFrame
+from Modules.utils.header_locator import find_header_row
 
 def remove_metadata_rows(
-    df: pd.DataFrame,
+    frame,
     *,
-    filename=None,
     identifiers,
     metadata_extract=None,
+    header_row=None,
     **kwargs
 ):
     """
@@ -18,14 +19,25 @@ def remove_metadata_rows(
         - Promotes the detected header row to column names.
         - Ensures column names are unique.
         - Optionally extracts metadata values into new columns using rule-based cleaning.
-        - Updates row_map (Streamlit mode).
-        - Returns only cleaned_df.
+        - Updates row_map.
+        - Returns a new TaskFrame (df + row_map).
+
+    header_row (optional) is the row position the widget detected. It is
+    only a hint: the rows above it are still checked, and the full search
+    runs when the hint is wrong (e.g. for another file of the batch).
+
+    Outside Streamlit, wrap your DataFrame first: TaskFrame.from_df(df).
     """
 
     # -----------------------------------------------------
     # 1. VALIDATION - Hard Errors
     # -----------------------------------------------------
 
+    if not isinstance(frame, TaskFrame):
+        raise ValueError("Input must be a TaskFrame.")
+
+    df = frame.df
+
     if not isinstance(df, pd.DataFrame):
         raise ValueError("df must be a pandas DataFrame.")
 
@@ -38,29 +50,21 @@ def remove_metadata_rows(
     if metadata_extract is not None and not isinstance(metadata_extract, dict):
         raise ValueError("metadata_extract must be a dictionary or None.")
 
+    if header_row is not None and (isinstance(header_row, bool) or not isinstance(header_row, int)):
+        raise ValueError("header_row must be an integer or None.")
+
     cleaned_df = df.copy()
 
     # -----------------------------------------------------
     # 2. CORE PROCESSING
     # -----------------------------------------------------
 
-    # Normalize identifiers
-    identifiers_norm = [x.strip().lower() for x in identifiers]
-
-    # Normalize df for detection
-    df_str = cleaned_df.astype(str).applymap(lambda x: x.strip().lower())
-
-    # Detect header row
-    header_index = None
-    for idx, row in df_str.iterrows():
-        row_values = set(row.tolist())
-        if all(identifier in row_values for identifier in identifiers_norm):
-            header_index = idx
-            break
+    # Detect header row (leading rows only; see Modules/utils/header_locator.py)
+    header_index = find_header_row(cleaned_df, identifiers, hint=header_row)
 
     # If no header found → return unchanged
     if header_index is None:
-        return cleaned_df
+        return frame.updated(cleaned_df)
 
     # Metadata rows (to extract from)
     metadata_df = cleaned_df.iloc[:header_index].copy()
@@ -124,31 +128,13 @@ def remove_metadata_rows(
             cleaned_df[new_col] = value
 
     # -----------------------------------------------------
-    # 4. UPDATE ROW MAP (Streamlit mode)
+    # 4. UPDATE ROW MAP
     # -----------------------------------------------------
     # This task removes metadata rows + the header row, so row_map must be
     # updated to keep undo/redo and provenance correct.
-    #
-    # In Streamlit:
-    #     original_map = st.session_state.row_map[filename]
-    #     new_map = original_map[header_index + 1:]
-    #     st.session_state.row_map[filename] = new_map
-    #
-    # Outside Streamlit:
-    #     You must maintain your own row_map.
-    #     Example:
-    #         original_map = list(range(1, len(df) + 1))
-    #         # Remove rows 0..header_index (inclusive)
-    #         new_map = original_map[header_index + 1:]
-    #
-    # The task itself does NOT depend on Streamlit; only the row_map update does.
-
-    if filename is not None and "row_map" in st.session_state:
-        original_map = st.session_state.row_map.get(filename, [])
-        new_map = original_map[header_index + 1:]
-        st.session_state.row_map[filename] = new_map
+    new_map = frame.row_map[header_index + 1:]
 
     # -----------------------------------------------------
     # 5. RETURN
     # -----------------------------------------------------
-    return cleaned_df
+    return frame.updated(cleaned_df, row_map=new_map)
@@ -1,23 +1,29 @@
 import pandas as pd
-import streamlit as st
+from Modules.task_orchestration.frame import TaskFrame
 
-def remove_rows(df, *, filename, row_index, **kwargs):
+def remove_rows(frame, *, row_index, **kwargs):
     """
     Remove a single row by its CURRENT index.
-    
+
     Updating row_map:
-    In Streamlit, row_map is stored in session_state and must be updated
-    because removing a row changes the mapping between:
+    Removing a row changes the mapping between:
     original_row_number  and the current_row_position
+    so this task receives and returns a TaskFrame (df + row_map) instead of
+    reaching into st.session_state.
 
-    If using this function OUTSIDE Streamlit, you must maintain your own row_map manually:
-         old_map = list(range(1, len(df) + 1))
-         new_map = [old_map[i] for i in range(len(old_map)) if i != row_index]
+    Outside Streamlit, wrap your DataFrame first:
+         frame = TaskFrame.from_df(df)
+         frame = remove_rows(frame, row_index=3)
     """
 
     # ---------------------------------------------------------
     # 1. VALIDATION (hard)
     # ---------------------------------------------------------
+    if not isinstance(frame, TaskFrame):
+        raise ValueError("Input must be a TaskFrame.")
+
+    df = frame.df
+
     if not isinstance(df, pd.DataFrame):
         raise ValueError("Input must be a pandas DataFrame.")
 
@@ -33,14 +39,13 @@ def remove_rows(df, *, filename, row_index, **kwargs):
     cleaned_df = df.drop(index=row_index).reset_index(drop=True)
 
     # ---------------------------------------------------------
-    # 3. UPDATE ROW MAP (Streamlit mode)
+    # 3. UPDATE ROW MAP
     # ---------------------------------------------------------
-    old_map = st.session_state.row_map[filename]
+    old_map = frame.row_map
     new_map = [old_map[i] for i in range(len(old_map)) if i != row_index]
-    st.session_state.row_map[filename] = new_map
 
     # ---------------------------------------------------------
     # 4. RETURN
     # ---------------------------------------------------------
     # No metadata for this task
-    return cleaned_df
+    return frame.updated(cleaned_df, row_map=new_map)
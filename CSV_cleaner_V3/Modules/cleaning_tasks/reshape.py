@@ -1,5 +1,7 @@
 import pandas as pd
 
+from Modules.utils.reshape_backends import get_backend
+
 # =========================================================
 # Helper functions
 # =========================================================
@@ -56,7 +58,8 @@ def wide_to_long(
     **kwargs
 ):
     """
-    Convert wide-format table to long format using melt().
+    Convert wide-format table to long format using melt()
+    (run by the reshape backend, see Modules/utils/reshape_backends.py).
     """
 
     if not isinstance(df, pd.DataFrame):
@@ -66,7 +69,8 @@ def wide_to_long(
         if col not in df.columns:
             raise ValueError(f"Column '{col}' does not exist in the dataset.")
 
-    long_df = df.melt(
+    long_df = get_backend().melt(
+        df,
         id_vars=id_cols,
         value_vars=value_cols,
         var_name=var_name,
@@ -87,7 +91,8 @@ def long_to_wide(
     **kwargs
 ):
     """
-    Convert long-format table to wide format using pivot_table().
+    Convert long-format table to wide format using pivot_table()
+    (run by the reshape backend, see Modules/utils/reshape_backends.py).
     """
 
     if not isinstance(df, pd.DataFrame):
@@ -97,12 +102,12 @@ def long_to_wide(
         if col not in df.columns:
             raise ValueError(f"Column '{col}' does not exist in the dataset.")
 
-    wide_df = df.pivot_table(
+    wide_df = get_backend().pivot_first(
+        df,
         index=id_cols,
         columns=variable_col,
-        values=value_col,
-        aggfunc="first"
-    ).reset_index()
+        values=value_col
+    )
 
     wide_df.columns = dedupe_columns(list(wide_df.columns))
 
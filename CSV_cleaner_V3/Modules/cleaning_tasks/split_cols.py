@@ -1,6 +1,8 @@
 import pandas as pd
 import re
 
+from Modules.utils.storage import as_text
+
 
 def split_column(
     df: pd.DataFrame,
@@ -65,8 +67,7 @@ def split_column(
 
     # Normalize whitespace
     cleaned_series = (
-        cleaned_df[column]
-        .astype(str)
+        as_text(cleaned_df[column])
         .str.replace("\u00A0", " ", regex=False)   # NBSP --> space
         .str.replace(r"\s+", " ", regex=True)      # collapse whitespace
         .str.strip()
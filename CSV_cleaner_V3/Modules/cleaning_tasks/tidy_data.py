@@ -2,49 +2,122 @@ import numpy as np
 import pandas as pd
 import re
 from Modules.cleaning_tasks.headers import clean_headers as advanced_clean_headers
+from Modules.utils.storage import is_arrow_string
 
 # =========================================================
 # TIDY DATA CLEANING PIPELINE
 # ---------------------------------------------------------
 # This module performs a sequence of lightweight, safe,
 # automatic cleaning steps that prepare a dataset for
-# downstream processing. 
-# Each step returns:(cleaned_df)
+# downstream processing:
+#   1. remove columns, then rows, that contain ONLY missing values
+#   2. standardize NaN-like tokens to ""
+#   3. trim whitespace from column names and string cells
+#   4. fix duplicate column names
 #
-# The final `basic_cleaning()` function chains all steps
-# together and merges their summaries.
+# The steps are fused into ONE pass over the columns:
+#   - missing values are found once for the empty column and row checks
+#   - text columns are factorized, so tokens are looked up and
+#     whitespace is stripped on the UNIQUE values only
+#   - the result is assembled once; numeric columns without
+#     missing values are shared, not copied
+#
+# The result is the same as running the steps one after another:
+# NaN-like tokens are matched on the raw values, BEFORE stripping.
 # =========================================================
+NA_TOKENS = ['NA', '?', 'N/A', '', 'Nan', 'NaN', 'NAN', 'Null']
+
 
 # ---------------------------------------------------------
-# 1. Remove columns that contain ONLY missing values
+# 1. Columns and rows that contain ONLY missing values
 # ---------------------------------------------------------
-def remove_empty_columns(df):
-    empty_cols = [col for col in df.columns if df[col].isnull().all()]
-    return df.drop(columns=empty_cols) if empty_cols else df.copy()
+def find_empty(df):
+    """
+    Boolean masks of the empty columns, and of the rows that are empty
+    once those columns are removed.
+    """
+    present = df.notna().to_numpy()
+    empty_cols = ~present.any(axis=0)
+    empty_rows = ~present[:, ~empty_cols].any(axis=1)
+    return empty_cols, empty_rows
 
 
 # ---------------------------------------------------------
-# 2. Remove rows that contain ONLY missing values
+# 2 + 3. Standardize NaN-like tokens, then trim whitespace
 # ---------------------------------------------------------
-def remove_empty_rows(df):
-    mask = ~df.isna().all(axis=1)
-    return df[mask].copy()
+def _strip_cell(x):
+    return x.strip() if isinstance(x, str) else x
 
 
-# ---------------------------------------------------------
-# 3. Standardize NaN-like values into a single representation
-# ---------------------------------------------------------
-def standardize_nans(df, nans=None):
+def tidy_values(series, tokens, keep=None):
     """
-    Replace common NaN-like tokens with empty string.
-    Widget handles soft validation.
+    NaN-like tokens and missing values ---> "", then strip string cells.
+
+    Parameters
+    ----------
+    series : pandas.Series
+        One column.
+    tokens : set[str]
+        NaN-like tokens (exact match on the raw value).
+    keep : numpy.ndarray[bool] or None
+        Rows to keep (None = all).
+
+    Returns
+    -------
+    Array of the kept rows (shared with `series` when nothing changes).
     """
-    na_values = ['NA', '?', 'N/A', '', np.nan, None, 'Nan', 'NaN','NAN', 'NA', 'Null']
-    if nans:
-        na_values.extend(nans)
+    if keep is not None:
+        series = series[keep]
 
-    cleaned_df = df.replace(na_values, '')
-    return cleaned_df
+    dtype = series.dtype
+    numpy_dtype = isinstance(dtype, np.dtype)
+
+    # Numbers: only missing values change (float ---> object with "")
+    if numpy_dtype and dtype.kind in "biu":
+        return series.to_numpy()
+
+    if numpy_dtype and dtype.kind in "fc":
+        values = series.to_numpy()
+        missing = np.isnan(values)
+        if not missing.any():
+            return values
+        values = values.astype(object)
+        values[missing] = ""
+        return values
+
+    # Text: tokens and whitespace are handled on the unique values
+    if dtype == object:
+        codes, uniques = pd.factorize(series)
+        uniques = np.asarray(uniques, dtype=object)
+
+        is_text = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+        text = pd.Series(uniques[is_text], dtype=object)
+
+        tidy = uniques.copy()
+        tidy[is_text] = np.where(text.isin(tokens), "", text.str.strip())
+
+        # Missing values (code -1) ---> ""
+        result = np.append(tidy, "")[codes]
+
+        # Non-text cells keep their own object (factorize treats 1, 1.0 and True as one value)
+        if not is_text.all():
+            other = (codes != -1) & ~np.append(is_text, True)[codes]
+            result[other] = series.to_numpy()[other]
+
+        # Like a cell-by-cell map: a column of only numbers/booleans is re-typed
+        if not is_text.any() and not (codes == -1).any():
+            kind = pd.api.types.infer_dtype(result, skipna=False)
+            if kind in ("integer", "floating", "mixed-integer-float", "complex", "boolean"):
+                return pd.Series(result, dtype=object).infer_objects().to_numpy()
+
+        return result
+
+    # Arrow text: the same steps with Arrow string kernels
+    if is_arrow_string(dtype):
+        return series.where(~series.isin(tokens), "").str.strip().fillna("").array
+
+    # Dates, categoricals, extension types: the step-by-step way
+    return series.replace(list(tokens) + [np.nan, None], "").map(_strip_cell).array
 
 
 # ---------------------------------------------------------
@@ -63,24 +136,30 @@ def dedupe_columns(cols):
     return new_cols
 
 
-def fix_duplicate_columns(df):
-    original_cols = list(df.columns)
-    if len(original_cols) != len(set(original_cols)):
-        cleaned_df = df.copy()
-        cleaned_df.columns = dedupe_columns(original_cols)
-        return cleaned_df
-    return df.copy()
-
-
 # ---------------------------------------------------------
-# 5. Trim whitespace from column names and string cells
+# 5. All steps in one pass
 # ---------------------------------------------------------
-def trim_whitespace(df):
-    cleaned_df = df.copy()
-    cleaned_df.columns = [str(c).strip() for c in cleaned_df.columns]
-    cleaned_df = cleaned_df.applymap(
-        lambda x: x.strip() if isinstance(x, str) else x
-    )
+def tidy_frame(df, nans=None):
+    """
+    Remove empty columns/rows, standardize NaN-like tokens, trim
+    whitespace and fix duplicate column names, in one pass.
+    """
+    tokens = set(NA_TOKENS)
+    if nans:
+        tokens.update(n for n in nans if isinstance(n, str))
+
+    empty_cols, empty_rows = find_empty(df)
+    keep = ~empty_rows if empty_rows.any() else None
+
+    names, arrays = [], []
+    for i in np.flatnonzero(~empty_cols):
+        names.append(str(df.columns[i]).strip())
+        arrays.append(tidy_values(df.iloc[:, i], tokens, keep))
+
+    index = df.index if keep is None else df.index[keep]
+
+    cleaned_df = pd.DataFrame(dict(enumerate(arrays)), index=index, copy=False)
+    cleaned_df.columns = dedupe_columns(names)
     return cleaned_df
 
 
@@ -124,29 +203,15 @@ def basic_cleaning(
         if not isinstance(flag, bool):
             raise ValueError("preserve_units and no_units_in_header must be boolean.")
 
-    cleaned_df = df.copy()
-
     # -----------------------------------------------------
     # 2. CORE PROCESSING (pure transformations)
     # -----------------------------------------------------
 
     metadata_df = None   # ensure this variable always exists
 
-    # Step 1 - Remove empty columns
-    cleaned_df = remove_empty_columns(cleaned_df)
-
-    # Step 2 - Remove empty rows
-    cleaned_df = remove_empty_rows(cleaned_df)
-
-    # Step 3 - Standardize NaN-like tokens
-    cleaned_df = standardize_nans(cleaned_df, nans)
-
-    # Step 4 - Trim whitespace
-    cleaned_df = trim_whitespace(cleaned_df)
-
-    # Step 5 - Fix duplicate column names
-    cleaned_df = fix_duplicate_columns(cleaned_df)
-
+    # Steps 1-5 - Empty columns/rows, NaN-like tokens, whitespace and
+    # duplicate column names (one fused pass)
+    cleaned_df = tidy_frame(df, nans)
 
     # Step 6 - Clean headers (optional; returns metadata_df if used; called from the original clean headers function)
     if not skip_headers:
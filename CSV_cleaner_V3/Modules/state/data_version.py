@@ -0,0 +1,101 @@
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# =========================================================
+# PER-FILE DATA VERSIONS
+# =========================================================
+# Why this exists:
+#   Caches used to key on id(df) (which Python recycles) or were cleared
+#   by hand wherever someone remembered to. Both can serve stale data.
+#
+# How it works:
+#   - Every file in current_data has a DataVersion: a number that only
+#     ever goes up within the session, plus a cheap content fingerprint.
+#   - Whatever replaces a file's data calls bump_version(): the task loop,
+#     undo/redo/reset, merge, upload and the storage switch.
+#   - Caches (preview, downloads, memory readout, task results) key on the
+#     version, so a new version can never be served an old result.
+#   - data_version() also checks that the version still belongs to the
+#     DataFrame in current_data, and bumps it if some code path forgot to.
+# =========================================================
+FINGERPRINT_SAMPLE_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    number: int         # monotonically increasing (session-wide counter)
+    fingerprint: str    # shape + labels + dtypes + sampled rows
+
+    def __str__(self):
+        return f"v{self.number} ({self.fingerprint[:8]})"
+
+
+def fingerprint(df):
+    """
+    Cheap content fingerprint: shape, column labels, dtypes and a hash of
+    up to FINGERPRINT_SAMPLE_ROWS evenly spaced rows.
+
+    Two different DataFrames can share a fingerprint (rows outside the
+    sample are not hashed), so caches must key on the full version.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((df.shape, list(map(str, df.columns)), list(map(str, df.dtypes)))).encode())
+
+    if len(df):
+        positions = np.unique(np.linspace(0, len(df) - 1, min(len(df), FINGERPRINT_SAMPLE_ROWS)).astype(np.intp))
+        sample = df.iloc[positions]
+        try:
+            hashed = pd.util.hash_pandas_object(sample, index=False)
+        except TypeError:
+            # Unhashable cells (lists, dicts): hash their text instead
+            hashed = pd.util.hash_pandas_object(sample.astype(str), index=False)
+        h.update(hashed.to_numpy().tobytes())
+
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------
+# Session state helpers
+# ---------------------------------------------------------
+def bump_version(filename, df=None):
+    """
+    Give a file a new version (call after replacing its data).
+    df defaults to current_data[filename].
+    """
+    if df is None:
+        df = st.session_state.current_data[filename]
+
+    st.session_state.version_counter += 1
+    version = DataVersion(st.session_state.version_counter, fingerprint(df))
+    st.session_state.data_versions[filename] = (df, version)
+    return version
+
+
+def bump_all_versions():
+    """New versions for every loaded file; forget files that are gone."""
+    reset_versions()
+    for filename in st.session_state.current_data:
+        bump_version(filename)
+
+
+def reset_versions():
+    """Forget all versions (the counter keeps going up)."""
+    st.session_state.data_versions = {}
+
+
+def data_version(filename):
+    """Current DataVersion of a loaded file."""
+    df = st.session_state.current_data[filename]
+    entry = st.session_state.data_versions.get(filename)
+    if entry is None or entry[0] is not df:
+        return bump_version(filename, df)
+    return entry[1]
+
+
+def current_versions():
+    """{filename: DataVersion} for every loaded file, in upload order."""
+    return {filename: data_version(filename) for filename in st.session_state.current_data}
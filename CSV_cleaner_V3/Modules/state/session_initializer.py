@@ -1,4 +1,8 @@
 import streamlit as st
+from Modules.task_orchestration.executor import default_workers
+from Modules.task_orchestration.profiling import default_profile_memory
+from Modules.state.undo_redo import default_undo_budget_mb
+from Modules.utils.storage import default_string_storage
 
 def init_session_state():
     default_values = {
@@ -6,11 +10,16 @@ def init_session_state():
         "original_data": {},      # filename ---> original df
         "current_data": {},       # filename ---> cleaned df
         "row_map": {},            # filename ---> row_map list
+        "data_versions": {},      # filename ---> (df, DataVersion) (see Modules/state/data_version.py)
+        "version_counter": 0,     # last version number given out
 
         # Undo/redo
         "history_stack": {},      # filename ---> list of snapshots
         "redo_stack": {},         # filename ---> list of snapshots
-        "task_history": {},       # filename ---> list of task names
+        "task_history": {},       # filename ---> list of {"task", "kwargs"} steps (the recipe)
+        "task_profiles": {},      # filename ---> list of performance records (one per task run)
+        "snapshot_seq": 0,        # age of snapshots (oldest are spilled to disk first)
+        "undo_spill_dir": None,   # temp directory holding spilled snapshots
 
         # Upload state
         "uploader_key": 0,
@@ -27,10 +36,24 @@ def init_session_state():
         # Task flags
         "task_applied": False,
         "merge_header_rows_submitted": False,
+        "show_downloads": False,
+
+        # Queue mode (see Modules/task_orchestration/pipeline.py)
+        "task_queue": [],         # queued {"task", "kwargs"} steps, applied together
+        "queue_preview": None,    # first file as the queue leaves it (for the widgets)
+
+        # Execution settings
+        "execution_mode": "Sequential",  # Sequential / Threads / Processes
+        "max_workers": default_workers(),
+        "undo_budget_mb": default_undo_budget_mb(),  # RAM for undo/redo snapshots (per session)
+        "string_storage": default_string_storage(),  # "python" (object) or "pyarrow" text columns
+        "profile_memory": default_profile_memory(),  # record each task's peak memory (tracemalloc, opt-in)
 
         #cache
         "task_cache":{},
         "preview_cache": {},
+        "memory_cache": {},  # {filename: (DataVersion, bytes)} for the memory readout
+        "download_cache": {},  # {artifact key: {"sources": DataVersions/DataFrames, "data": bytes}}
     }
 
     for key, value in default_values.items():
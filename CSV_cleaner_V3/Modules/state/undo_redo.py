@@ -1,34 +1,327 @@
-import streamlit as st
+import os
+import pickle
+import sys
+import tempfile
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from Modules.state.data_version import bump_version
+from Modules.task_orchestration.result_cache import prune_results
+from Modules.utils.storage import buffer_key
 
 # =========================================================
-# FAST + SAFE DATAFRAME COPY (used for Undo/Redo snapshots)
+# STRUCTURAL SHARING FOR UNDO/REDO SNAPSHOTS
 # =========================================================
 # Why this exists:
-#   Pandas' normal df.copy() performs a *full deep copy* of every
-#   internal data block. This is very slow on large CSV files and undo/redo require taking snapshots often.
+#   Snapshots used to be full copies of every file. With large files and
+#   many steps that is gigabytes per session, even when a task only touched
+#   one column.
+#
+# How it works:
+#   - Tasks never modify a DataFrame in place (copy-on-write is enabled in
+#     app.py), so an undo snapshot can simply KEEP A REFERENCE to the
+#     previous DataFrame - no copy at all.
+#   - After a task runs, share_unchanged_columns() rebuilds the new
+#     DataFrame so every column whose values did not change points at the
+#     SAME array as the previous version. Only changed columns keep their
+#     own memory.
 #
-# What this function does:
-#   1. Makes a *shallow* copy of the DataFrame wrapper; This is instant (no data duplicated yet)
-#   2. Deep-copies ONLY the underlying BlockManager
-#      - This duplicates the actual column data safely
-#      - But avoids Pandas' expensive full-copy overhead
+#   Memory per undo step therefore scales with the columns a task changed.
+#   Renames and reorders change labels only, so they cost (almost) nothing.
+# =========================================================
+def share_unchanged_columns(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return `after` with unchanged columns re-pointed at the arrays in `before`.
+
+    A column counts as unchanged when it has the same dtype and values as
+    the column with the same name in `before` (or, for renamed columns, the
+    column at the same position). Changed columns are copied into their own
+    array so the task's intermediate 2D blocks can be freed.
+    """
+    # Rows added, removed or re-labelled ---> nothing can be shared
+    if len(before) != len(after) or not before.index.equals(after.index):
+        return after
+
+    before_positions = {}
+    for i, name in enumerate(before.columns):
+        before_positions.setdefault(name, i)
+
+    arrays = {}
+    for i, name in enumerate(after.columns):
+        col = after.iloc[:, i]
 
+        # Candidate: same name first (reorder/insert), then same position (rename)
+        candidates = []
+        if name in before_positions:
+            candidates.append(before_positions[name])
+        if i < before.shape[1]:
+            candidates.append(i)
+
+        shared = None
+        for j in candidates:
+            old = before.iloc[:, j]
+            if old.dtype == col.dtype and old.equals(col):
+                shared = old
+                break
+
+        arrays[i] = shared._values if shared is not None else col._values.copy()
+
+    rebuilt = pd.DataFrame(arrays, index=after.index, copy=False)
+    rebuilt.columns = after.columns
+    return rebuilt
+
+
+# =========================================================
+# MEMORY BUDGET FOR UNDO/REDO (spill to disk)
 # =========================================================
-def _fast_deepcopy_df(df: pd.DataFrame) -> pd.DataFrame:
-    df_copy = df.copy(deep=False)              # cheap wrapper copy
-    df_copy._mgr = df._mgr.copy(deep=True)    # deep copy underlying blocks
-    return df_copy
+# Why this exists:
+#   Even with structural sharing, history_stack/redo_stack keep every
+#   snapshot in RAM for the whole session. A few curators working on
+#   large files at once can exhaust the server.
+#
+# How it works:
+#   - Every snapshot records `nbytes`: the memory it keeps alive that the
+#     live data (or the next snapshot) does not already hold.
+#   - After each task / undo / redo, enforce_undo_budget() adds those up
+#     across ALL files of the session. While the total is over budget the
+#     OLDEST snapshots are written to compressed Arrow IPC (Feather) files
+#     in a per-session temp directory and dropped from RAM.
+#   - Undo/redo reload a spilled snapshot transparently.
+#
+#   Budget: "Undo memory budget" in the Performance Settings expander,
+#   defaulting to $CSV_CLEANER_UNDO_BUDGET_MB (512 MB if unset).
+# =========================================================
+UNDO_BUDGET_ENV = "CSV_CLEANER_UNDO_BUDGET_MB"
+DEFAULT_UNDO_BUDGET_MB = 512
+
+# Rough cost of one row_map entry (list slot + small int object)
+_ROW_MAP_ITEM_BYTES = 36
+
+
+def default_undo_budget_mb():
+    """Per-session undo budget in MB (environment override or default)."""
+    try:
+        return max(0, int(os.environ.get(UNDO_BUDGET_ENV, DEFAULT_UNDO_BUDGET_MB)))
+    except ValueError:
+        return DEFAULT_UNDO_BUDGET_MB
+
+
+def _array_nbytes(values):
+    """
+    Estimate the memory held by one column array.
+
+    Object columns are estimated from a sample of their Python objects
+    (exact deep sizing would touch every cell).
+    """
+    if isinstance(values, np.ndarray) and values.dtype == object:
+        n = len(values)
+        if n == 0:
+            return 0
+        sample = values[:: max(1, n // 1000)]
+        per_item = sum(sys.getsizeof(v) for v in sample) / len(sample)
+        return int(values.nbytes + per_item * n)
+
+    return int(getattr(values, "nbytes", 0))
+
+
+def _unshared_nbytes(state, kept_df, kept_row_map):
+    """Bytes held by `state` that are not also held by kept_df / kept_row_map."""
+    kept = {buffer_key(kept_df.iloc[:, i]._values) for i in range(kept_df.shape[1])}
+
+    df = state["df"]
+    total = 0
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i]._values
+        if buffer_key(values) not in kept:
+            total += _array_nbytes(values)
+
+    if state["row_map"] is not kept_row_map:
+        total += len(state["row_map"]) * _ROW_MAP_ITEM_BYTES
+
+    return total
+
+
+def push_snapshot(stack, state, kept_df, kept_row_map):
+    """
+    Append a snapshot to an undo/redo stack and record what it costs.
+
+    kept_df / kept_row_map are the data that stay live after the push
+    (the new current version), used to work out which arrays are shared.
+    """
+    st.session_state.snapshot_seq += 1
+    state["seq"] = st.session_state.snapshot_seq
+    state["nbytes"] = _unshared_nbytes(state, kept_df, kept_row_map)
+    stack.append(state)
+
+
+def _spill_dir():
+    """Per-session temp directory (removed with the session or on reset)."""
+    if st.session_state.get("undo_spill_dir") is None:
+        st.session_state.undo_spill_dir = tempfile.TemporaryDirectory(prefix="csv_cleaner_undo_")
+    return st.session_state.undo_spill_dir.name
+
+
+def discard_spilled_snapshots():
+    """Delete every spilled snapshot of this session."""
+    spill_dir = st.session_state.get("undo_spill_dir")
+    if spill_dir is not None:
+        spill_dir.cleanup()
+        st.session_state.undo_spill_dir = None
+
+
+def _spill(state):
+    """Write one snapshot to disk and drop its data from RAM (in place)."""
+    path = os.path.join(_spill_dir(), f"snapshot_{state['seq']}")
+    df = state["df"]
+
+    # Arrow needs unique string column names and a default index:
+    # keep the real labels, index and dtypes in a small sidecar file.
+    meta = {"columns": df.columns, "index": df.index, "dtypes": list(df.dtypes),
+            "row_map": state["row_map"]}
+
+    try:
+        flat = df.reset_index(drop=True)
+        flat.columns = [str(i) for i in range(df.shape[1])]
+        flat.to_feather(path + ".arrow", compression="zstd")
+        meta["format"] = "arrow"
+    except (pa.ArrowException, ValueError, TypeError):
+        # Mixed-type object columns cannot be stored as Arrow
+        df.to_pickle(path + ".pkl", compression={"method": "gzip", "compresslevel": 1})
+        meta["format"] = "pickle"
+
+    with open(path + ".meta.pkl", "wb") as f:
+        pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    del state["df"], state["row_map"]
+    state["spill_path"] = path
+    state["nbytes"] = 0
+
+
+def _load(state):
+    """Bring a spilled snapshot back into RAM (no-op if it never left)."""
+    path = state.pop("spill_path", None)
+    if path is None:
+        return state
+
+    with open(path + ".meta.pkl", "rb") as f:
+        meta = pickle.load(f)
+
+    if meta["format"] == "arrow":
+        df = pd.read_feather(path + ".arrow")
+
+        for i, dtype in enumerate(meta["dtypes"]):
+            col = df.iloc[:, i]
+
+            # Arrow stores missing text as null ---> back to NaN like the upload
+            if dtype == object and col.hasnans:
+                df.isetitem(i, col.where(col.notna(), np.nan))
+
+            # Restore the spilled dtype (string[pyarrow] comes back as string[python])
+            elif col.dtype != dtype:
+                df.isetitem(i, col.astype(dtype))
+
+        df.columns = meta["columns"]
+        df.index = meta["index"]
+        os.remove(path + ".arrow")
+    else:
+        df = pd.read_pickle(path + ".pkl", compression="gzip")
+        os.remove(path + ".pkl")
+
+    os.remove(path + ".meta.pkl")
+
+    state["df"] = df
+    state["row_map"] = meta["row_map"]
+    return state
+
+
+def _in_memory_snapshots():
+    for stacks in (st.session_state.history_stack, st.session_state.redo_stack):
+        for stack in stacks.values():
+            for state in stack:
+                if "df" in state:
+                    yield state
+
+
+def convert_snapshots(convert):
+    """
+    Replace every in-memory snapshot's data with convert(df) (e.g. a text
+    storage switch), then work out again what each snapshot costs.
+    Spilled snapshots are converted when they are reloaded (_load).
+    """
+    for stacks in (st.session_state.history_stack, st.session_state.redo_stack):
+        for filename, stack in stacks.items():
+            for state in stack:
+                if "df" in state:
+                    state["df"] = convert(state["df"])
+                if "current_data" in state:   # merge snapshot: every file before the merge
+                    state["current_data"] = {f: convert(df) for f, df in state["current_data"].items()}
+
+            if filename not in st.session_state.current_data:
+                continue
+
+            # Each snapshot is costed against the next newer state, like push_snapshot()
+            kept_df = st.session_state.current_data[filename]
+            kept_row_map = st.session_state.row_map[filename]
+            for state in reversed(stack):
+                if "df" in state:
+                    state["nbytes"] = _unshared_nbytes(state, kept_df, kept_row_map)
+                    kept_df, kept_row_map = state["df"], state["row_map"]
+
+
+def undo_memory_usage():
+    """(bytes held in RAM by snapshots, number of snapshots spilled to disk)"""
+    in_memory = 0
+    spilled = 0
+    for stacks in (st.session_state.history_stack, st.session_state.redo_stack):
+        for stack in stacks.values():
+            for state in stack:
+                in_memory += state.get("nbytes", 0)
+                spilled += "spill_path" in state
+    return in_memory, spilled
+
+
+def enforce_undo_budget():
+    """
+    Spill the oldest snapshots (across all files) until under budget, then
+    drop task-cache entries that hold data nothing else holds any more.
+    """
+    budget = st.session_state.get("undo_budget_mb", default_undo_budget_mb()) * 1024 ** 2
+
+    states = list(_in_memory_snapshots())
+    total = sum(state.get("nbytes", 0) for state in states)
+
+    for state in sorted(states, key=lambda s: s.get("seq", 0)):
+        if total <= budget:
+            break
+        total -= state.get("nbytes", 0)
+        _spill(state)
+
+    prune_task_cache()
+
+
+def prune_task_cache():
+    """Cached task results must not keep spilled or discarded snapshots alive."""
+    held = list(st.session_state.current_data.values())
+    held += [state["df"] for state in _in_memory_snapshots()]
+    prune_results(st.session_state.get("task_cache", {}), held)
 
 
 # =========================================================
 # Helper: Build a complete file-state snapshot
 # =========================================================
 def _get_state(filename):
-    """Return a full snapshot of the file state (df + row_map)."""
+    """
+    Return a snapshot of the file state (df + row_map).
+
+    No data is copied: DataFrames and row maps are replaced (never mutated)
+    by tasks, so holding references is enough.
+    """
     return {
-        "df": _fast_deepcopy_df(st.session_state.current_data[filename]),
-        "row_map": st.session_state.row_map[filename].copy(),
+        "df": st.session_state.current_data[filename],
+        "row_map": st.session_state.row_map[filename],
     }
 
 
@@ -39,6 +332,7 @@ def _restore_state(filename, state):
     """Restore df + row_map from a saved snapshot."""
     st.session_state.current_data[filename] = state["df"]
     st.session_state.row_map[filename] = state["row_map"]
+    bump_version(filename)
 
 
 # =========================================================
@@ -47,10 +341,9 @@ def _restore_state(filename, state):
 def reset_all_files():
     for filename in st.session_state.original_data:
 
-        # Restore original DataFrame (fast deep copy)
-        st.session_state.current_data[filename] = _fast_deepcopy_df(
-            st.session_state.original_data[filename]
-        )
+        # Restore original DataFrame (shared reference - tasks never mutate it)
+        st.session_state.current_data[filename] = st.session_state.original_data[filename]
+        bump_version(filename)
 
         # Reset row_map to 1-based index
         n = len(st.session_state.original_data[filename])
@@ -61,13 +354,17 @@ def reset_all_files():
         st.session_state.history_stack[filename] = []
         st.session_state.redo_stack[filename] = []
 
+    discard_spilled_snapshots()
+
     # Reset flags + metadata
     st.session_state.task_applied = False
     st.session_state.metadata_outputs = {}
     st.session_state.supplementary_outputs = {}
+    st.session_state.show_downloads = False
 
-    # Clear caches
+    # Clear caches (every file has a new version; drop the old entries' memory)
     st.session_state.preview_cache = {}
+    st.session_state.download_cache = {}
 
 
 # =========================================================
@@ -78,16 +375,22 @@ def undo_last_task():
 
         if st.session_state.history_stack[filename]:
 
+            # Previous state (reloaded from disk if it was spilled)
+            prev_state = _load(st.session_state.history_stack[filename].pop())
+
             # Save current state to redo stack
-            st.session_state.redo_stack[filename].append(_get_state(filename))
+            redo_state = _get_state(filename)
+
+            # Update task history (the undone step travels with the redo state)
+            if st.session_state.task_history[filename]:
+                redo_state["task"] = st.session_state.task_history[filename].pop()
+
+            push_snapshot(st.session_state.redo_stack[filename], redo_state, prev_state["df"], prev_state["row_map"])
 
             # Restore previous state
-            prev_state = st.session_state.history_stack[filename].pop()
             _restore_state(filename, prev_state)
 
-            # Update task history
-            if st.session_state.task_history[filename]:
-                st.session_state.task_history[filename].pop()
+    enforce_undo_budget()
 
 
 # =========================================================
@@ -98,13 +401,21 @@ def redo_last_task():
 
         if st.session_state.redo_stack[filename]:
 
+            # Next state (reloaded from disk if it was spilled)
+            next_state = _load(st.session_state.redo_stack[filename].pop())
+
             # Save current state to undo stack
-            st.session_state.history_stack[filename].append(_get_state(filename))
+            push_snapshot(st.session_state.history_stack[filename], _get_state(filename), next_state["df"], next_state["row_map"])
 
             # Restore redo state
-            next_state = st.session_state.redo_stack[filename].pop()
             _restore_state(filename, next_state)
 
+            # Re-record the redone step
+            if next_state.get("task"):
+                st.session_state.task_history[filename].append(next_state["task"])
+
+    enforce_undo_budget()
+
 
 # =========================================================
 # Restart app
@@ -128,6 +439,7 @@ def restart_app():
     st.session_state.history_stack = {}
     st.session_state.redo_stack = {}
     st.session_state.task_history = {}
+    discard_spilled_snapshots()
 
     # Metadata
     st.session_state.all_summaries = {}
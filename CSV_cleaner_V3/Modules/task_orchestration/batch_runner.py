@@ -0,0 +1,259 @@
+# Modules/task_orchestration/batch_runner.py
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from Modules.task_orchestration.engine import normalize_result
+from Modules.task_orchestration.frame import TaskFrame
+from Modules.task_orchestration.profiling import measure, profiled_run, profiles_frame
+from Modules.task_orchestration.tasks import TASKS
+from Modules.upload.file_uploads import load_csv_bytes
+
+
+# =========================================================
+# HEADLESS BATCH RUNNER
+# ---------------------------------------------------------
+# Replays a recorded recipe (an ordered list of task steps)
+# over many CSV files without a Streamlit session.
+#
+# A recipe is a list of steps, exactly as the widgets return them:
+#     [
+#         {"task": "Tidy Data Checker", "kwargs": {"nans": ["999"], "skip_headers": True}},
+#         {"task": "Remove columns",    "kwargs": {"variables_to_remove": ["notes"]}},
+#     ]
+#
+# The app records this list per file in st.session_state.task_history and
+# offers it as "recipe.json" in the download section.
+# =========================================================
+
+# Tasks that operate on ALL files at once (only allowed as the last step).
+MULTI_FILE_TASKS = {"Merge multiple files"}
+
+
+# ---------------------------------------------------------
+# Recipe helpers
+# ---------------------------------------------------------
+def load_recipe(path):
+    """
+    Load a recipe from a JSON file.
+
+    Accepts either a bare list of steps or {"steps": [...]}.
+    """
+    with open(path, encoding="utf-8") as f:
+        recipe = json.load(f)
+
+    if isinstance(recipe, dict):
+        recipe = recipe.get("steps", [])
+
+    validate_recipe(recipe)
+    return recipe
+
+
+def validate_recipe(recipe):
+    """
+    Hard validation of a recipe before any file is touched.
+    """
+    if not isinstance(recipe, list) or not recipe:
+        raise ValueError("A recipe must be a non-empty list of steps.")
+
+    for i, step in enumerate(recipe, 1):
+        if not isinstance(step, dict) or "task" not in step:
+            raise ValueError(f"Step {i} must be a dictionary with a 'task' key.")
+
+        task_name = step["task"]
+
+        if task_name not in TASKS:
+            raise ValueError(f"Step {i}: unknown task '{task_name}'.")
+
+        if task_name in MULTI_FILE_TASKS and i != len(recipe):
+            raise ValueError(f"Step {i}: '{task_name}' is only allowed as the last step.")
+
+        if not isinstance(step.get("kwargs", {}), dict):
+            raise ValueError(f"Step {i}: 'kwargs' must be a dictionary.")
+
+
+def _slugify(text):
+    """Make a task name safe for use in a filename."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_").lower()
+    return slug or "task"
+
+
+# ---------------------------------------------------------
+# Run a recipe on one frame
+# ---------------------------------------------------------
+def run_recipe(frame, recipe, profiles=None, trace_memory=False):
+    """
+    Apply every per-file step of a recipe to one TaskFrame.
+
+    If `profiles` is a list, one profile per step (time, peak memory,
+    shapes; see Modules/task_orchestration/profiling.py) is appended to it.
+
+    Returns
+    -------
+    frame : TaskFrame
+        The cleaned frame (its provenance lists the steps applied).
+    metadata : dict[str, pandas.DataFrame]
+        Metadata tables keyed by "stepNN_<task>".
+    """
+    metadata = {}
+
+    for i, step in enumerate(recipe, 1):
+        task_name = step["task"]
+        if task_name in MULTI_FILE_TASKS:
+            continue
+
+        frame, metadata_df, profile = profiled_run(task_name, frame, step.get("kwargs", {}), trace_memory)
+        if profiles is not None:
+            profiles.append({"file": frame.filename, "step": i, **profile})
+
+        if metadata_df is not None:
+            metadata[f"step{i:02d}_{_slugify(task_name)}"] = metadata_df
+
+    return frame, metadata
+
+
+# ---------------------------------------------------------
+# Process one file (runs inside a worker process)
+# ---------------------------------------------------------
+def process_file(path, recipe, output_dir, return_data=False, trace_memory=False):
+    """
+    Load one CSV, apply the recipe and write the outputs to disk.
+
+    Never raises: errors are reported in the returned summary so one bad
+    file does not stop the batch. summary["profiles"] holds one profile
+    per step that ran.
+    """
+    filename = os.path.basename(path)
+    base, _ = os.path.splitext(filename)
+    summary = {"file": filename, "status": "ok", "rows_in": None, "rows_out": None,
+               "columns_out": None, "error": "", "profiles": []}
+
+    try:
+        with open(path, "rb") as f:
+            raw_bytes = f.read()
+
+        df, row_map, has_metadata = load_csv_bytes(raw_bytes, use_cache=False)
+        summary["rows_in"] = len(df)
+
+        # Same rule as get_allowed_tasks(): non-rectangular files must have
+        # their metadata rows removed first.
+        if has_metadata and recipe[0]["task"] != "Remove Metadata Rows":
+            raise ValueError("Non-rectangular file: the recipe must start with 'Remove Metadata Rows'.")
+
+        frame = TaskFrame(df=df, row_map=row_map, filename=filename)
+        frame, metadata = run_recipe(frame, recipe, summary["profiles"], trace_memory)
+        cleaned_df = frame.df
+
+        if not return_data:
+            cleaned_df.to_csv(os.path.join(output_dir, f"{base}_cleaned.csv"), index=False)
+
+        if metadata:
+            metadata_dir = os.path.join(output_dir, "metadata")
+            os.makedirs(metadata_dir, exist_ok=True)
+            for label, metadata_df in metadata.items():
+                metadata_df.to_csv(os.path.join(metadata_dir, f"{base}__{label}.csv"), index=False)
+
+        summary["rows_out"] = len(cleaned_df)
+        summary["columns_out"] = cleaned_df.shape[1]
+
+        if return_data:
+            summary["data"] = cleaned_df
+
+    except Exception as e:
+        summary["status"] = "error"
+        summary["error"] = f"{type(e).__name__}: {e}"
+
+    return summary
+
+
+# ---------------------------------------------------------
+# Run a recipe over a whole directory
+# ---------------------------------------------------------
+def run_batch(input_dir, recipe, output_dir, pattern=".csv", max_workers=None, on_result=None,
+              trace_memory=False):
+    """
+    Replay a recipe over every CSV in input_dir using a process pool.
+
+    Parameters
+    ----------
+    input_dir : str
+        Directory containing the raw CSV files.
+    recipe : list[dict]
+        Ordered task steps (see module header).
+    output_dir : str
+        Where cleaned files, metadata tables and batch_summary.csv are written.
+    pattern : str
+        File suffix to pick up (case-insensitive).
+    max_workers : int or None
+        Number of worker processes (None = number of CPUs).
+    on_result : callable or None
+        Called with each file summary as results arrive (in input order).
+    trace_memory : bool
+        Record each step's peak memory in performance.csv (slower).
+
+    Returns
+    -------
+    summary_df : pandas.DataFrame
+        One row per file with status, row counts and errors.
+
+    Besides batch_summary.csv, performance.csv gets one row per step per
+    file (time, peak memory, rows/columns in and out).
+    """
+    validate_recipe(recipe)
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.lower().endswith(pattern.lower())
+    )
+
+    if not paths:
+        raise ValueError(f"No '{pattern}' files found in {input_dir}.")
+
+    merge_at_end = recipe[-1]["task"] in MULTI_FILE_TASKS
+
+    # -----------------------------------------------------
+    # Per-file steps in parallel (results keep input order)
+    # -----------------------------------------------------
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(process_file, path, recipe, output_dir, merge_at_end, trace_memory)
+            for path in paths
+        ]
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    # -----------------------------------------------------
+    # Optional final merge (runs once, in this process)
+    # -----------------------------------------------------
+    profiles = [profile for r in results for profile in r.pop("profiles")]
+
+    if merge_at_end:
+        frames = {r["file"]: r.pop("data") for r in results if r["status"] == "ok"}
+        if frames:
+            merge_kwargs = recipe[-1].get("kwargs", {})
+            with measure(trace_memory) as measured:
+                merged_df, _ = normalize_result(TASKS[recipe[-1]["task"]](frames, filename=None, **merge_kwargs))
+            merged_df.to_csv(os.path.join(output_dir, "merged.csv"), index=False)
+
+            profiles.append({
+                "file": "merged.csv", "step": len(recipe), "task": recipe[-1]["task"], **measured,
+                "rows_in": sum(len(df) for df in frames.values()),
+                "columns_in": len(set().union(*(df.columns for df in frames.values()))),
+                "rows_out": merged_df.shape[0], "columns_out": merged_df.shape[1],
+            })
+
+    profiles_frame(profiles).to_csv(os.path.join(output_dir, "performance.csv"), index=False)
+
+    summary_df = pd.DataFrame(results)
+    summary_df.to_csv(os.path.join(output_dir, "batch_summary.csv"), index=False)
+
+    return summary_df
@@ -0,0 +1,75 @@
+# Modules/task_orchestration/engine.py
+import pandas as pd
+
+from Modules.task_orchestration.frame import TaskFrame
+from Modules.task_orchestration.tasks import TASKS, FRAME_TASKS, ARROW_STRING_TASKS
+from Modules.utils.storage import has_arrow_strings, to_arrow_strings, to_object_strings
+
+
+# ---------------------------------------------------------
+# Normalize a task return value
+# ---------------------------------------------------------
+def normalize_result(result):
+    """
+    Split a task return value into (data, metadata_df).
+
+    Tasks return either the cleaned data alone or a tuple whose first item is
+    the cleaned data and whose last item may be a metadata DataFrame.
+    """
+    if isinstance(result, tuple):
+        data = result[0]
+        metadata_df = result[-1] if isinstance(result[-1], pd.DataFrame) else None
+    else:
+        data = result
+        metadata_df = None
+    return data, metadata_df
+
+
+# ---------------------------------------------------------
+# Run one registered task on one frame
+# ---------------------------------------------------------
+def run_task(task_name, frame, **task_inputs):
+    """
+    Run a task from TASKS on a TaskFrame without touching Streamlit state.
+
+    - Frame-aware tasks (FRAME_TASKS) receive and return the whole frame,
+      because they need to update the row_map.
+    - All other tasks receive frame.df and return a DataFrame; the row_map
+      is carried over unchanged.
+
+    Frames stored with Arrow strings (string[pyarrow]) keep that storage:
+    tasks outside ARROW_STRING_TASKS get an object copy of the data, and
+    text columns of the result are stored as Arrow strings again.
+
+    The step is appended to the new frame's provenance.
+
+    Returns
+    -------
+    new_frame : TaskFrame
+    metadata_df : pandas.DataFrame or None
+    """
+    if not isinstance(frame, TaskFrame):
+        raise ValueError("frame must be a TaskFrame.")
+
+    task_func = TASKS[task_name]
+
+    arrow_storage = has_arrow_strings(frame.df)
+    task_frame = frame
+    if arrow_storage and task_name not in ARROW_STRING_TASKS:
+        task_frame = frame.updated(to_object_strings(frame.df))
+
+    if task_name in FRAME_TASKS:
+        new_frame, metadata_df = normalize_result(task_func(task_frame, **task_inputs))
+        if new_frame is task_frame:
+            new_frame = task_frame.updated(task_frame.df)
+    else:
+        result = task_func(task_frame.df, filename=frame.filename, **task_inputs)
+        cleaned_df, metadata_df = normalize_result(result)
+        new_frame = frame.updated(cleaned_df)
+
+    if arrow_storage:
+        new_frame = new_frame.updated(to_arrow_strings(new_frame.df))
+
+    new_frame.provenance.append({"task": task_name, "kwargs": task_inputs})
+
+    return new_frame, metadata_df
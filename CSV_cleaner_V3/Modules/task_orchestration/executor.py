@@ -0,0 +1,179 @@
+# Modules/task_orchestration/executor.py
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+
+from Modules.task_orchestration.pipeline import run_pipeline
+from Modules.task_orchestration.profiling import profiled_run
+
+
+# ---------------------------------------------------------
+# EXECUTION MODES FOR PER-FILE TASKS
+# ---------------------------------------------------------
+# Sequential : one file after another (no pool overhead)
+# Threads    : a thread pool (cheap to start, shares memory)
+# Processes  : a process pool (true multi-core, frames are pickled)
+# ---------------------------------------------------------
+EXECUTION_MODES = {
+    "Sequential": None,
+    "Threads": ThreadPoolExecutor,
+    "Processes": ProcessPoolExecutor,
+}
+
+
+def default_workers():
+    """Sensible default pool size for this machine."""
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+# ---------------------------------------------------------
+# Worker entry points
+# ---------------------------------------------------------
+def _error_message(e):
+    """How a failed job is reported (same for every job and mode)."""
+    return f"{type(e).__name__}: {e}"
+
+
+def _failed_job(e):
+    return {"frame": None, "metadata": None, "error": _error_message(e), "profile": None}
+
+
+def _failed_pipeline_job(e):
+    return {"frame": None, "metadata": {}, "error": _error_message(e), "profiles": []}
+
+
+def _run_job(task_name, frame, task_inputs, trace_memory=False):
+    """
+    Run one task on one frame, profile it and capture any error.
+
+    Module-level so it can be pickled into a process pool. Errors are
+    returned (not raised) so one bad file never stops the others.
+    """
+    try:
+        new_frame, metadata_df, profile = profiled_run(task_name, frame, task_inputs, trace_memory)
+        return {"frame": new_frame, "metadata": metadata_df, "error": None, "profile": profile}
+    except Exception as e:
+        return _failed_job(e)
+
+
+def _run_pipeline_job(steps, frame, trace_memory=False):
+    """
+    Run queued steps on one frame (see pipeline.py), capturing any error.
+    "metadata" is {task name: DataFrame}; "profiles" has one profile per stage.
+    """
+    try:
+        new_frame, metadata, profiles = run_pipeline(frame, steps, trace_memory)
+        return {"frame": new_frame, "metadata": metadata, "error": None, "profiles": profiles}
+    except Exception as e:
+        return _failed_pipeline_job(e)
+
+
+# ---------------------------------------------------------
+# Run a task on every file
+# ---------------------------------------------------------
+def run_per_file(task_name, frames, task_inputs, mode="Sequential", max_workers=None, on_progress=None,
+                 trace_memory=False):
+    """
+    Apply one task to many frames.
+
+    Parameters
+    ----------
+    task_name : str
+        Key in TASKS.
+    frames : dict[str, TaskFrame]
+        filename ---> frame
+    task_inputs : dict
+        kwargs returned by the task widget (same for every file).
+    mode : {"Sequential", "Threads", "Processes"}
+    max_workers : int or None
+        Pool size (None = default_workers()).
+    on_progress : callable or None
+        Called as on_progress(done, total, filename) from the CALLING thread,
+        so it is safe to update Streamlit elements from it.
+    trace_memory : bool
+        Record each task's peak memory (not in "Threads" mode, where
+        tasks share one process-wide measurement).
+
+    Returns
+    -------
+    results : dict[str, dict]
+        filename ---> {"frame", "metadata", "error", "profile"}, in the same
+        order as `frames` regardless of which file finished first.
+    """
+    if mode == "Threads" and len(frames) > 1:
+        trace_memory = False
+
+    job = partial(_run_job, task_name, task_inputs=task_inputs, trace_memory=trace_memory)
+    return _map_frames(job, _failed_job, frames, mode, max_workers, on_progress)
+
+
+def run_pipeline_per_file(steps, frames, mode="Sequential", max_workers=None, on_progress=None,
+                          trace_memory=False):
+    """
+    Apply queued steps (a list of {"task", "kwargs"}) to many frames.
+
+    Same modes, progress and ordering as run_per_file(). Each file gets the
+    whole chain or, if a step fails, an error and no frame.
+
+    Returns
+    -------
+    results : dict[str, dict]
+        filename ---> {"frame", "metadata", "error", "profiles"}
+    """
+    if mode == "Threads" and len(frames) > 1:
+        trace_memory = False
+
+    job = partial(_run_pipeline_job, steps, trace_memory=trace_memory)
+    return _map_frames(job, _failed_pipeline_job, frames, mode, max_workers, on_progress)
+
+
+# ---------------------------------------------------------
+# Shared sequential / pool loop
+# ---------------------------------------------------------
+def _map_frames(job, failed, frames, mode, max_workers, on_progress):
+    """
+    Call job(frame) for every frame, in the chosen mode (picklable job for
+    processes). If a pool cannot run a job at all, failed(exception) gives
+    that file's outcome, in the same shape as the job's own results.
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode '{mode}'.")
+
+    total = len(frames)
+    outcomes = {}
+    pool_class = EXECUTION_MODES[mode]
+
+    # -----------------------------------------------------
+    # Sequential (also used when there is only one file)
+    # -----------------------------------------------------
+    if pool_class is None or total <= 1:
+        for done, (fname, frame) in enumerate(frames.items(), 1):
+            outcomes[fname] = job(frame)
+            if on_progress is not None:
+                on_progress(done, total, fname)
+
+    # -----------------------------------------------------
+    # Thread / process pool
+    # -----------------------------------------------------
+    else:
+        workers = min(max_workers or default_workers(), total)
+
+        with pool_class(max_workers=workers) as executor:
+            futures = {
+                executor.submit(job, frame): fname
+                for fname, frame in frames.items()
+            }
+
+            for done, future in enumerate(as_completed(futures), 1):
+                fname = futures[future]
+                try:
+                    outcomes[fname] = future.result()
+                except Exception as e:
+                    # e.g. a worker process died or the frame could not be pickled
+                    outcomes[fname] = failed(e)
+
+                if on_progress is not None:
+                    on_progress(done, total, fname)
+
+    # Deterministic ordering: same order as the input files
+    return {fname: outcomes[fname] for fname in frames}
@@ -0,0 +1,45 @@
+# Modules/task_orchestration/frame.py
+from dataclasses import dataclass, field, replace
+
+import pandas as pd
+
+
+# =========================================================
+# TASK FRAME
+# ---------------------------------------------------------
+# Everything the cleaning engine needs to know about ONE file:
+#   - df          the current data
+#   - row_map     original 1-based row number of every row in df
+#   - filename    the uploaded file name (used in outputs/messages)
+#   - provenance  the steps applied so far ({"task", "kwargs"} dicts)
+#
+# Frames are plain, picklable objects with no Streamlit state, so they can
+# be sent to worker processes or used in a notebook. Tasks never mutate a
+# frame; they return a new one.
+# =========================================================
+@dataclass
+class TaskFrame:
+    df: pd.DataFrame
+    row_map: list
+    filename: str = None
+    provenance: list = field(default_factory=list)
+
+    @classmethod
+    def from_df(cls, df, filename=None):
+        """Wrap a DataFrame whose rows are still in their original order."""
+        return cls(df=df, row_map=list(range(1, len(df) + 1)), filename=filename)
+
+    def updated(self, df, row_map=None):
+        """
+        Return a new frame holding df.
+
+        The row_map is carried over unless a new one is given (tasks that
+        drop or reorder rows must pass it). Provenance is copied so the new
+        frame can be extended without touching this one.
+        """
+        return replace(
+            self,
+            df=df,
+            row_map=self.row_map if row_map is None else row_map,
+            provenance=list(self.provenance),
+        )
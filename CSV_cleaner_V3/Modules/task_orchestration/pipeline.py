@@ -0,0 +1,197 @@
+# Modules/task_orchestration/pipeline.py
+from dataclasses import replace
+
+import pandas as pd
+
+from Modules.task_orchestration.engine import run_task
+from Modules.task_orchestration.frame import TaskFrame
+from Modules.task_orchestration.profiling import measure, profiled_run
+from Modules.task_orchestration.tasks import FRAME_TASKS
+from Modules.utils.storage import has_arrow_strings, to_arrow_strings
+
+# =========================================================
+# QUEUED TASKS ("queue tasks, then apply")
+# ---------------------------------------------------------
+# Every task works on a full copy of the data, so rename ---> reorder --->
+# remove columns ---> add columns used to cost four copies and four undo
+# steps.
+#
+# In queue mode the app collects steps ({"task", "kwargs"}, the same form
+# as a recipe) and applies the whole chain at once, with ONE undo snapshot:
+#   - consecutive column-only steps (COLUMN_TASKS) are FUSED into a single
+#     projection: they run on a one-row probe whose cells say which source
+#     column they came from, and the result is then built from the real
+#     data by picking those columns (no copy) and adding the constant ones
+#   - every other step runs as usual, one after the other
+#
+# Running the real task functions on the probe keeps their exact behaviour
+# (validation errors, renaming rules, metadata tables).
+# =========================================================
+COLUMN_TASKS = {"Rename columns", "Reorder columns", "Remove columns", "Add columns"}
+
+# Never queued: they run right away, on all files at once
+IMMEDIATE_TASKS = {"Merge multiple files"}
+
+
+class _Source:
+    """Probe cell: the value of source column `position`."""
+
+    __slots__ = ("position",)
+
+    def __init__(self, position):
+        self.position = position
+
+
+# ---------------------------------------------------------
+# Queue rules
+# ---------------------------------------------------------
+def queue_blocker(task_name, queue):
+    """
+    Why this task cannot be used in queue mode right now, or None.
+
+    - Merging (IMMEDIATE_TASKS) runs right away, so queued tasks must be
+      applied or cleared first.
+    - Tasks that drop rows by their original row number (FRAME_TASKS) can
+      only be the first queued step: their widgets show the rows of the
+      data as it is now, not as the queue will leave it.
+    """
+    if not queue:
+        return None
+
+    if task_name in IMMEDIATE_TASKS:
+        return "Apply or clear the queued tasks before merging files."
+
+    if task_name in FRAME_TASKS:
+        return f"'{task_name}' works on row numbers, so it can only be the first queued step."
+
+    return None
+
+
+def _fusible(step):
+    """Column-only step (Add columns only with constant values: lists are per row)."""
+    if step["task"] not in COLUMN_TASKS:
+        return False
+    values = step.get("kwargs", {}).get("values", [])
+    return not any(isinstance(value, list) for value in values)
+
+
+def plan(steps):
+    """
+    Group steps into stages, in order:
+        {"fused": True,  "steps": [consecutive column-only steps]}
+        {"fused": False, "steps": [one step]}
+    """
+    stages = []
+    for step in steps:
+        fusible = _fusible(step)
+        if fusible and stages and stages[-1]["fused"]:
+            stages[-1]["steps"].append(step)
+        else:
+            stages.append({"fused": fusible, "steps": [step]})
+    return stages
+
+
+def stage_label(stage):
+    return " + ".join(step["task"] for step in stage["steps"])
+
+
+# ---------------------------------------------------------
+# Fused column-only steps
+# ---------------------------------------------------------
+def _probe(df):
+    """One row with a _Source marker per column (same labels as df)."""
+    return pd.DataFrame([[_Source(i) for i in range(df.shape[1])]], columns=df.columns, dtype=object)
+
+
+def _project(df, probe_df):
+    """Build the probe's columns from df: source columns by reference, constants broadcast."""
+    columns = {}
+    for i in range(probe_df.shape[1]):
+        cell = probe_df.iat[0, i]
+        if isinstance(cell, _Source):
+            columns[i] = df.iloc[:, cell.position]
+        else:
+            columns[i] = pd.Series(cell, index=df.index, dtype=probe_df.dtypes.iloc[i])
+
+    projected = pd.DataFrame(columns, index=df.index, copy=False)
+    projected.columns = probe_df.columns
+    return projected
+
+
+def run_fused(frame, steps):
+    """
+    Apply consecutive column-only steps with a single projection.
+
+    Returns
+    -------
+    new_frame : TaskFrame
+        Same rows and row_map; every step is in the provenance.
+    metadata : dict[str, pandas.DataFrame]
+        Metadata tables by task name.
+    """
+    probe = TaskFrame(df=_probe(frame.df), row_map=[1], filename=frame.filename,
+                      provenance=list(frame.provenance))
+    metadata = {}
+
+    for step in steps:
+        probe, metadata_df = run_task(step["task"], probe, **step.get("kwargs", {}))
+        if metadata_df is not None:
+            metadata[step["task"]] = metadata_df
+
+    df = _project(frame.df, probe.df)
+
+    # Same storage as run_task() would give (constant text columns included)
+    if has_arrow_strings(frame.df):
+        df = to_arrow_strings(df)
+
+    return replace(frame.updated(df), provenance=probe.provenance), metadata
+
+
+# ---------------------------------------------------------
+# Run a queue on one frame
+# ---------------------------------------------------------
+def run_pipeline(frame, steps, trace_memory=False):
+    """
+    Apply queued steps to one frame, all or nothing.
+
+    Returns
+    -------
+    new_frame : TaskFrame
+        The frame after the last step (its provenance lists every step).
+    metadata : dict[str, pandas.DataFrame]
+        Metadata tables by task name (a later step of the same task wins).
+    profiles : list[dict]
+        One profile per stage (see profiling.profiled_run), with the number
+        of queued steps it covers; fused stages are named "Task A + Task B".
+    """
+    metadata = {}
+    profiles = []
+
+    for stage in plan(steps):
+        label = stage_label(stage)
+
+        try:
+            if stage["fused"]:
+                with measure(trace_memory) as measured:
+                    new_frame, stage_metadata = run_fused(frame, stage["steps"])
+                profile = {
+                    "task": label,
+                    **measured,
+                    "rows_in": frame.df.shape[0],
+                    "columns_in": frame.df.shape[1],
+                    "rows_out": new_frame.df.shape[0],
+                    "columns_out": new_frame.df.shape[1],
+                }
+            else:
+                step = stage["steps"][0]
+                new_frame, metadata_df, profile = profiled_run(step["task"], frame, step.get("kwargs", {}), trace_memory)
+                stage_metadata = {step["task"]: metadata_df} if metadata_df is not None else {}
+
+        except Exception as e:
+            raise ValueError(f"'{label}' failed ({type(e).__name__}: {e})") from e
+
+        frame = new_frame
+        metadata.update(stage_metadata)
+        profiles.append({**profile, "steps": len(stage["steps"])})
+
+    return frame, metadata, profiles
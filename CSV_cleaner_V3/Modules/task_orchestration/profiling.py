@@ -0,0 +1,134 @@
+# Modules/task_orchestration/profiling.py
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from Modules.task_orchestration.engine import run_task
+
+# =========================================================
+# TASK PROFILING
+# ---------------------------------------------------------
+# Every task run (app or batch runner) records:
+#   - wall time
+#   - peak memory allocated while the task ran (tracemalloc)
+#   - rows/columns in and out
+# The app adds the size of the undo snapshot the step created.
+#
+# tracemalloc slows object-heavy tasks down a lot (datetime parsing runs
+# ~8x slower), so memory tracking is an opt-in diagnostic: Performance
+# Settings, or CSV_CLEANER_PROFILE_MEMORY=1. It is also skipped in the "Threads" mode: tracemalloc counts the whole
+# process, so tasks running side by side would share one peak.
+# =========================================================
+PROFILE_MEMORY_ENV = "CSV_CLEANER_PROFILE_MEMORY"
+
+PROFILE_COLUMNS = [
+    "file", "step", "task", "status", "cached", "seconds", "peak_mb",
+    "rows_in", "columns_in", "rows_out", "columns_out", "snapshot_mb", "finished_at",
+]
+
+_trace_lock = threading.Lock()
+_trace_users = 0
+
+
+def default_profile_memory():
+    """Memory tracking off unless CSV_CLEANER_PROFILE_MEMORY is 1/true/yes/on."""
+    return os.environ.get(PROFILE_MEMORY_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+@contextmanager
+def measure(trace_memory=False):
+    """
+    Time a block and, optionally, the peak memory it allocates.
+
+    Yields a dict that is filled in when the block exits:
+        {"seconds": float, "peak_mb": float or None}
+    """
+    global _trace_users
+
+    measured = {"seconds": None, "peak_mb": None}
+
+    if trace_memory:
+        with _trace_lock:
+            if _trace_users == 0:
+                tracemalloc.start()
+            _trace_users += 1
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    try:
+        yield measured
+    finally:
+        measured["seconds"] = round(time.perf_counter() - start, 4)
+
+        if trace_memory:
+            with _trace_lock:
+                peak = tracemalloc.get_traced_memory()[1]
+                measured["peak_mb"] = round(max(0, peak - baseline) / 1024 ** 2, 3)
+                _trace_users -= 1
+                if _trace_users == 0:
+                    tracemalloc.stop()
+
+
+def profiled_run(task_name, frame, task_inputs, trace_memory=False):
+    """
+    run_task() with a profile.
+
+    Returns
+    -------
+    new_frame : TaskFrame
+    metadata_df : pandas.DataFrame or None
+    profile : dict
+        task, seconds, peak_mb, rows/columns in and out.
+    """
+    with measure(trace_memory) as measured:
+        new_frame, metadata_df = run_task(task_name, frame, **task_inputs)
+
+    profile = {
+        "task": task_name,
+        **measured,
+        "rows_in": frame.df.shape[0],
+        "columns_in": frame.df.shape[1],
+        "rows_out": new_frame.df.shape[0],
+        "columns_out": new_frame.df.shape[1],
+    }
+    return new_frame, metadata_df, profile
+
+
+def profiles_frame(records):
+    """Profile records as a DataFrame with the standard columns first."""
+    df = pd.DataFrame(list(records))
+    columns = [c for c in PROFILE_COLUMNS if c in df.columns]
+    return df[columns + [c for c in df.columns if c not in columns]]
+
+
+def task_record(filename, step, task_name, shape_in, shape_out=None, profile=None, error=None, cached=False):
+    """
+    One row of the app's performance log (see PROFILE_COLUMNS).
+
+    shape_in / shape_out are (rows, columns); shape_out is None when the
+    task failed. Results served from the task cache have no timing.
+    """
+    profile = profile or {}
+    rows_out, columns_out = shape_out or (None, None)
+
+    return {
+        "file": filename,
+        "step": step,
+        "task": task_name,
+        "status": "error" if error else "ok",
+        "cached": cached,
+        "seconds": profile.get("seconds"),
+        "peak_mb": profile.get("peak_mb"),
+        "rows_in": shape_in[0],
+        "columns_in": shape_in[1],
+        "rows_out": rows_out,
+        "columns_out": columns_out,
+        "snapshot_mb": None,   # set by the app once the undo snapshot exists
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
@@ -0,0 +1,102 @@
+# Modules/task_orchestration/result_cache.py
+import json
+from dataclasses import replace
+
+from Modules.task_orchestration.tasks import UNIT_MAP_TASKS
+from Modules.utils.unit_map_loader import current_unit_map
+
+# =========================================================
+# TASK RESULT CACHE
+# ---------------------------------------------------------
+# Tasks are pure functions of (frame, task inputs), so running the same
+# task with the same inputs on the same version of a file gives the same
+# result - e.g. undo, then apply the step again.
+#
+# Entries live in st.session_state.task_cache (passed in by app.py):
+#   key   (filename, task name, inputs as JSON, data fingerprint), plus
+#         the unit-map version for UNIT_MAP_TASKS (a background refresh
+#         of the map must not serve results computed with the old one)
+#   value the input df + row_map it was computed from, and the outcome
+#
+# A hit also requires the SAME input df and row_map objects (undo restores
+# exactly those), so a fingerprint collision can never return a result
+# computed from other data. Only the last TASK_CACHE_ENTRIES are kept.
+#
+# The cache never keeps data alive on its own: after every task, undo and
+# redo (and after storing new results), prune_task_cache() in
+# Modules/state/undo_redo.py calls prune_results() to drop entries whose input or result df is no longer
+# live data or an in-memory undo/redo snapshot (spilled to disk, dropped
+# from the redo stack, ...). Cached frames are therefore always counted
+# by the undo budget.
+# =========================================================
+TASK_CACHE_ENTRIES = 16
+
+
+def _inputs_key(task_inputs):
+    """Task inputs as canonical JSON, or None if they cannot be (then no caching)."""
+    try:
+        return json.dumps(task_inputs, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+
+
+def _cache_key(task_name, task_inputs, frame, version):
+    inputs = _inputs_key(task_inputs)
+    if inputs is None:
+        return None
+    key = (frame.filename, task_name, inputs, version.fingerprint)
+    if task_name in UNIT_MAP_TASKS:
+        key += (current_unit_map().version,)
+    return key
+
+
+def cached_result(cache, task_name, task_inputs, frame, version):
+    """
+    Outcome ({"frame", "metadata", "error"}) of an earlier run of this task
+    on this frame, or None.
+    """
+    key = _cache_key(task_name, task_inputs, frame, version)
+    entry = cache.get(key) if key is not None else None
+    if entry is None or entry["df"] is not frame.df or entry["row_map"] is not frame.row_map:
+        return None
+
+    # Most recently used last
+    cache[key] = cache.pop(key)
+
+    # The step is recorded on top of THIS frame's provenance
+    new_frame = replace(
+        entry["frame"],
+        provenance=list(frame.provenance) + [{"task": task_name, "kwargs": task_inputs}],
+    )
+    return {"frame": new_frame, "metadata": entry["metadata"], "error": None, "profile": None}
+
+
+def store_result(cache, task_name, task_inputs, frame, version, outcome):
+    """Remember a successful outcome (failed runs are not cached)."""
+    if outcome["error"]:
+        return
+
+    key = _cache_key(task_name, task_inputs, frame, version)
+    if key is None:
+        return
+
+    cache.pop(key, None)
+    cache[key] = {
+        "df": frame.df,
+        "row_map": frame.row_map,
+        "frame": outcome["frame"],
+        "metadata": outcome["metadata"],
+    }
+    while len(cache) > TASK_CACHE_ENTRIES:
+        cache.pop(next(iter(cache)))
+
+
+def prune_results(cache, held_dfs):
+    """
+    Drop entries whose input or result df is not one of held_dfs (the
+    DataFrames still held elsewhere; compared by identity).
+    """
+    held = {id(df) for df in held_dfs}
+    for key in [key for key, entry in cache.items()
+                if id(entry["df"]) not in held or id(entry["frame"].df) not in held]:
+        del cache[key]
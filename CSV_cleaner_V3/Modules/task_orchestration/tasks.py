@@ -48,3 +48,50 @@ TASKS = {
     "🧪 Provincial Chemistry Pivot":provincial_pivot,
     "🧪 Merge Header Rows":merge_header_rows
 }
+
+
+# ---------------------------------------------------------
+# FRAME-AWARE TASKS
+# ---------------------------------------------------------
+# These tasks drop rows by their ORIGINAL row number, so they receive and
+# return a whole TaskFrame (df + row_map + provenance) instead of a bare
+# DataFrame. See Modules/task_orchestration/engine.py.
+# ---------------------------------------------------------
+FRAME_TASKS = {
+    "Remove rows",
+    "Remove Metadata Rows",
+    "🧪 Merge Header Rows",
+}
+
+
+# ---------------------------------------------------------
+# ARROW-STRING TASKS
+# ---------------------------------------------------------
+# These tasks work directly on text columns stored as string[pyarrow]
+# (pd.NA for missing values). All other tasks receive an object copy of
+# the data when Arrow storage is on. See Modules/utils/storage.py.
+# ---------------------------------------------------------
+ARROW_STRING_TASKS = {
+    "Tidy Data Checker",
+    "Add Result Value Qualifiers (RVQs)",
+    "Clean column headers",
+    "Convert DateTime column to ISO format",
+    "Remove columns",
+    "Rename columns",
+    "Reorder columns",
+    "Split columns",
+}
+
+
+# ---------------------------------------------------------
+# UNIT-MAP TASKS
+# ---------------------------------------------------------
+# These tasks read the unit map, which a background refresh can replace
+# while the app runs (see Modules/utils/unit_map_loader.py), so their
+# cached results are also keyed on the unit-map version.
+# See Modules/task_orchestration/result_cache.py.
+# ---------------------------------------------------------
+UNIT_MAP_TASKS = {
+    "Tidy Data Checker",
+    "Clean column headers",
+}
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from Modules.utils.ui_utils import big_caption
+from Modules.utils.rvq_engine import columns_have_matches
 
 
 # ---------------------------------------------------------
@@ -198,6 +199,16 @@ def add_rvqs_widget(df):
         key="rvq_keep_original"
     )
 
+    st.write("##### How should the RVQ columns be stored?")
+    big_caption("<b>Category</b> stores each distinct RVQ once, which uses much less memory on large files. The exported CSV is the same.")
+
+    rvq_storage = st.radio(
+        "RVQ column type",
+        ["Text", "Category"],
+        horizontal=True,
+        key="rvq_storage"
+    )
+
     # =========================================================
     # STEP 4 - EXECUTE-ONCE TRIGGER
     # =========================================================
@@ -231,21 +242,9 @@ def add_rvqs_widget(df):
     # Pre-scan for matches (curator feedback)
     found_any = False
 
-    # Manual rules
-    for col in selected_cols:
-        series = df[col].astype(str)
-        for rule in rules:
-            code = rule["data_code"]
-            match = rule["match_type"]
-
-            if match == "full":
-                mask = series == code
-            else:
-                mask = series.str.contains(code, na=False)
-
-            if mask.any():
-                found_any = True
-                break
+    # Manual rules (same compiled scan as the task, which reuses the cached matches)
+    if rules and columns_have_matches(df, selected_cols, rules):
+        found_any = True
 
     # Negative rule
     if negative_rule_enabled:
@@ -273,4 +272,5 @@ def add_rvqs_widget(df):
         "negative_rule_enabled": negative_rule_enabled,
         "negative_rvq_code": negative_rvq_code,
         "negative_exceptions": negative_exceptions,
+        "rvq_as_category": (rvq_storage == "Category"),
     }
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from Modules.utils.header_locator import find_header_row
 from Modules.utils.ui_utils import big_caption
 
 
@@ -34,14 +35,8 @@ def remove_metadata_rows_widget(df):
     # ---------------------------------------------------------
     # Detect metadata rows
     # ---------------------------------------------------------
-    df_str = df.astype(str).applymap(lambda x: x.strip().lower())
-    header_index = None
-
-    for idx, row in df_str.iterrows():
-        row_values = set(row.tolist())
-        if all(identifier.lower() in row_values for identifier in identifiers):
-            header_index = idx
-            break
+    # Computed once here and passed to the task as a hint
+    header_index = find_header_row(df, identifiers)
 
     if header_index is None:
         st.error("Could not detect a header row with these identifiers.")
@@ -176,5 +171,6 @@ def remove_metadata_rows_widget(df):
     # ---------------------------------------------------------
     return {
         "identifiers": identifiers,
-        "metadata_extract": metadata_extract
+        "metadata_extract": metadata_extract,
+        "header_row": header_index,
     }
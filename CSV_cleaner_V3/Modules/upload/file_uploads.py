@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
+import codecs
 import os
 import sys
-from io import StringIO
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
 """
 File Upload and Initialization Module
@@ -34,12 +37,18 @@ Core Responsibilities
        • flags files where metadata is present
        • avoids header promotion for non‑rectangular files
 
-3. Load Files Safely
-   ------------------
+3. Load Files Safely (and fast)
+   -----------------------------
    Files are loaded using a forgiving parsing strategy:
-       • Python engine for maximum flexibility
+       • encoding and delimiter are sniffed from the first 64 KB only
+       • the fast C engine parses the body
+       • ragged files (rows of different widths) are re-read with explicit
+         column names; the Python engine and manual splitting are only
+         last-resort fallbacks
        • dtype=str to preserve all values exactly as written
-       • fallback to manual splitting if parsing fails
+       • several uploaded files are parsed concurrently
+       • re-uploads of identical files come from a content-hash cache
+         shared by all sessions (Modules/upload/ingest_cache.py)
 
    This ensures that even messy or irregular CSVs load without crashing.
 
@@ -95,6 +104,10 @@ path = os.path.abspath(os.curdir)
 # Add Modules
 sys.path.append(f"{path}/Modules")
 import state.session_initializer as session_initializer
+from Modules.upload.ingest_cache import INGEST_CACHE, IngestEntry, content_key, parsed_memory
+from Modules.state.data_version import bump_version, reset_versions
+from Modules.state.undo_redo import discard_spilled_snapshots
+from Modules.utils.storage import to_storage
 
 
 # ---------------------------------------------------------
@@ -119,110 +132,109 @@ def make_unique_columns(cols):
 import csv
 import re
 
-def detect_metadata_rows(text, sep=","):
+# The header is always near the top: only this many lines are inspected.
+DETECT_LINES = 500
+
+# Thresholds for deciding what looks like a header
+HEADER_THRESHOLD = 0.9        # Row must be almost full width
+NONEMPTY_THRESHOLD = 0.6      # Row must have many non-empty cells
+HEADER_TOKEN_THRESHOLD = 0.5  # At least half must look like header labels
+
+# A cell starting with a digit is data (this also covers dates like YYYY-MM-DD)
+LEADING_DIGIT = re.compile(r"\d")
+
+
+def _leading_lines(text, max_lines):
+    """
+    Yield the first max_lines lines of text without splitting the whole file.
+    """
+    newline = "\n" if "\n" in text[:SNIFF_BYTES] or "\r" not in text[:SNIFF_BYTES] else "\r"
+    start = 0
+    for _ in range(max_lines):
+        if start >= len(text):
+            return
+        end = text.find(newline, start)
+        if end == -1:
+            yield text[start:].rstrip("\r")
+            return
+        yield text[start:end].rstrip("\r")
+        start = end + 1
+
+
+def detect_metadata_rows(text, sep=",", max_lines=DETECT_LINES):
     """
     Detect whether metadata rows exist above the true header row.
 
-    This version contains no helper functions - everything is written inline
-    with clear comments so beginners can follow the logic.
+    Only the first `max_lines` lines are read, so detection takes the same
+    time whatever the length of the file.
+
+    Returns
+    -------
+    has_metadata : bool
+        True if the header is not the first row.
+    header_index : int or None
+        Row index of the detected header (None if no row qualifies).
     """
 
     # ------------------------------------------------------------
-    # STEP 1 - Parse the CSV safely
+    # STEP 1 - Parse the leading window of the CSV safely
     # ------------------------------------------------------------
     # Use csv.reader instead of split(',') so that quoted commas (e.g., "APHA, AWWA, WPCF") stay inside a single cell.
     # using split(','), those would incorrectly become 3 cells.
-    raw_lines = text.splitlines()
-    reader = csv.reader(raw_lines, delimiter=sep)
-    split_lines = [row for row in reader]
+    reader = csv.reader(_leading_lines(text, max_lines), delimiter=sep)
+    split_lines = list(reader)
 
     # If the file is empty, we cannot detect anything
     if not split_lines:
         return False, None
 
     # ------------------------------------------------------------
-    # STEP 2 - Determine the maximum row width
+    # STEP 2 - Determine the maximum row width (within the window)
     # ------------------------------------------------------------
     # The real header row is usually one of the widest rows in the file.
-    row_widths = [len(r) for r in split_lines]
-    max_width = max(row_widths)
+    max_width = max(len(r) for r in split_lines)
 
-    # ------------------------------------------------------------
-    # STEP 3 - Define thresholds for deciding what looks like a header
-    # ------------------------------------------------------------
-    HEADER_THRESHOLD = 0.9        # Row must be almost full width
-    NONEMPTY_THRESHOLD = 0.6      # Row must have many non-empty cells
-    HEADER_TOKEN_THRESHOLD = 0.5  # At least half must look like header labels
+    min_width = HEADER_THRESHOLD * max_width
+    min_nonempty = NONEMPTY_THRESHOLD * max_width
+    min_header_like = HEADER_TOKEN_THRESHOLD * max_width
 
     header_index = None
 
     # ------------------------------------------------------------
-    # STEP 4 - Scan each row and evaluate whether it looks like a header
+    # STEP 3 - Scan each row and stop at the first header-like one
     # ------------------------------------------------------------
     for i, row in enumerate(split_lines):
 
-        # -----------------------------
-        # 4A - Check row width
-        # -----------------------------
-        # If the row is much narrower than the widest row,
-        # it's probably metadata or junk.
-        width = len(row)
-        if width < HEADER_THRESHOLD * max_width:
+        # 3A - Row much narrower than the widest row ---> metadata or junk
+        if len(row) < min_width:
             continue
 
-        # -----------------------------
-        # 4B - Check non-empty density
-        # -----------------------------
-        # Count how many cells are non-empty.
-        nonempty_count = sum(1 for c in row if c.strip() != "")
-        nonempty_fraction = nonempty_count / max_width
-
-        if nonempty_fraction < NONEMPTY_THRESHOLD:
+        # 3B - Not enough non-empty cells
+        cells = [c.strip() for c in row]
+        if sum(1 for c in cells if c) < min_nonempty:
             continue
 
-        # -----------------------------
-        # 4C - Check how "header-like" the cells are
-        # -----------------------------
-        # A header cell usually:
+        # 3C - Enough "header-like" cells? A header cell:
         #   - is not empty
-        #   - does not start with a number
-        #   - is not a date
+        #   - does not start with a number (or a date)
         #   - is not a sample number (SN...)
+        # Stop counting as soon as the threshold is reached.
         header_like_count = 0
+        for cell in cells:
+            if cell and not LEADING_DIGIT.match(cell) and "SN" not in cell.upper():
+                header_like_count += 1
+                if header_like_count >= min_header_like:
+                    break
 
-        for cell in row:
-            cell_stripped = cell.strip()
-
-            # Empty cells are not header-like
-            if cell_stripped == "":
-                continue
-
-            # If it starts with a digit, it's probably data
-            if re.match(r"^\d", cell_stripped):
-                continue
-
-            # If it looks like a date (YYYY-MM-DD), it's not a header
-            if re.match(r"^\d{4}-\d{2}-\d{2}", cell_stripped):
-                continue
-
-            # If it contains "SN", it's likely a sample number
-            if "SN" in cell_stripped.upper():
-                continue
-
-            # If none of the above disqualified it, count it as header-like
-            header_like_count += 1
-
-        header_token_fraction = header_like_count / max_width
-
-        if header_token_fraction < HEADER_TOKEN_THRESHOLD:
+        if header_like_count < min_header_like:
             continue
 
-        # If we reach this point, this row satisfies all header criteria
+        # This row satisfies all header criteria
         header_index = i
         break
 
     # ------------------------------------------------------------
-    # STEP 5 - Determine whether metadata exists above the header
+    # STEP 4 - Determine whether metadata exists above the header
     # ------------------------------------------------------------
     # If the header is not the first row (index 0), then metadata exists.
     has_metadata = header_index not in (0, None)
@@ -230,18 +242,213 @@ def detect_metadata_rows(text, sep=","):
     return has_metadata, header_index
 
 
+# ---------------------------------------------------------
+# STEP 2: Sniff encoding + delimiter from a bounded prefix
+# ---------------------------------------------------------
+SNIFF_BYTES = 64 * 1024
+SNIFF_LINES = 200
+
+# Comma first: another separator must give WIDER rows to win
+CANDIDATE_SEPARATORS = [",", ";", "\t", "|"]
+
+
+def sniff_encoding(prefix):
+    """Guess the text encoding from the first bytes of a file."""
+    if prefix.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    try:
+        # Incremental decoder: a character cut at the end of the prefix is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def sniff_separator(text_prefix):
+    """
+    Guess the delimiter from the first lines of a file.
+
+    For each candidate, the most common row width (at least 2) is computed,
+    quote-aware, with the number of lines that share it. The comma is kept
+    whenever every line gives the same width with it; otherwise the candidate
+    shared by the most lines wins (at least half of them), the wider one on a
+    tie. Stray separators inside values - "filtered; iced" in a comma file,
+    decimal commas in a semicolon file - split some lines but rarely the
+    header, so they lose to the real separator.
+    """
+    lines = text_prefix.splitlines()[:SNIFF_LINES]
+
+    # The last line of a truncated prefix may be incomplete
+    if len(text_prefix) >= SNIFF_BYTES and len(lines) > 1:
+        lines = lines[:-1]
+
+    best_sep, best_score = ",", (0, 1)
+    for sep in CANDIDATE_SEPARATORS:
+        widths = [len(row) for row in csv.reader(lines, delimiter=sep) if row]
+        if not widths:
+            continue
+
+        width, count = Counter(widths).most_common(1)[0]
+        if width < 2:
+            continue
+        if sep == "," and count == len(widths):
+            return sep
+        if count >= len(widths) / 2 and (count, width) > best_score:
+            best_sep, best_score = sep, (count, width)
+
+    return best_sep
+
+
+# ---------------------------------------------------------
+# STEP 3: Parse one file (no Streamlit state involved)
+# ---------------------------------------------------------
+def load_csv_bytes(raw_bytes, sep=None, encoding=None, use_cache=True):
+    """
+    Parse the raw bytes of one uploaded file into a DataFrame.
+
+    This is the Streamlit-free core of the upload step. The app and the
+    headless batch runner both use it, so a file is loaded the same way
+    whether it arrives through the browser or from disk.
+
+    Parameters
+    ----------
+    raw_bytes : bytes
+        File content.
+    sep, encoding : str or None
+        Sniffed from the first SNIFF_BYTES when None.
+    use_cache : bool
+        Look the file up in (and add it to) the shared ingest cache,
+        so re-uploading a known file skips detection and parsing.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The parsed file (all values as strings).
+    row_map : list[int]
+        Original 1-based row number of every row in df.
+    has_metadata : bool
+        True if metadata rows were detected above the header
+        (a non-rectangular file; the header is NOT promoted).
+    """
+    if not use_cache:
+        entry = parse_csv_bytes(raw_bytes, sep=sep, encoding=encoding)
+        return entry.df, entry.row_map, entry.has_metadata
+
+    key = content_key(raw_bytes, sep, encoding)
+    entry = INGEST_CACHE.get(key)
+    if entry is None:
+        entry = parse_csv_bytes(raw_bytes, sep=sep, encoding=encoding)
+        INGEST_CACHE.put(key, entry)
+
+    # Shallow copy: the cached frame is shared with other sessions
+    return entry.df.copy(deep=False), entry.row_map, entry.has_metadata
+
+
+def parse_csv_bytes(raw_bytes, sep=None, encoding=None):
+    """
+    Detect metadata and parse one file (no caching).
 
+    Returns an IngestEntry (df, has_metadata, header_index, first_row, nbytes).
+    """
 
+    # -------------------------------------------------
+    # STEP 1: Sniff format from a bounded prefix
+    # -------------------------------------------------
+    prefix = raw_bytes[:SNIFF_BYTES]
+    if encoding is None:
+        encoding = sniff_encoding(prefix)
+    if sep is None:
+        sep = sniff_separator(prefix.decode(encoding, errors="replace"))
+
+    raw_text = raw_bytes.decode(encoding, errors="replace")
+
+    # -------------------------------------------------
+    # STEP 2: Metadata detection
+    # -------------------------------------------------
+    has_metadata, header_index = detect_metadata_rows(raw_text, sep=sep)
+
+    # -------------------------------------------------
+    # STEP 3: Load file safely
+    # -------------------------------------------------
+    read_kwargs = dict(header=None, sep=sep, dtype=str, encoding=encoding, encoding_errors="replace")
+
+    try:
+        df = pd.read_csv(BytesIO(raw_bytes), engine="c", **read_kwargs)
+
+    except pd.errors.EmptyDataError:
+        return IngestEntry(pd.DataFrame(), False, None, 1, 0)
+
+    except pd.errors.ParserError:
+        # Ragged file (e.g. short metadata lines above a wider header):
+        # give the parser enough columns for the widest row. Cells and blank
+        # lines are kept as written so metadata rows keep their positions.
+        width = max((len(row) for row in csv.reader(raw_text.splitlines(), delimiter=sep)), default=1)
+        read_kwargs.update(names=range(width), na_filter=False, skip_blank_lines=False)
+        try:
+            df = pd.read_csv(BytesIO(raw_bytes), engine="c", **read_kwargs)
+        except pd.errors.ParserError:
+            try:
+                df = pd.read_csv(BytesIO(raw_bytes), engine="python", **read_kwargs)
+            except Exception:
+                rows = raw_text.splitlines()
+                df = pd.DataFrame([r.split(sep) for r in rows])
+
+    # -------------------------------------------------
+    # STEP 4: Initialize row_map BEFORE modifications
+    # -------------------------------------------------
+    row_map = list(range(1, len(df) + 1))
+
+    # -------------------------------------------------
+    # STEP 5: Fix empty columns
+    # -------------------------------------------------
+    # Only columns whose first value is empty can be entirely empty,
+    # so the full-column check runs on those alone.
+    for idx in df.columns:
+        col = df[idx]
+        first = col.iloc[0] if len(col) else None
+        if pd.notna(first) and str(first).strip() != "":
+            continue
+        if col.isna().all() or (col.astype(str).str.strip() == "").all():
+            df[idx] = col.fillna("")
 
+    # -------------------------------------------------
+    # STEP 6: Promote header for rectangular files only
+    # -------------------------------------------------
+    if not has_metadata:
+        header = df.iloc[0].astype(str).tolist()
+        header = [h if str(h).strip() != "" else f"unnamed_{i}" for i, h in enumerate(header)]
+        header = make_unique_columns(header)
 
+        df.columns = header
+        df = df[1:].reset_index(drop=True)
 
+        row_map = row_map[1:]
 
+    else:
+        df.columns = [f"col_{i}" for i in range(df.shape[1])]
 
+    first_row = row_map[0] if row_map else 1
+    return IngestEntry(df, has_metadata, header_index, first_row, parsed_memory(df, len(raw_bytes)))
 
 
+def load_uploaded_files(files, max_workers=None):
+    """
+    Parse several uploaded files concurrently (the C parser releases the GIL).
 
+    Returns {filename: (df, row_map, has_metadata)} in upload order.
+    """
+    if not files:
+        return {}
+
+    workers = max_workers or min(len(files), os.cpu_count() or 1, 8)
 
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        parsed = list(executor.map(lambda f: load_csv_bytes(f.getvalue()), files))
 
+    return {f.name: result for f, result in zip(files, parsed)}
 
 
 # ---------------------------------------------------------
@@ -258,11 +465,16 @@ def fileuploadfunc():
         st.session_state.original_data = {}
         st.session_state.current_data = {}
         st.session_state.task_history = {}
+        st.session_state.task_profiles = {}
         st.session_state.history_stack = {}
         st.session_state.redo_stack = {}
+        discard_spilled_snapshots()
         st.session_state.non_rectangular_files = set()
         st.session_state.row_map = {}
         st.session_state.task_cache = {}
+        st.session_state.task_queue = []
+        st.session_state.queue_preview = None
+        reset_versions()
 
 
     uploaded_files = st.file_uploader(
@@ -275,69 +487,28 @@ def fileuploadfunc():
 
     if uploaded_files and not st.session_state.files_processed:
 
-        for file in uploaded_files:
-            filename = file.name
-            raw_bytes = file.read().decode("utf-8", errors="replace")
+        # -------------------------------------------------
+        # STEP 1-5: Sniff, detect metadata, parse, build row_map
+        # (all files in parallel)
+        # -------------------------------------------------
+        parsed_files = load_uploaded_files(uploaded_files)
 
-            # -------------------------------------------------
-            # STEP 1: Metadata detection
-            # -------------------------------------------------
-            has_metadata, header_index = detect_metadata_rows(raw_bytes, sep=",")
+        for filename, (df, row_map, has_metadata) in parsed_files.items():
 
             if has_metadata:
                 st.session_state.non_rectangular_files.add(filename)
 
-            # -------------------------------------------------
-            # STEP 2: Load file safely
-            # -------------------------------------------------
-            try:
-                df = pd.read_csv(
-                    StringIO(raw_bytes),
-                    header=None,
-                    sep=",",
-                    engine="python",
-                    dtype=str
-                )
-            except Exception:
-                rows = raw_bytes.splitlines()
-                df = pd.DataFrame([r.split(",") for r in rows])
-
-            # -------------------------------------------------
-            # STEP 3: Initialize row_map BEFORE modifications
-            # -------------------------------------------------
-            st.session_state.row_map[filename] = list(range(1, len(df) + 1))
-
-            # -------------------------------------------------
-            # STEP 4: Fix empty columns
-            # -------------------------------------------------
-            empty_cols = df.columns[
-                df.isna().all() |
-                (df.apply(lambda col: col.astype(str).str.strip() == "").all())
-            ]
-            for idx in empty_cols:
-                df[idx] = df[idx].fillna("")
-
-            # -------------------------------------------------
-            # STEP 5: Promote header for rectangular files only
-            # -------------------------------------------------
-            if not has_metadata:
-                header = df.iloc[0].astype(str).tolist()
-                header = [h if str(h).strip() != "" else f"unnamed_{i}" for i, h in enumerate(header)]
-                header = make_unique_columns(header)
-
-                df.columns = header
-                df = df[1:].reset_index(drop=True)
-
-                st.session_state.row_map[filename] = st.session_state.row_map[filename][1:]
-
-            else:
-                df.columns = [f"col_{i}" for i in range(df.shape[1])]
+            st.session_state.row_map[filename] = row_map
 
             # -------------------------------------------------
             # STEP 6: Store file
             # -------------------------------------------------
-            st.session_state.original_data[filename] = df.copy()
-            st.session_state.current_data[filename] = df.copy()
+            # One shared DataFrame: tasks never modify data in place
+            # (copy-on-write), so the original cannot change.
+            df = to_storage(df, st.session_state.string_storage)
+            st.session_state.original_data[filename] = df
+            st.session_state.current_data[filename] = df
+            bump_version(filename, df)
             st.session_state.task_history[filename] = []
             st.session_state.history_stack[filename] = []
             st.session_state.redo_stack[filename] = []
@@ -0,0 +1,227 @@
+# Modules/upload/ingest_cache.py
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# CONTENT-HASH INGEST CACHE
+# ---------------------------------------------------------
+# Why this exists:
+#   Curators often restart the app and re-upload the exact same files,
+#   paying the full detect + parse cost every time.
+#
+# How it works:
+#   - Files are keyed on a hash of their bytes (plus the sep/encoding
+#     overrides used to parse them, and PARSER_VERSION).
+#   - Parsed results live in a process-wide LRU shared by ALL sessions,
+#     bounded by entry count AND by bytes, so large uploads cannot pin
+#     unbounded memory. An entry's size is estimated once, when the file
+#     is parsed (parsed_memory), and travels with it - also to disk.
+#   - Optionally (CSV_CLEANER_INGEST_CACHE_DIR) each result is also stored
+#     as Parquet, so it survives server restarts.
+#
+#   Cached DataFrames are shared between sessions. That is safe because
+#   tasks never modify data in place (copy-on-write, see app.py), and
+#   callers get a shallow copy so even label changes stay private.
+#
+#   PARSER_VERSION is part of every key: bump it whenever parsing, header
+#   or metadata detection changes, so neither tier (the Parquet files
+#   included) serves a parse made by the old code.
+# =========================================================
+CACHE_ENTRIES_ENV = "CSV_CLEANER_INGEST_CACHE_ENTRIES"
+CACHE_MB_ENV = "CSV_CLEANER_INGEST_CACHE_MB"
+CACHE_DIR_ENV = "CSV_CLEANER_INGEST_CACHE_DIR"
+DEFAULT_CACHE_ENTRIES = 32
+DEFAULT_CACHE_MB = 1024
+
+PARSER_VERSION = 2
+
+# sys.getsizeof of an empty (ASCII) Python str
+STR_OVERHEAD = sys.getsizeof("")
+
+
+@dataclass
+class IngestEntry:
+    """One parsed upload."""
+    df: pd.DataFrame
+    has_metadata: bool
+    header_index: int | None
+    first_row: int  # original row number of df's first row (row_map is contiguous)
+    nbytes: int     # estimated memory of df (see parsed_memory)
+
+    @property
+    def row_map(self):
+        return list(range(self.first_row, self.first_row + len(self.df)))
+
+
+def parsed_memory(df, text_bytes):
+    """
+    Estimated bytes of a DataFrame parsed from text_bytes of text, without
+    the deep scan of memory_usage(deep=True): the column arrays, plus the
+    text (less one separator per cell) and one Python str header per object
+    cell. Empty cells are counted as strings, so it errs on the high side.
+    """
+    object_cells = int((df.dtypes == object).sum()) * len(df)
+    text = max(0, text_bytes - df.size)
+    return int(df.memory_usage(index=True, deep=False).sum()) + text + STR_OVERHEAD * object_cells
+
+
+def content_key(raw_bytes, sep=None, encoding=None):
+    """Cache key for a file's bytes, parse options and the parser version."""
+    digest = hashlib.blake2b(raw_bytes, digest_size=16)
+    digest.update(f"|{sep}|{encoding}|parser-v{PARSER_VERSION}".encode())
+    return digest.hexdigest()
+
+
+class IngestCache:
+    """
+    Thread-safe LRU of IngestEntry objects, with an optional Parquet tier.
+
+    At most max_entries entries and max_bytes bytes are kept in memory; an
+    entry larger than max_bytes on its own is only stored on disk.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, max_bytes=DEFAULT_CACHE_MB * 1024 ** 2, cache_dir=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()   # key ---> (entry, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # -----------------------------------------------------
+    # Lookup
+    # -----------------------------------------------------
+    def get(self, key):
+        """Return the cached IngestEntry for key, or None."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached[0]
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """Store an IngestEntry (memory, and disk when enabled)."""
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def memory_usage(self):
+        """Bytes held in memory by the cached DataFrames."""
+        with self._lock:
+            return self._bytes
+
+    def _remember(self, key, entry):
+        nbytes = entry.nbytes
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            if nbytes > self.max_bytes:
+                return
+
+            self._entries[key] = (entry, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+
+    # -----------------------------------------------------
+    # Parquet tier
+    # -----------------------------------------------------
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".parquet", base + ".json"
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+
+        data_path, meta_path = self._paths(key)
+        meta = {
+            "columns": [str(c) for c in entry.df.columns],
+            "has_metadata": entry.has_metadata,
+            "header_index": entry.header_index,
+            "first_row": entry.first_row,
+            "nbytes": entry.nbytes,
+        }
+
+        try:
+            flat = entry.df.copy(deep=False)
+            flat.columns = [str(i) for i in range(flat.shape[1])]
+            flat.to_parquet(data_path + ".tmp", index=False)
+            os.replace(data_path + ".tmp", data_path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except (OSError, ValueError, TypeError):
+            # The disk tier is best effort: memory caching still works
+            for path in (data_path + ".tmp", data_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+
+        data_path, meta_path = self._paths(key)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            df = pd.read_parquet(data_path)
+        except (OSError, ValueError):
+            return None
+
+        # Parquet stores missing text as null ---> back to NaN like a fresh parse
+        for i in range(df.shape[1]):
+            col = df.iloc[:, i]
+            if col.dtype == object and col.hasnans:
+                df.isetitem(i, col.where(col.notna(), np.nan))
+
+        df.columns = meta["columns"]
+        return IngestEntry(df, meta["has_metadata"], meta["header_index"], meta["first_row"], meta["nbytes"])
+
+
+def _default_max_entries():
+    try:
+        return max(1, int(os.environ.get(CACHE_ENTRIES_ENV, DEFAULT_CACHE_ENTRIES)))
+    except ValueError:
+        return DEFAULT_CACHE_ENTRIES
+
+
+def _default_max_bytes():
+    try:
+        return max(0, int(os.environ.get(CACHE_MB_ENV, DEFAULT_CACHE_MB))) * 1024 ** 2
+    except ValueError:
+        return DEFAULT_CACHE_MB * 1024 ** 2
+
+
+# Process-wide cache shared by every Streamlit session
+INGEST_CACHE = IngestCache(
+    max_entries=_default_max_entries(),
+    max_bytes=_default_max_bytes(),
+    cache_dir=os.environ.get(CACHE_DIR_ENV) or None,
+)
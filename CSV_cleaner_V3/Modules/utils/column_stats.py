@@ -0,0 +1,66 @@
+# Modules/utils/column_stats.py
+import pandas as pd
+
+# =========================================================
+# PER-COLUMN SUMMARY STATS (Live Data Preview)
+# ---------------------------------------------------------
+# One column at a time, so the preview can compute them incrementally
+# (a few columns per run, cached) instead of scanning the whole file
+# before anything is shown.
+#
+# Files are read as text, so min/max are numeric whenever the column
+# holds numbers, and alphabetical otherwise.
+# =========================================================
+
+
+def _is_numeric(dtype):
+    return pd.api.types.is_datetime64_any_dtype(dtype) or (
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    )
+
+
+def _min_max(series):
+    values = series.dropna()
+    if values.empty:
+        return None, None
+
+    if _is_numeric(values.dtype):
+        return values.min(), values.max()
+
+    numbers = pd.to_numeric(pd.Series(values.to_numpy(dtype=object)), errors="coerce").dropna()
+    if not numbers.empty:
+        # As written in the file ("1", not 1.0)
+        return values.iloc[numbers.idxmin()], values.iloc[numbers.idxmax()]
+
+    text = values.astype(str)
+    text = text[text.str.strip() != ""]
+    if text.empty:
+        return None, None
+    return text.min(), text.max()
+
+
+def column_stats(series):
+    """
+    Summary of one column.
+
+    Returns
+    -------
+    dict
+        type, missing % (NaN or empty cells), distinct count (non-missing
+        values), min and max.
+    """
+    n_rows = len(series)
+    missing = series.isna()
+    if not _is_numeric(series.dtype):
+        missing |= series.isin([""])
+    n_missing = int(missing.sum())
+
+    minimum, maximum = _min_max(series[~missing])
+
+    return {
+        "Type": str(series.dtype),
+        "Missing %": round(100 * n_missing / n_rows, 2) if n_rows else 0.0,
+        "Distinct": int(series[~missing].nunique(dropna=True)),
+        "Min": None if minimum is None else str(minimum),
+        "Max": None if maximum is None else str(maximum),
+    }
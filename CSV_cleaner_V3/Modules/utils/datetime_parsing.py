@@ -0,0 +1,207 @@
+# Modules/utils/datetime_parsing.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+# =========================================================
+# SHARED DATETIME PARSING SERVICE
+# ---------------------------------------------------------
+# Used by every date task (ISO conversion, Parse Date, Merge date/time,
+# Merge year/month/day, Assign data types).
+#
+# Environmental data repeats the same timestamps and dates heavily, so:
+#   1. only the UNIQUE values are parsed, then mapped back with codes
+#   2. parsed uniques are cached per column fingerprint (+ options), so
+#      running several date tasks on the same column parses it once
+#   3. format="mixed" (one guess per value, very slow) first tries
+#      formats inferred from a sample; a format is only used after it
+#      gives the same result as the mixed parse on that sample
+#
+# parse_datetimes(x, **options) returns the same values as
+# pd.to_datetime(x, errors="coerce", **options).
+# =========================================================
+CACHE_ENTRIES = 32
+SAMPLE_SIZE = 50          # values used to infer and check a format
+MAX_INFERRED_FORMATS = 3  # formats tried in turn on the values left over
+MIN_FAST_PATH = 500       # fewer uniques than this ---> plain mixed parse
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ---------------------------------------------------------
+# Cache helpers
+# ---------------------------------------------------------
+def _fingerprint(uniques):
+    """Stable hash of an array of unique values."""
+    hashed = pd.util.hash_array(np.asarray(uniques, dtype=object))
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        parsed = _cache.get(key)
+        if parsed is not None:
+            _cache.move_to_end(key)
+        return parsed
+
+
+def _cache_put(key, parsed):
+    with _cache_lock:
+        _cache[key] = parsed
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ---------------------------------------------------------
+# Format inference for format="mixed"
+# ---------------------------------------------------------
+def _sample(values, size=SAMPLE_SIZE):
+    """Evenly spaced sample of an Index."""
+    if len(values) <= size:
+        return values
+    return values[np.linspace(0, len(values) - 1, size).astype(int)]
+
+
+def infer_datetime_format(values, dayfirst=False):
+    """
+    Infer a strftime format that parses `values` exactly like
+    pd.to_datetime(..., format="mixed", dayfirst=dayfirst) does.
+
+    Candidates are guessed from a sample; the one that parses the most
+    sample values, with identical results wherever it succeeds, wins.
+    Returns None when no candidate qualifies.
+    """
+    sample = _sample(pd.Index(values, dtype=object))
+    sample = sample[[isinstance(v, str) for v in sample]]
+    if len(sample) == 0:
+        return None
+
+    reference = pd.to_datetime(sample, errors="coerce", format="mixed", dayfirst=dayfirst)
+
+    candidates = []
+    for value in sample[:10]:
+        guess = guess_datetime_format(value, dayfirst=dayfirst)
+        if guess and guess not in candidates:
+            candidates.append(guess)
+
+    best, best_hits = None, 0
+    for fmt in candidates:
+        strict = pd.to_datetime(sample, errors="coerce", format=fmt)
+        if strict.dtype != reference.dtype:
+            continue
+
+        hits = strict.notna()
+        if hits.sum() > best_hits and (strict[hits] == reference[hits]).all():
+            best, best_hits = fmt, hits.sum()
+
+    return best
+
+
+def _parse_mixed(values, dayfirst):
+    """
+    format="mixed" parse of an Index of uniques, sped up by inferred formats.
+    """
+    if len(values) < MIN_FAST_PATH:
+        return pd.to_datetime(values, errors="coerce", format="mixed", dayfirst=dayfirst)
+
+    result = None
+    remaining = np.asarray(pd.notna(values))
+
+    for _ in range(MAX_INFERRED_FORMATS):
+        if not remaining.any():
+            break
+
+        fmt = infer_datetime_format(values[remaining], dayfirst=dayfirst)
+        if fmt is None:
+            break
+
+        strict = pd.to_datetime(values.where(remaining), errors="coerce", format=fmt)
+        if result is None:
+            result = strict
+        elif strict.dtype != result.dtype:
+            break
+        else:
+            result = result.where(result.notna(), strict)
+
+        remaining &= np.asarray(strict.isna())
+
+    # Whatever is left goes through the per-value parser
+    if result is None:
+        return pd.to_datetime(values, errors="coerce", format="mixed", dayfirst=dayfirst)
+
+    if remaining.any():
+        rest = pd.to_datetime(values.where(remaining), errors="coerce", format="mixed", dayfirst=dayfirst)
+        if not isinstance(rest, pd.DatetimeIndex) or rest.dtype != result.dtype:
+            return pd.to_datetime(values, errors="coerce", format="mixed", dayfirst=dayfirst)
+        result = result.where(~remaining, rest)
+
+    return result
+
+
+# ---------------------------------------------------------
+# Public API
+# ---------------------------------------------------------
+def parse_datetimes(values, *, format=None, dayfirst=False):
+    """
+    Parse datetimes like pd.to_datetime(values, errors="coerce", ...),
+    working on unique values only and caching the result.
+
+    Parameters
+    ----------
+    values : pandas.Series or pandas.Index
+    format : str or None
+        Passed to pd.to_datetime ("mixed" = guess per value).
+    dayfirst : bool
+
+    Returns
+    -------
+    pandas.Series (same index and name) for a Series input,
+    otherwise a pandas.Index.
+    """
+    codes, uniques = pd.factorize(values)
+
+    key = (_fingerprint(uniques), str(uniques.dtype), format, dayfirst)
+    parsed = _cache_get(key)
+
+    if parsed is None:
+        if format == "mixed":
+            parsed = _parse_mixed(pd.Index(uniques, dtype=object), dayfirst)
+        else:
+            parsed = pd.to_datetime(uniques, errors="coerce", format=format, dayfirst=dayfirst)
+        parsed = pd.Index(parsed)
+        _cache_put(key, parsed)
+
+    # Missing values have code -1 ---> NaT
+    result = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+
+    if isinstance(values, pd.Series):
+        return pd.Series(result, index=values.index, name=values.name)
+    return result
+
+
+def format_datetimes(parsed, fmt):
+    """
+    strftime on unique values only (strftime runs in Python per value).
+
+    Returns an object Series/ndarray aligned with `parsed` (NaT ---> NaN).
+    """
+    codes, uniques = pd.factorize(parsed)
+    formatted = pd.Index(uniques).strftime(fmt).to_numpy(dtype=object)
+
+    # Missing values have code -1 ---> NaN
+    result = np.where(codes == -1, np.nan, formatted[codes] if len(formatted) else np.nan)
+
+    if isinstance(parsed, pd.Series):
+        return pd.Series(result, index=parsed.index, name=parsed.name, dtype=object)
+    return result
@@ -0,0 +1,91 @@
+# Modules/utils/header_locator.py
+import numpy as np
+import pandas as pd
+
+from Modules.utils.storage import as_text
+
+# =========================================================
+# HEADER ROW LOCATOR
+# ---------------------------------------------------------
+# Shared by the "Remove Metadata Rows" task and its widget.
+#
+# The true header row is the FIRST row that contains every identifier
+# (cells compared as str(cell).strip().lower()).
+#
+# How it works:
+#   - Only a leading window of rows is normalized. Metadata blocks are
+#     short, so the header is almost always found in the first window;
+#     otherwise the next window (twice as large) is searched, and so on.
+#   - Inside a window, the cells are factorized once: strip/lower runs on
+#     the UNIQUE values only, and each identifier is one vectorized
+#     comparison per row block.
+#   - A row found by the widget can be passed as a hint: the first window
+#     then ends at that row, so checking the hint costs only the rows
+#     above it, and a wrong hint (another file) still gives the right row.
+# =========================================================
+HEADER_WINDOW = 200   # rows in the first window
+
+
+def normalize_identifiers(identifiers):
+    return [str(x).strip().lower() for x in identifiers]
+
+
+def _matching_rows(block, identifiers_norm):
+    """Boolean mask of the rows of `block` that contain every identifier."""
+    n_rows, n_cols = block.shape
+    if n_rows == 0 or n_cols == 0:
+        return np.zeros(n_rows, dtype=bool)
+
+    # Cells as text, column after column (row i of column j at j * n_rows + i)
+    stacked = np.concatenate([as_text(block.iloc[:, j]).to_numpy(dtype=object) for j in range(n_cols)])
+    codes, uniques = pd.factorize(stacked)
+    normalized = pd.Series(uniques, dtype=object).str.strip().str.lower()
+
+    found = np.ones(n_rows, dtype=bool)
+    for identifier in identifiers_norm:
+        is_identifier = (normalized == identifier).to_numpy()
+        if not is_identifier.any():
+            return np.zeros(n_rows, dtype=bool)
+        found &= is_identifier[codes].reshape(n_cols, n_rows).any(axis=0)
+
+    return found
+
+
+def find_header_row(df, identifiers, *, hint=None, window=HEADER_WINDOW):
+    """
+    Position of the first row of df that contains every identifier, or None.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data with the header somewhere in its rows.
+    identifiers : list[str]
+        Column names expected in the header row.
+    hint : int or None
+        Row position found earlier (e.g. by the widget). Never trusted:
+        rows up to the hint are searched first.
+    window : int
+        Rows normalized in the first block.
+
+    Returns
+    -------
+    int or None
+    """
+    identifiers_norm = normalize_identifiers(identifiers)
+    n_rows = len(df)
+
+    window = max(1, int(window))
+    size = window
+    if isinstance(hint, (int, np.integer)) and 0 <= hint < n_rows:
+        size = int(hint) + 1
+
+    start = 0
+    while start < n_rows:
+        found = np.flatnonzero(_matching_rows(df.iloc[start:start + size], identifiers_norm))
+        if len(found):
+            return start + int(found[0])
+
+        start += size
+        size = max(size * 2, window)
+
+    return None
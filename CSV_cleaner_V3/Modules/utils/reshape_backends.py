@@ -0,0 +1,267 @@
+# Modules/utils/reshape_backends.py
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# =========================================================
+# RESHAPE BACKENDS
+# ---------------------------------------------------------
+# The heavy reshaping tasks (wide ---> long, long ---> wide, the provincial
+# chemistry pivot, merging files) call their core operation through a
+# backend instead of calling pandas directly:
+#
+#   melt(df, id_vars, value_vars, var_name, value_name)
+#   pivot_first(df, index, columns, values)          pivot_table(aggfunc="first")
+#   spread_by_variable(df, var_col, value_col, additional_params)
+#   concat_rows(frames)                              pd.concat(ignore_index=True)
+#
+# PandasBackend is the reference: plain pandas, exactly what the tasks did
+# before. Every other backend must give IDENTICAL results (same columns,
+# dtypes, values and row order) - benchmarks/reshape_parity.py runs the
+# shared corpus of inputs through every available backend and compares.
+# A backend only overrides the operations it makes faster, and hands any
+# input it cannot reproduce exactly back to the pandas code (super()).
+#
+# ArrowBackend: spread_by_variable groups the rows with Arrow compute
+# (dictionary_encode + a stable array_sort_indices) and builds every variable
+# column with one vectorized take, instead of filtering the whole table
+# once per variable. melt, pivot_table and concat are already single
+# vectorized passes in pandas, so they are inherited.
+#
+# The backend is chosen with CSV_CLEANER_RESHAPE_BACKEND ("auto", "pandas",
+# "arrow"; default "auto" = the first available in BACKEND_PREFERENCE). An
+# unknown or unavailable backend falls back to pandas.
+#
+# Adding an engine (e.g. Polars or DuckDB): subclass PandasBackend, return
+# False from available() when the package is not installed, override the
+# operations it speeds up, register it in BACKENDS / BACKEND_PREFERENCE and
+# run benchmarks/reshape_parity.py.
+# =========================================================
+RESHAPE_BACKEND_ENV = "CSV_CLEANER_RESHAPE_BACKEND"
+
+
+class PandasBackend:
+    """Reference implementation: plain pandas."""
+
+    name = "pandas"
+
+    @classmethod
+    def available(cls):
+        return True
+
+    # ---------------------------------------------------------
+    # wide ---> long
+    # ---------------------------------------------------------
+    def melt(self, df, *, id_vars, value_vars, var_name, value_name):
+        return df.melt(
+            id_vars=id_vars,
+            value_vars=value_vars,
+            var_name=var_name,
+            value_name=value_name
+        )
+
+    # ---------------------------------------------------------
+    # long ---> wide (first value per cell)
+    # ---------------------------------------------------------
+    def pivot_first(self, df, *, index, columns, values):
+        return df.pivot_table(
+            index=index,
+            columns=columns,
+            values=values,
+            aggfunc="first"
+        ).reset_index()
+
+    # ---------------------------------------------------------
+    # One column per variable (provincial chemistry pivot)
+    # ---------------------------------------------------------
+    def spread_by_variable(self, df, *, var_col, value_col, additional_params=None):
+        """
+        Stack the rows of each variable (in order of first appearance) and
+        move its values into a column of its own, named after the variable
+        (plus the first non-missing value of each additional_params column).
+        Rows with a missing variable are dropped.
+        """
+        cleaned_df = df[df[var_col].notna()].copy()
+
+        variables = cleaned_df[var_col].unique().tolist()
+        filtered_dfs = []
+
+        for var in variables:
+            sub = cleaned_df[cleaned_df[var_col] == var].copy()
+
+            # Base column name
+            new_col_name = var
+
+            # Merge metadata into header
+            if additional_params:
+                meta_values = []
+                for param in additional_params:
+                    first_val = sub[param].dropna().iloc[0] if sub[param].notna().any() else "NA"
+                    meta_values.append(str(first_val))
+
+                meta_str = "_".join(meta_values)
+                new_col_name = f"{var}_{meta_str}"
+
+                # Drop metadata columns
+                sub = sub.drop(columns=additional_params)
+
+            # Rename value column
+            sub = sub.rename(columns={value_col: new_col_name})
+
+            # Drop variable column
+            sub = sub.drop(columns=[var_col])
+
+            # Move new column to end
+            extracted = sub[new_col_name]
+            sub = sub.drop(columns=[new_col_name])
+            sub[new_col_name] = extracted
+
+            sub = sub.reset_index(drop=True)
+            filtered_dfs.append(sub)
+
+        # Merge vertically
+        return pd.concat(filtered_dfs, ignore_index=True)
+
+    # ---------------------------------------------------------
+    # Stack frames
+    # ---------------------------------------------------------
+    def concat_rows(self, frames):
+        return pd.concat(frames, ignore_index=True)
+
+
+class ArrowBackend(PandasBackend):
+    """Arrow compute for grouping, NumPy takes for building the columns."""
+
+    name = "arrow"
+
+    # Value columns whose missing-cell fill is known to match pd.concat
+    _SPREAD_VALUE_KINDS = "Obifu"
+
+    def spread_by_variable(self, df, *, var_col, value_col, additional_params=None):
+        params = list(additional_params or [])
+
+        plain = (
+            df.columns.is_unique
+            and var_col != value_col
+            and not {var_col, value_col} & set(params)
+            and isinstance(df[value_col].dtype, np.dtype)
+            and df[value_col].dtype.kind in self._SPREAD_VALUE_KINDS
+        )
+        codes = self._variable_codes(df[var_col]) if plain else None
+        if codes is None:
+            return super().spread_by_variable(df, var_col=var_col, value_col=value_col,
+                                              additional_params=additional_params)
+        codes, variables = codes
+
+        # -----------------------------------------------------
+        # Rows grouped by variable (first-appearance order), original
+        # order kept inside each group; missing variables dropped
+        # -----------------------------------------------------
+        order = pc.array_sort_indices(codes).to_numpy()   # stable, nulls last
+        order = order[: len(codes) - codes.null_count]
+        counts = np.bincount(codes.fill_null(0).to_numpy()[order], minlength=len(variables))
+        ends = np.cumsum(counts)
+        starts = ends - counts
+
+        # -----------------------------------------------------
+        # Column names (variable + first non-missing metadata values)
+        # -----------------------------------------------------
+        names = list(variables)
+        if params:
+            meta = [self._first_values(df[param], order, starts, ends) for param in params]
+            names = [f"{var}_{'_'.join(values)}" for var, values in zip(variables, zip(*meta))]
+
+        base_cols = [col for col in df.columns if col not in {var_col, value_col, *params}]
+        if not names or len(set(names)) != len(names) or set(names) & set(df.columns):
+            return super().spread_by_variable(df, var_col=var_col, value_col=value_col,
+                                              additional_params=additional_params)
+
+        # -----------------------------------------------------
+        # Build the result: base columns in group order, then one column
+        # per variable holding that group's values and NaN elsewhere
+        # -----------------------------------------------------
+        base = df[base_cols].take(order).reset_index(drop=True)
+        columns = {col: base[col] for col in base_cols}
+
+        values = df[value_col].to_numpy()
+        indexer = np.full(len(order), -1, dtype=np.intp)
+        for name, start, end in zip(names, starts, ends):
+            indexer[start:end] = order[start:end]
+            columns[name] = pd.Series(pd.api.extensions.take(values, indexer, allow_fill=True),
+                                      index=base.index, name=name, copy=False)
+            indexer[start:end] = -1
+
+        return pd.DataFrame(columns, index=base.index, copy=False)
+
+    # ---------------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------------
+    @staticmethod
+    def _variable_codes(series):
+        """
+        (codes, variables) for a column of strings: codes is an Arrow array
+        (null for missing variables) indexing variables, which are listed
+        in order of first appearance. None if the column is not plain text.
+        """
+        if pd.api.types.infer_dtype(series, skipna=True) != "string":
+            return None
+        try:
+            encoded = pc.dictionary_encode(pa.array(series, from_pandas=True))
+        except (pa.ArrowException, TypeError, ValueError):
+            return None
+        if not pa.types.is_string(encoded.type.value_type):
+            return None
+        return encoded.indices, encoded.dictionary.to_pylist()
+
+    @staticmethod
+    def _first_values(series, order, starts, ends):
+        """str() of the first non-missing value of each group, "NA" if none."""
+        present = np.flatnonzero(series.notna().to_numpy()[order])
+        firsts = np.searchsorted(present, starts)
+
+        values = []
+        for first, end in zip(firsts, ends):
+            if first < len(present) and present[first] < end:
+                values.append(str(series.iloc[order[present[first]]]))
+            else:
+                values.append("NA")
+        return values
+
+
+# ---------------------------------------------------------
+# Registry
+# ---------------------------------------------------------
+BACKENDS = {
+    "pandas": PandasBackend,
+    "arrow": ArrowBackend,
+}
+
+BACKEND_PREFERENCE = ["arrow", "pandas"]
+
+
+def available_backends():
+    """Names of the backends that can run here (pandas always can)."""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def get_backend(name=None):
+    """
+    The reshape backend to use.
+
+    name : "auto", "pandas", "arrow" or None (None = CSV_CLEANER_RESHAPE_BACKEND,
+        default "auto"). Unknown or unavailable backends fall back to pandas.
+    """
+    if name is None:
+        name = os.environ.get(RESHAPE_BACKEND_ENV, "auto")
+    name = name.strip().lower()
+
+    if name == "auto":
+        name = next(candidate for candidate in BACKEND_PREFERENCE if BACKENDS[candidate].available())
+
+    backend = BACKENDS.get(name, PandasBackend)
+    if not backend.available():
+        backend = PandasBackend
+    return backend()
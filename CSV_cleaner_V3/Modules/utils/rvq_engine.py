@@ -0,0 +1,228 @@
+# Modules/utils/rvq_engine.py
+import hashlib
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from Modules.utils.storage import as_text
+
+# =========================================================
+# COMPILED RVQ RULE ENGINE
+# ---------------------------------------------------------
+# Shared by the "Add RVQs" task and its widget pre-scan.
+#
+# How it works:
+#   1. All selected columns (as text) are stacked into one long array and
+#      factorized once: rules are evaluated on the UNIQUE values only, and
+#      a data code shared by many columns is checked once.
+#   2. One combined pattern (all "contains" codes, plus the nan/empty rule)
+#      finds the candidate uniques in a single pass; each rule is then
+#      checked on those few candidates only. "full" rules are a hash
+#      lookup (the uniques are distinct, so at most one can match).
+#   3. The matches of every rule (as positions in the uniques) are cached
+#      per fingerprint of the uniques + rule codes, so the widget pre-scan
+#      and the task share one scan.
+#   4. The stacked codes + uniques are cached too, per identity of the
+#      column arrays they were computed from, so the task reuses the
+#      pre-scan's factorization of the same data instead of redoing it.
+#      Entries only hold WEAK references to those arrays: the cache never
+#      keeps data alive, and an entry is dead once its data is replaced.
+#      Like the ingest cache, this relies on data never being written in
+#      place (copy-on-write, see app.py): an edited column has new arrays.
+# =========================================================
+NUMBER_PATTERN = re.compile(r"([0-9]*\.?[0-9]+)")
+SCAN_CACHE_ENTRIES = 256
+FACTOR_CACHE_ENTRIES = 4
+
+_scan_cache = OrderedDict()
+_scan_lock = threading.Lock()
+
+_factor_cache = OrderedDict()   # column identities ---> (weak refs to their owners, codes, uniques)
+_factor_lock = threading.Lock()
+
+
+def _is_nan_rule(rule):
+    return rule["match_type"] == "contains" and rule["data_code"].lower() == "nan"
+
+
+def _rules_key(rules):
+    """Only the data codes and match types decide which values match."""
+    return tuple((rule["data_code"], rule["match_type"]) for rule in rules)
+
+
+def _fingerprint(uniques):
+    hashed = pd.util.hash_array(np.asarray(uniques, dtype=object))
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def _nan_mask(values):
+    """The "nan" rule: any case of 'nan', or an empty / blank cell."""
+    return values.str.contains("nan", case=False, na=False) | (values.str.strip() == "")
+
+
+def _scan(uniques, rules):
+    """
+    Return, for each rule, the sorted positions of the uniques it matches.
+    """
+    values = pd.Series(uniques, dtype=object)
+
+    # -----------------------------------------------------
+    # Single pass: candidates for every "contains" rule
+    # -----------------------------------------------------
+    alternatives = []
+    for rule in rules:
+        if _is_nan_rule(rule):
+            alternatives += ["(?i:nan)", r"\A\s*\Z"]
+        elif rule["match_type"] == "contains":
+            alternatives.append(re.escape(rule["data_code"]))
+
+    candidates = np.array([], dtype=np.intp)
+    if alternatives:
+        combined = "|".join(dict.fromkeys(alternatives))
+        candidates = np.flatnonzero(values.str.contains(combined, na=False).to_numpy())
+    candidate_values = values.iloc[candidates]
+
+    # "full" rules: hash lookup in the uniques
+    lookup = pd.Index(uniques, dtype=object)
+
+    hits = []
+    for rule in rules:
+        code = rule["data_code"]
+        match = rule["match_type"]
+
+        if match == "full":
+            pos = lookup.get_indexer([code])
+            hits.append(pos[pos >= 0])
+
+        elif _is_nan_rule(rule):
+            hits.append(candidates[_nan_mask(candidate_values).to_numpy()])
+
+        elif match == "contains":
+            mask = candidate_values.str.contains(re.escape(code), na=False).to_numpy()
+            hits.append(candidates[mask])
+
+        else:
+            # prefix/suffix are accepted by validation but match nothing
+            hits.append(np.array([], dtype=np.intp))
+
+    return hits
+
+
+def scan_rules(uniques, rules):
+    """
+    Positions of the uniques matched by each rule (cached).
+
+    Parameters
+    ----------
+    uniques : array-like of str
+        Distinct values of a column, as text.
+    rules : list[dict]
+        RVQ rules (data_code, rvq_code, match_type).
+
+    Returns
+    -------
+    list[numpy.ndarray]
+        One array of positions per rule, in rule order.
+    """
+    key = (_fingerprint(uniques), _rules_key(rules))
+
+    with _scan_lock:
+        hits = _scan_cache.get(key)
+        if hits is not None:
+            _scan_cache.move_to_end(key)
+            return hits
+
+    hits = _scan(uniques, rules)
+
+    with _scan_lock:
+        _scan_cache[key] = hits
+        while len(_scan_cache) > SCAN_CACHE_ENTRIES:
+            _scan_cache.popitem(last=False)
+
+    return hits
+
+
+def clear_scan_cache():
+    with _scan_lock:
+        _scan_cache.clear()
+    with _factor_lock:
+        _factor_cache.clear()
+
+
+def _column_identity(col):
+    """
+    (key, owner) for a column: where its data lives, and the object that
+    owns that memory (alive ---> the memory cannot hold other data).
+    """
+    values = col._values
+    if isinstance(values, np.ndarray):
+        owner = values
+        while isinstance(owner.base, np.ndarray):
+            owner = owner.base
+        return (values.__array_interface__["data"][0], values.strides, len(values), values.dtype.str), owner
+
+    owner = getattr(values, "_pa_array", values)
+    return (id(owner), len(values)), owner
+
+
+def factorize_columns(df, columns):
+    """
+    Codes + uniques of several columns stacked end to end, as text
+    (cached per identity of the column arrays; see 4. above).
+
+    Row i of columns[k] is at position k * len(df) + i of the codes.
+    """
+    if not columns:
+        return np.array([], dtype=np.intp), np.array([], dtype=object)
+
+    series = [df[col] for col in columns]
+    identities = None
+    if all(isinstance(col, pd.Series) for col in series):
+        identities = [_column_identity(col) for col in series]
+
+    if identities is not None:
+        key = tuple(identity for identity, _ in identities)
+        with _factor_lock:
+            entry = _factor_cache.get(key)
+            if entry is not None and all(ref() is owner for ref, (_, owner) in zip(entry[0], identities)):
+                _factor_cache.move_to_end(key)
+                return entry[1], entry[2]
+
+    stacked = np.concatenate([as_text(col).to_numpy(dtype=object) for col in series])
+    codes, uniques = pd.factorize(stacked)
+    uniques = np.asarray(uniques, dtype=object)
+
+    if identities is not None:
+        try:
+            refs = [weakref.ref(owner) for _, owner in identities]
+        except TypeError:
+            return codes, uniques
+
+        with _factor_lock:
+            # Forget entries whose data is gone, then the least recently used
+            for dead in [k for k, (entry_refs, _, _) in _factor_cache.items() if any(r() is None for r in entry_refs)]:
+                del _factor_cache[dead]
+            _factor_cache[key] = (refs, codes, uniques)
+            while len(_factor_cache) > FACTOR_CACHE_ENTRIES:
+                _factor_cache.popitem(last=False)
+
+    return codes, uniques
+
+
+def columns_have_matches(df, columns, rules):
+    """
+    True if any rule matches any value of the columns (widget pre-scan).
+    The factorization and the scan are cached for the task that follows.
+    """
+    _, uniques = factorize_columns(df, columns)
+    return any(len(h) for h in scan_rules(uniques, rules))
+
+
+def first_number(text):
+    """First number in a string as float (detection limit), or None."""
+    found = NUMBER_PATTERN.search(text)
+    return float(found.group(1)) if found else None
@@ -0,0 +1,162 @@
+# Modules/utils/storage.py
+import os
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# STRING STORAGE (Python objects vs. Arrow)
+# ---------------------------------------------------------
+# Files are read with dtype=str, so by default every cell is a Python
+# string object (~50+ bytes each, plus an 8-byte pointer). In "pyarrow"
+# mode, text columns are stored as pandas' string[pyarrow] dtype instead:
+# one contiguous buffer per column, usually a fraction of the memory,
+# and the .str methods run as Arrow compute kernels.
+#
+# The mode is opt-in (Performance Settings or CSV_CLEANER_STRING_STORAGE).
+# Missing values are pd.NA in Arrow columns and NaN in object columns;
+# tasks that rely on object semantics get an object copy of the data
+# (see Modules/task_orchestration/engine.py).
+# =========================================================
+STRING_STORAGE_ENV = "CSV_CLEANER_STRING_STORAGE"
+STRING_STORAGES = {
+    "Python objects": "python",
+    "Arrow (pyarrow)": "pyarrow",
+}
+ARROW_STRING = pd.StringDtype("pyarrow")
+
+
+def default_string_storage():
+    """Storage mode from CSV_CLEANER_STRING_STORAGE ("python" or "pyarrow")."""
+    storage = os.environ.get(STRING_STORAGE_ENV, "python").strip().lower()
+    return storage if storage in STRING_STORAGES.values() else "python"
+
+
+def is_arrow_string(dtype):
+    return isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"
+
+
+def has_arrow_strings(df):
+    """True if any column of df is stored as string[pyarrow]."""
+    return any(is_arrow_string(dtype) for dtype in df.dtypes)
+
+
+# ---------------------------------------------------------
+# Conversions
+# ---------------------------------------------------------
+def to_arrow_strings(df, memo=None):
+    """
+    Store every text column (object column holding only strings and
+    missing values) as string[pyarrow]. Other columns are shared as is.
+
+    memo: see to_storage().
+    """
+    converted = {}
+    for i, dtype in enumerate(df.dtypes):
+        if dtype != object:
+            continue
+
+        col = df.iloc[:, i]
+        converted_col = _memo_column(memo, col, _to_arrow_column)
+        if converted_col is not None:
+            converted[i] = converted_col
+
+    return _replace_columns(df, converted)
+
+
+def to_object_strings(df, memo=None):
+    """
+    Store every string[pyarrow] column as Python objects again, with NaN
+    for missing values (exactly what a dtype=str read gives).
+
+    memo: see to_storage().
+    """
+    converted = {}
+    for i, dtype in enumerate(df.dtypes):
+        if is_arrow_string(dtype):
+            converted[i] = _memo_column(memo, df.iloc[:, i], as_objects)
+
+    return _replace_columns(df, converted)
+
+
+def to_storage(df, storage, memo=None):
+    """
+    Convert df to the given storage mode ("python" or "pyarrow").
+
+    Pass the same memo dict when converting several frames that share data
+    (the loaded files, their originals and undo snapshots): each frame and
+    each column array is then converted ONCE, and frames/columns that were
+    shared before stay shared instead of becoming separate copies.
+    """
+    if memo is None:
+        return to_arrow_strings(df) if storage == "pyarrow" else to_object_strings(df)
+
+    # The memo also keeps every source alive, so ids/addresses stay unique
+    key = ("frame", id(df))
+    if key not in memo:
+        converted = to_arrow_strings(df, memo) if storage == "pyarrow" else to_object_strings(df, memo)
+        memo[key] = (df, converted)
+    return memo[key][1]
+
+
+def _to_arrow_column(col):
+    """col as string[pyarrow] if it holds only text, else None."""
+    if pd.api.types.infer_dtype(col, skipna=True) in ("string", "empty"):
+        return col.astype(ARROW_STRING)
+    return None
+
+
+def _memo_column(memo, col, convert):
+    """convert(col), reusing the result for columns backed by the same memory."""
+    if memo is None:
+        return convert(col)
+
+    key = ("column", buffer_key(col._values), len(col))
+    if key not in memo:
+        memo[key] = (col, convert(col))
+    converted = memo[key][1]
+    if converted is None:
+        return None
+    return pd.Series(converted._values, index=col.index, name=col.name, copy=False)
+
+
+def buffer_key(values):
+    """Identity of the memory behind a column (views of one array share it)."""
+    if isinstance(values, np.ndarray):
+        return values.__array_interface__["data"][0]
+    return id(getattr(values, "_pa_array", values))
+
+
+def _replace_columns(df, converted):
+    if not converted:
+        return df
+
+    result = df.copy(deep=False)
+    for i, col in converted.items():
+        result.isetitem(i, col)
+    return result
+
+
+def as_objects(series):
+    """A column as Python objects (string[pyarrow] ---> object, pd.NA ---> NaN)."""
+    if is_arrow_string(series.dtype):
+        return pd.Series(series.to_numpy(dtype=object, na_value=np.nan), index=series.index, name=series.name)
+    return series
+
+
+def as_text(series):
+    """
+    A column as text, like .astype(str) on object data: "nan" for missing
+    values, whatever the storage. Arrow columns stay Arrow.
+    """
+    if is_arrow_string(series.dtype):
+        return series.fillna("nan")
+    return series.astype(str)
+
+
+# ---------------------------------------------------------
+# Memory accounting
+# ---------------------------------------------------------
+def frame_memory(df):
+    """Bytes used by df, including the Python string objects."""
+    return int(df.memory_usage(deep=True, index=True).sum())
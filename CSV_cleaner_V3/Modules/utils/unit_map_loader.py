@@ -0,0 +1,242 @@
+# Modules/utils/unit_map_loader.py
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from io import BytesIO
+
+import pandas as pd
+
+from Modules.utils.units import get_unit_map as get_bundled_unit_map
+
+# =========================================================
+# CACHED UNIT MAP (Google Sheet + on-disk snapshot)
+# ---------------------------------------------------------
+# Why this exists:
+#   The unit map used to be downloaded from a Google Sheet when
+#   headers.py was imported, so app startup waited on the network, and
+#   offline the map was silently empty.
+#
+# How it works:
+#   - current() never waits on the network. It returns the map in memory,
+#     else from the last on-disk snapshot, else the bundled map in
+#     Modules/utils/units.py.
+#   - When the snapshot is missing or older than the TTL, ONE background
+#     thread downloads the sheet, writes a new snapshot and swaps the map.
+#   - Every map has a version (hash of its contents) so results computed
+#     from it can be cached safely.
+#
+# Settings (environment):
+#   CSV_CLEANER_UNIT_MAP_SNAPSHOT   snapshot file (default ~/.cache/csv_cleaner/unit_map.json)
+#   CSV_CLEANER_UNIT_MAP_TTL_HOURS  refresh age in hours (default 24)
+# =========================================================
+GOOGLE_SHEET_CSV_URL = ("https://docs.google.com/spreadsheets/d/e/2PACX-1vS-NlRtFkD24tm2P6v5WjMioxGqggjb9bzalVsg664tHgWX1IPiLxhSpnySSTEe4i7IbzYkfuKXt9OH/pub?gid=1618419054&single=true&output=csv")
+
+SNAPSHOT_ENV = "CSV_CLEANER_UNIT_MAP_SNAPSHOT"
+TTL_ENV = "CSV_CLEANER_UNIT_MAP_TTL_HOURS"
+DEFAULT_SNAPSHOT = os.path.join(os.path.expanduser("~"), ".cache", "csv_cleaner", "unit_map.json")
+DEFAULT_TTL_HOURS = 24
+FETCH_TIMEOUT = 10  # seconds
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+# ---------------------------------------------------------
+# Building a map
+# ---------------------------------------------------------
+def _normalized(pairs):
+    """{normalized raw unit: normalized unit} from (raw, normalized) pairs."""
+    # headers.py imports this module, so import its helper lazily
+    from Modules.cleaning_tasks.headers import normalize_unit_string
+
+    return {normalize_unit_string(raw): str(clean).strip() for raw, clean in pairs}
+
+
+def build_sheet_map(csv_bytes):
+    """Unit map from the Google Sheet CSV (columns raw_unit, normalized_unit)."""
+    df = pd.read_csv(BytesIO(csv_bytes))
+    df = df.dropna(subset=["raw_unit", "normalized_unit"])
+    return _normalized(zip(df["raw_unit"], df["normalized_unit"]))
+
+
+def bundled_unit_map():
+    """The map shipped in Modules/utils/units.py, keyed like the sheet map."""
+    return _normalized(get_bundled_unit_map().items())
+
+
+def map_version(unit_map):
+    """Short content hash of a unit map (keys in order + values)."""
+    payload = json.dumps(list(unit_map.items()), ensure_ascii=True).encode()
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def build_token_index(unit_map):
+    """
+    {raw unit: position in the map} for the raw units that can equal a
+    header token (letters/digits only). Used by UnitMap.find_token().
+    """
+    return {
+        raw: pos for pos, raw in enumerate(unit_map)
+        if isinstance(raw, str) and TOKEN.fullmatch(raw)
+    }
+
+
+@dataclass(frozen=True)
+class UnitMap:
+    """One version of the unit map, with its token index."""
+    units: dict
+    source: str                     # "sheet", "snapshot" or "bundled"
+    fetched_at: float | None = None
+    version: str = field(init=False)
+    keys: list = field(init=False, repr=False)
+    index: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "version", map_version(self.units))
+        object.__setattr__(self, "keys", list(self.units))
+        object.__setattr__(self, "index", build_token_index(self.units))
+
+    def find_token(self, tokens):
+        """
+        The raw unit that comes first IN MAP ORDER among `tokens`, or None.
+
+        Same answer as checking every key of the map in order against the
+        tokens, but in O(len(tokens)).
+        """
+        positions = [self.index[t] for t in tokens if t in self.index]
+        return self.keys[min(positions)] if positions else None
+
+
+# ---------------------------------------------------------
+# Loader
+# ---------------------------------------------------------
+class UnitMapLoader:
+    """
+    Thread-safe holder of the current UnitMap, refreshed in the background.
+    """
+
+    def __init__(self, snapshot_path=None, ttl_hours=DEFAULT_TTL_HOURS, url=GOOGLE_SHEET_CSV_URL):
+        self.snapshot_path = snapshot_path
+        self.ttl_seconds = ttl_hours * 3600
+        self.url = url
+
+        self._lock = threading.Lock()
+        self._refreshing = None   # background thread, while one runs
+        self._current = None      # UnitMap
+        self._checked_at = None   # last download attempt
+
+    # -----------------------------------------------------
+    # Reading
+    # -----------------------------------------------------
+    def current(self):
+        """The current UnitMap (never blocks on the network)."""
+        with self._lock:
+            if self._current is None:
+                snapshot = self._read_snapshot()
+                if snapshot is not None:
+                    self._current = UnitMap(snapshot["map"], "snapshot", snapshot["fetched_at"])
+                else:
+                    self._current = UnitMap(bundled_unit_map(), "bundled")
+            current = self._current
+            stale = self._is_stale(current)
+
+        if stale:
+            self.refresh()
+        return current
+
+    def get(self):
+        """The current unit map as a dict {raw unit: normalized unit}."""
+        return self.current().units
+
+    def _is_stale(self, current):
+        last = max(filter(None, [current.fetched_at, self._checked_at]), default=None)
+        return last is None or time.time() - last > self.ttl_seconds
+
+    # -----------------------------------------------------
+    # Refreshing
+    # -----------------------------------------------------
+    def refresh(self, wait=False):
+        """
+        Download the sheet in a background thread (one at a time).
+        With wait=True, block until that download has finished.
+        """
+        with self._lock:
+            thread = self._refreshing
+            if thread is None or not thread.is_alive():
+                self._checked_at = time.time()   # do not retry on every call
+                thread = threading.Thread(target=self._refresh, name="unit-map-refresh", daemon=True)
+                self._refreshing = thread
+                thread.start()
+
+        if wait:
+            thread.join()
+
+    def _refresh(self):
+        try:
+            with urllib.request.urlopen(self.url, timeout=FETCH_TIMEOUT) as response:
+                units = build_sheet_map(response.read())
+        except Exception as e:
+            logging.getLogger(__name__).warning("Failed to load unit map from Google Sheet: %s", e)
+            return
+
+        if not units:
+            return
+
+        unit_map = UnitMap(units, "sheet", time.time())
+        with self._lock:
+            self._current = unit_map
+        self._write_snapshot(unit_map)
+
+    # -----------------------------------------------------
+    # On-disk snapshot
+    # -----------------------------------------------------
+    def _read_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            return {"map": dict(snapshot["items"]), "fetched_at": float(snapshot["fetched_at"])}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_snapshot(self, unit_map):
+        if not self.snapshot_path:
+            return
+
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                # A list of pairs keeps the map order (it decides ties)
+                json.dump({"fetched_at": unit_map.fetched_at, "items": list(unit_map.units.items())}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            # The snapshot is best effort: the map in memory still works
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _default_ttl_hours():
+    try:
+        return max(0.0, float(os.environ.get(TTL_ENV, DEFAULT_TTL_HOURS)))
+    except ValueError:
+        return DEFAULT_TTL_HOURS
+
+
+# Process-wide loader shared by every Streamlit session
+UNIT_MAP_LOADER = UnitMapLoader(
+    snapshot_path=os.environ.get(SNAPSHOT_ENV) or DEFAULT_SNAPSHOT,
+    ttl_hours=_default_ttl_hours(),
+)
+
+
+def current_unit_map():
+    """The current UnitMap (see UnitMapLoader.current)."""
+    return UNIT_MAP_LOADER.current()
@@ -2,15 +2,28 @@ import streamlit as st
 import pandas as pd
 
 from Modules.state import session_initializer
-from Modules.state.undo_redo import restart_app
+from Modules.state.data_version import bump_version, current_versions, reset_versions
+from Modules.state.undo_redo import (
+    discard_spilled_snapshots, enforce_undo_budget, prune_task_cache, push_snapshot, restart_app, share_unchanged_columns,
+)
 from Modules.upload import file_uploads
 from ui_components import download, sidebar_intro, preview
 from ui_components.toolbar import toolbar
+from ui_components.settings import performance_settings
+from ui_components.performance import show_performance
+from ui_components.task_queue import queued_widget_df, show_task_queue
 from Modules.utils.ui_utils import big_caption
 
 from Modules.task_orchestration.tasks import TASKS
 from Modules.task_orchestration.widgets import WIDGETS
 from Modules.task_orchestration.allowed_tasks import get_allowed_tasks
+from Modules.task_orchestration.engine import normalize_result
+from Modules.task_orchestration.executor import run_per_file, run_pipeline_per_file
+from Modules.task_orchestration.pipeline import IMMEDIATE_TASKS, queue_blocker
+from Modules.task_orchestration.frame import TaskFrame
+from Modules.task_orchestration.profiling import measure, task_record
+from Modules.task_orchestration.result_cache import cached_result, store_result
+from Modules.utils.storage import to_object_strings, to_storage
 
 
 # ---------------------------------------------------------
@@ -22,6 +35,16 @@ st.set_page_config(
     layout="wide"
 )
 
+# ---------------------------------------------------------
+# COPY-ON-WRITE
+# ---------------------------------------------------------
+# Undo/redo snapshots share column arrays with the current data instead of
+# copying them (see Modules/state/undo_redo.py). Copy-on-write guarantees a
+# change to one DataFrame can never leak into another. It is the default
+# from pandas 3 onwards.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # ---------------------------------------------------------
 # INITIALIZE SESSION
 # ---------------------------------------------------------
@@ -69,6 +92,170 @@ def apply_tab_styling():
 
 apply_tab_styling()
 
+# ---------------------------------------------------------
+# PER-FILE RUN HELPERS
+# ---------------------------------------------------------
+def current_frames():
+    """
+    Every loaded file as a TaskFrame (df + row_map + provenance).
+    Tasks see these frames, never session_state.
+    """
+    return {
+        fname: TaskFrame(
+            df=df,
+            row_map=st.session_state.row_map[fname],
+            filename=fname,
+            provenance=st.session_state.task_history.get(fname, []),
+        )
+        for fname, df in st.session_state.current_data.items()
+    }
+
+
+def progress_reporter():
+    """Progress bar + on_progress callback for the executor."""
+    progress_bar = st.progress(0.0, text="Running task...")
+
+    def report_progress(done, total, fname):
+        progress_bar.progress(done / total, text=f"Processed {fname} ({done}/{total})")
+
+    return progress_bar, report_progress
+
+
+def commit_results(frames, results, metadata, records):
+    """
+    Make the outcome of a per-file run (one task, or the queued tasks) the
+    current data, with ONE undo snapshot per changed file.
+
+    frames   : filename ---> TaskFrame the run started from
+    results  : filename ---> {"frame", "error", ...}, in upload order
+    metadata : filename ---> {task name: metadata DataFrame}
+    records  : filename ---> performance records of the run (the last one
+               gets the size of the undo snapshot)
+
+    Returns {filename: error} for the files that failed (left unchanged).
+    """
+    new_data = {}
+    failed = {}
+
+    for fname, outcome in results.items():
+
+        # Performance log (alongside task_history; see the Performance tab)
+        st.session_state.task_profiles.setdefault(fname, []).extend(records[fname])
+
+        # Failed file ---> keep its data unchanged
+        if outcome["error"]:
+            failed[fname] = outcome["error"]
+            new_data[fname] = st.session_state.current_data[fname]
+            continue
+
+        # ---------------------------------------------------------
+        # Undo & Redo Stacks
+        # ---------------------------------------------------------
+        # The snapshot is a reference to the previous version (no copy).
+        # Unchanged columns of the new version share its arrays, so each
+        # undo step only costs the columns the run actually changed.
+        previous_df = st.session_state.current_data[fname]
+        previous_row_map = st.session_state.row_map[fname]
+
+        new_frame = outcome["frame"]
+        new_data[fname] = share_unchanged_columns(previous_df, new_frame.df)
+        st.session_state.row_map[fname] = new_frame.row_map
+
+        push_snapshot(
+            st.session_state.history_stack.setdefault(fname, []),
+            {"df": previous_df, "row_map": previous_row_map},
+            new_data[fname],
+            new_frame.row_map,
+        )
+        records[fname][-1]["snapshot_mb"] = round(st.session_state.history_stack[fname][-1]["nbytes"] / 1024 ** 2, 3)
+
+        # Provenance doubles as the replayable recipe for the batch runner
+        st.session_state.task_history[fname] = new_frame.provenance
+
+        # Clear redo stack because a new action happened
+        st.session_state.redo_stack[fname] = []
+
+        for task_name, metadata_df in metadata.get(fname, {}).items():
+            st.session_state.metadata_outputs.setdefault(fname, {})
+            st.session_state.metadata_outputs[fname][task_name] = metadata_df
+
+    # ---------------------------------------------------------
+    # Replace all data with cleaned versions
+    # ---------------------------------------------------------
+    st.session_state.current_data = new_data
+
+    # New data version for every changed file (caches key on it)
+    for fname in results:
+        if fname not in failed:
+            bump_version(fname)
+
+    # Keep the session's undo history within its memory budget
+    enforce_undo_budget()
+
+    for fname, error in failed.items():
+        st.error(f"**{fname}**: the task failed and this file was left unchanged. ({error})", icon="🚨")
+
+    if len(failed) < len(results):
+
+        # Data changed: close the download options (cached per data version)
+        st.session_state.show_downloads = False
+
+        # Mark that a task was applied
+        st.session_state.task_applied = True
+
+    return failed
+
+
+def apply_task_queue():
+    """
+    Run every queued task on every file in one go: consecutive column
+    changes are fused into one pass (see Modules/task_orchestration/pipeline.py),
+    and each file gets a single undo snapshot for the whole chain.
+    """
+    steps = list(st.session_state.task_queue)
+    frames = current_frames()
+
+    progress_bar, report_progress = progress_reporter()
+    results = run_pipeline_per_file(
+        steps,
+        frames,
+        mode=st.session_state.execution_mode,
+        max_workers=st.session_state.max_workers,
+        on_progress=report_progress,
+        trace_memory=st.session_state.profile_memory,
+    )
+    progress_bar.empty()
+
+    # Performance log: one record per stage (a fused stage covers several steps)
+    records = {}
+    for fname, outcome in results.items():
+        step = len(frames[fname].provenance) + 1
+        if outcome["error"]:
+            records[fname] = [task_record(fname, step, "Queued tasks", frames[fname].df.shape, error=outcome["error"])]
+            continue
+
+        records[fname] = []
+        for profile in outcome["profiles"]:
+            records[fname].append(task_record(
+                fname, step, profile["task"],
+                (profile["rows_in"], profile["columns_in"]),
+                (profile["rows_out"], profile["columns_out"]),
+                profile=profile,
+            ))
+            step += profile["steps"]
+
+    st.session_state.metadata_outputs = {}
+    metadata = {fname: outcome["metadata"] for fname, outcome in results.items() if not outcome["error"]}
+    failed = commit_results(frames, results, metadata, records)
+
+    if len(failed) < len(results):
+        st.session_state.task_queue = []
+        st.success(
+            f"{len(steps)} queued task(s) applied! Check the **Live Data Preview** tab to see the updated data before downloading.",
+            icon="✅",
+        )
+
+
 # ---------------------------------------------------------
 # MAIN CSV CURATION WORKFLOW
 # ---------------------------------------------------------
@@ -77,7 +264,7 @@ def run_csv_curation_studio():
     st.markdown("## CSV Curation Studio")
     toolbar()
 
-    tab1, tab2 = st.tabs(["Main App", "Live Data Preview"])
+    tab1, tab2, tab3 = st.tabs(["Main App", "Live Data Preview", "Performance"])
 
     # -----------------------------------------------------
     # TAB 1: MAIN APP
@@ -113,6 +300,14 @@ def run_csv_curation_studio():
             # Task selection widget
             selected_task = st.selectbox("Select", ["Choose an option"] + allowed_tasks,key="task_selector")
 
+            # Queue mode: collect several tasks, then apply them as one step
+            queue_mode = st.toggle(
+                "🧾 Queue tasks, then apply them together",
+                key="queue_mode",
+                help="Queued column changes (rename, reorder, remove, add constant columns) run as one pass, "
+                     "and the whole queue is a single undo step.",
+            )
+
             # Only run tasks if data exists
             if st.session_state.current_data:
 
@@ -138,8 +333,10 @@ def run_csv_curation_studio():
                             st.session_state.metadata_outputs = {}
                             st.session_state.selected_task = current_task
 
-                        # 2. Representative DataFrame for widgets (first uploaded file)
-                        df_for_widget = next(iter(st.session_state.current_data.values()))
+                        # 2. Representative DataFrame for widgets (first uploaded file,
+                        #    as the queued tasks will leave it)
+                        first_file = next(iter(st.session_state.current_data))
+                        df_for_widget = queued_widget_df(first_file) if queue_mode else st.session_state.current_data[first_file]
 
                         # ---------------------------------------------------------
                         # WIDGETS
@@ -147,6 +344,17 @@ def run_csv_curation_studio():
                         # 3. 🎯 Collect task inputs from the WIDGET
                         task_inputs = widget_func(df_for_widget)
 
+                        # Queue mode: remember the step instead of running it
+                        if task_inputs is not None and queue_mode:
+                            blocker = queue_blocker(selected_task, st.session_state.task_queue)
+                            if blocker:
+                                st.warning(blocker, icon="⚠️")
+                                task_inputs = None
+                            elif selected_task not in IMMEDIATE_TASKS:
+                                st.session_state.task_queue.append({"task": selected_task, "kwargs": task_inputs})
+                                st.toast(f"Queued: {selected_task}", icon="🧾")
+                                task_inputs = None
+
                         # Only proceed if widget returned something meaningful
                         if task_inputs is not None:
 
@@ -159,49 +367,61 @@ def run_csv_curation_studio():
                             # This is the ONLY task that operates on ALL files at once.
                             # It bypasses the per-file loop entirely.
                             # ---------------------------------------------------------
-                            if selected_task == "merge_files":
+                            if selected_task == "Merge multiple files":
 
-                                # Save undo state BEFORE merging (all files)
+                                # Save undo state BEFORE merging (all files; references, no copies)
                                 st.session_state.history_stack["__merge__"] = [{
-                                    "current_data": {
-                                        fname: df.copy()
-                                        for fname, df in st.session_state.current_data.items()
-                                    },
-                                    "row_map": {
-                                        fname: rm.copy()
-                                        for fname, rm in st.session_state.row_map.items()
-                                    }
+                                    "current_data": dict(st.session_state.current_data),
+                                    "row_map": dict(st.session_state.row_map)
                                 }]
                                 st.session_state.redo_stack["__merge__"] = []
 
                                 # 🏃🏻‍♀️🏃🏻‍♀️ Run merge ONCE with all files
+                                # (merge works on object strings; the result gets the session's storage)
                                 task_func = TASKS[selected_task]
-                                result = task_func(st.session_state.current_data, filename=None, **task_inputs)
+                                all_files = {f: to_object_strings(df) for f, df in st.session_state.current_data.items()}
+                                with measure(st.session_state.profile_memory) as measured:
+                                    result = task_func(all_files, filename=None, **task_inputs)
 
                                 # Normalize return signature
-                                if isinstance(result, tuple):
-                                    merged_df = result[0]
-                                    metadata_df = (result[-1] if isinstance(result[-1], pd.DataFrame) else None )
-                                else:
-                                    merged_df = result
-                                    metadata_df = None
+                                merged_df, metadata_df = normalize_result(result)
+                                merged_df = to_storage(merged_df, st.session_state.string_storage)
 
                                 # Replace all data with a single merged file
                                 st.session_state.current_data = {"merged.csv": merged_df}
                                 st.session_state.original_data = {"merged.csv": merged_df.copy()}
 
+                                # New data version; results cached for the old files are useless now
+                                reset_versions()
+                                bump_version("merged.csv")
+                                st.session_state.task_cache = {}
+
                                 # Reset row_map
                                 st.session_state.row_map = {"merged.csv": list(range(1, len(merged_df) + 1)) }
 
-                                # Reset history structures
+                                # Reset history structures (keep the recipe so far + the merge step)
+                                first_history = next(iter(st.session_state.task_history.values()), [])
+                                discard_spilled_snapshots()
                                 st.session_state.history_stack = {"merged.csv": []}
                                 st.session_state.redo_stack = {"merged.csv": []}
-                                st.session_state.task_history = {"merged.csv": []}
+                                st.session_state.task_history = {
+                                    "merged.csv": first_history + [{"task": selected_task, "kwargs": task_inputs}]
+                                }
 
                                 # Store metadata if present
                                 if metadata_df is not None:
                                     st.session_state.metadata_outputs = { "merged.csv": {selected_task: metadata_df}}
 
+                                # Performance log: the merge is the merged file's last step
+                                shape_in = (
+                                    sum(len(df) for df in all_files.values()),
+                                    len(set().union(*(df.columns for df in all_files.values()))),
+                                )
+                                st.session_state.task_profiles.setdefault("merged.csv", []).append(
+                                    task_record("merged.csv", len(first_history) + 1, selected_task,
+                                                shape_in, merged_df.shape, profile=measured)
+                                )
+
                                 st.session_state.task_applied = True
                                 st.success("Files merged successfully! See the **Live Data Preview** tab.")
                                 return  # IMPORTANT: Skip normal per-file loop
@@ -210,67 +430,80 @@ def run_csv_curation_studio():
                             # ---------------------------------------------------------
                             # NORMAL CASE: PER-FILE TASKS
                             # ---------------------------------------------------------
-                            new_data = {}
-
-                            for fname, df in st.session_state.current_data.items():
-
-                                # ---------------------------------------------------------
-                                # Undo & Redo Stacks
-                                # ---------------------------------------------------------
-                                st.session_state.history_stack.setdefault(fname, [])
-                                st.session_state.redo_stack.setdefault(fname, [])
-
-                                # Save undo state BEFORE applying task
-                                st.session_state.history_stack[fname].append({
-                                    "df": st.session_state.current_data[fname].copy(),
-                                    "row_map": st.session_state.row_map[fname].copy()
-                                })
-
-                                # Clear redo stack because a new action happened
-                                st.session_state.redo_stack[fname] = []
-
-                                # ---------------------------------------------------------
-                                # 🏃🏻‍♀️🏃🏻‍♀️ RUN THE TASK
-                                # ---------------------------------------------------------
-                                task_func = TASKS[selected_task]
-
-                                # Run the task directly on the DataFrame.
-                                result = task_func(df, filename=fname, **task_inputs)
-
-                                # ---------------------------------------------------------
-                                # NORMALIZE RETURN
-                                # ---------------------------------------------------------
-                                if isinstance(result, tuple):
-                                    cleaned_df = result[0]
-                                    metadata_df = (result[-1] if isinstance(result[-1], pd.DataFrame) else None)
-                                else:
-                                    cleaned_df = result
-                                    metadata_df = None
+                            frames = current_frames()
+                            versions = current_versions()
+                            cached = {}
 
-
-                                # ---------------------------------------------------------
-                                # 🔖 CLEAN DATA + METADATA
-                                # ---------------------------------------------------------
-                                new_data[fname] = cleaned_df
-
-                                if metadata_df is not None:
-                                    st.session_state.metadata_outputs.setdefault(fname, {})
-                                    st.session_state.metadata_outputs[fname][selected_task] = metadata_df
+                            # Same task + inputs on this version before (e.g. undo, then re-apply)?
+                            for fname, frame in frames.items():
+                                outcome = cached_result(st.session_state.task_cache, selected_task, task_inputs, frame, versions[fname])
+                                if outcome is not None:
+                                    cached[fname] = outcome
 
                             # ---------------------------------------------------------
-                            # 5. Replace all data with cleaned versions
+                            # 🏃🏻‍♀️🏃🏻‍♀️ RUN THE TASK ON EVERY FILE
                             # ---------------------------------------------------------
-                            st.session_state.current_data = new_data
-
-                            # 🔄 Clear preview cache because data changed
-                            st.session_state.preview_cache = {}
-
-
-                            # 6. Mark that a task was applied
-                            st.session_state.task_applied = True
+                            # Sequential, thread pool or process pool (sidebar setting).
+                            # Results come back in upload order; errors are isolated per file.
+                            progress_bar, report_progress = progress_reporter()
+
+                            to_run = {fname: frame for fname, frame in frames.items() if fname not in cached}
+                            computed = {}
+                            if to_run:
+                                computed = run_per_file(
+                                    selected_task,
+                                    to_run,
+                                    task_inputs,
+                                    mode=st.session_state.execution_mode,
+                                    max_workers=st.session_state.max_workers,
+                                    on_progress=report_progress,
+                                    trace_memory=st.session_state.profile_memory,
+                                )
+                            progress_bar.empty()
+
+                            # Upload order, cached or computed
+                            results = {fname: cached.get(fname) or computed[fname] for fname in frames}
 
-                            # 7. Notify the user
-                            st.success("Task completed! Check the **Live Data Preview** tab to see the updated data before downloading.", icon="✅")
+                            # ---------------------------------------------------------
+                            # 🔖 CLEAN DATA + METADATA
+                            # ---------------------------------------------------------
+                            records = {
+                                fname: [task_record(
+                                    fname, len(frames[fname].provenance) + 1, selected_task,
+                                    frames[fname].df.shape,
+                                    outcome["frame"].df.shape if outcome["frame"] is not None else None,
+                                    profile=outcome.get("profile"),
+                                    error=outcome["error"],
+                                    cached=fname in cached,
+                                )]
+                                for fname, outcome in results.items()
+                            }
+                            metadata = {
+                                fname: {selected_task: outcome["metadata"]}
+                                for fname, outcome in results.items()
+                                if not outcome["error"] and outcome["metadata"] is not None
+                            }
+                            failed = commit_results(frames, results, metadata, records)
+
+                            # Remember new results (the cached frame holds the stored, column-sharing df);
+                            # entries whose input snapshot was already spilled are dropped again
+                            for fname in computed:
+                                if fname not in failed:
+                                    store_result(
+                                        st.session_state.task_cache, selected_task, task_inputs,
+                                        frames[fname], versions[fname],
+                                        {**computed[fname], "frame": computed[fname]["frame"].updated(st.session_state.current_data[fname])},
+                                    )
+                            prune_task_cache()
+
+                            if len(failed) < len(results):
+                                st.success("Task completed! Check the **Live Data Preview** tab to see the updated data before downloading.", icon="✅")
+
+                # -------------------------------------------------
+                # 🧾 QUEUED TASKS
+                # -------------------------------------------------
+                if queue_mode and show_task_queue():
+                    apply_task_queue()
 
 
 
@@ -321,11 +554,14 @@ def run_csv_curation_studio():
                 st.markdown("#### Download Your Cleaned Data")
                 big_caption("These files update automatically after each task.")
 
-                show_downloads = st.button("Show Download Options")
+                # Stays open across reruns (format/Excel options); closed when the data changes
+                if st.button("Show Download Options"):
+                    st.session_state.show_downloads = True
 
-                if show_downloads:
+                if st.session_state.show_downloads:
                     download.download_output()
                     download.excel_download()
+                    download.recipe_download()
 
 
 
@@ -347,12 +583,19 @@ def run_csv_curation_studio():
     with tab2:
         preview.show_live_preview()
 
+    # -----------------------------------------------------
+    # TAB 3: PERFORMANCE
+    # -----------------------------------------------------
+    with tab3:
+        show_performance()
+
 
 # ---------------------------------------------------------
 # SIDEBAR
 # ---------------------------------------------------------
 with st.sidebar:
     sidebar_intro.sidebar()
+    performance_settings()
 
 
 # ---------------------------------------------------------
@@ -0,0 +1,63 @@
+"""
+Headless batch cleaning for the CSV Curation Studio.
+
+Replays a recipe recorded in the app ("recipe.json" in the download section)
+over every CSV in a directory, using one worker process per CPU.
+
+Usage
+-----
+    python batch_clean.py recipe.json raw_files/ cleaned_files/ --workers 8
+
+Outputs
+-------
+    cleaned_files/<name>_cleaned.csv          cleaned data (one per input file)
+    cleaned_files/metadata/<name>__stepNN_*.csv metadata tables produced by tasks
+    cleaned_files/batch_summary.csv            status + row counts per file
+    cleaned_files/performance.csv              time, peak memory, shapes per step per file
+"""
+import argparse
+import os
+import sys
+
+# Same import layout as `streamlit run app.py` (app folder + Modules on the path)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+sys.path.append(os.path.join(APP_DIR, "Modules"))
+
+from Modules.task_orchestration.batch_runner import load_recipe, run_batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a CSV Curation Studio recipe over a directory of CSV files.")
+    parser.add_argument("recipe", help="Path to the recipe JSON file.")
+    parser.add_argument("input_dir", help="Directory containing the raw CSV files.")
+    parser.add_argument("output_dir", help="Directory for cleaned files and metadata tables.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: all CPUs).")
+    parser.add_argument("--pattern", default=".csv", help="File suffix to process (default: .csv).")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Record each step's peak memory in performance.csv (slower).")
+    args = parser.parse_args(argv)
+
+    recipe = load_recipe(args.recipe)
+
+    def report(result):
+        status = "✔" if result["status"] == "ok" else "✘"
+        print(f"{status} {result['file']} {result['error']}".rstrip())
+
+    summary_df = run_batch(
+        args.input_dir,
+        recipe,
+        args.output_dir,
+        pattern=args.pattern,
+        max_workers=args.workers,
+        on_result=report,
+        trace_memory=args.profile_memory,
+    )
+
+    failed = int((summary_df["status"] != "ok").sum())
+    print(f"\nProcessed {len(summary_df)} file(s), {failed} failed. Summary: {os.path.join(args.output_dir, 'batch_summary.csv')}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
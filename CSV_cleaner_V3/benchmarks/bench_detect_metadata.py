@@ -0,0 +1,60 @@
+"""
+Benchmark: header/metadata detection time vs. file length.
+
+detect_metadata_rows() only reads a leading window (DETECT_LINES), so its
+time should stay flat from 1k to 1M rows. load_csv_bytes() is timed too
+for context (it still parses the whole body).
+
+Usage
+-----
+    python benchmarks/bench_detect_metadata.py
+"""
+import os
+import sys
+import timeit
+
+# Same import layout as `streamlit run app.py` (app folder + Modules on the path)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.append(os.path.join(APP_DIR, "Modules"))
+
+from Modules.upload.file_uploads import detect_metadata_rows, load_csv_bytes
+
+ROW_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+
+METADATA = (
+    "Station: Churchill River,,,,\n"
+    "Latitude: 58.7N,,,,\n"
+    "Method: APHA,\"AWWA, WPCF\",,,\n"
+    "\n"
+)
+HEADER = "SampleID,Date,Temperature,Conductivity,Notes\n"
+
+
+def make_file(n_rows, with_metadata):
+    body = "".join(f"SN{i},2024-06-{i % 28 + 1:02d},{i % 30}.5,{i * 3},ok\n" for i in range(n_rows))
+    return (METADATA if with_metadata else "") + HEADER + body
+
+
+def best_of(func, repeat=5):
+    """Best wall time of `repeat` runs, in milliseconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    print(f"{'rows':>10} {'metadata':>9} {'detect (ms)':>12} {'load (ms)':>10}  result")
+
+    for n_rows in ROW_COUNTS:
+        for with_metadata in (False, True):
+            text = make_file(n_rows, with_metadata)
+            raw = text.encode("utf-8")
+
+            detect_ms = best_of(lambda: detect_metadata_rows(text))
+            load_ms = best_of(lambda: load_csv_bytes(raw), repeat=1)
+            result = detect_metadata_rows(text)
+
+            print(f"{n_rows:>10,} {str(with_metadata):>9} {detect_ms:>12.3f} {load_ms:>10.1f}  {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Parity check + timings for the reshape backends (Modules/utils/reshape_backends.py).
+
+Every backend must give exactly what the pandas reference gives. The
+shared corpus below runs each backend operation on awkward inputs (missing
+variables, missing metadata, numeric values, duplicate names, inputs that
+must fail, ...) through every available backend and compares the result
+with PandasBackend: same columns, dtypes, values and cell types, or the same
+error. Any difference is reported and the script exits with status 1 - run
+it after changing a backend or adding a new one.
+
+Then each backend is timed on a synthetic long-format chemistry export
+(one row per sample and parameter).
+
+Usage
+-----
+    python benchmarks/reshape_parity.py                  # corpus + 200k-row timings
+    python benchmarks/reshape_parity.py --rows 2000000   # bigger export
+    python benchmarks/reshape_parity.py --rows 0         # corpus only
+"""
+import argparse
+import os
+import sys
+import timeit
+
+# Same import layout as `streamlit run app.py` (app folder + Modules on the path)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.append(os.path.join(APP_DIR, "Modules"))
+
+import numpy as np
+import pandas as pd
+
+from Modules.utils.reshape_backends import BACKENDS, PandasBackend, available_backends
+
+DEFAULT_ROWS = 200_000
+N_PARAMETERS = 60
+
+
+# =========================================================
+# Corpus
+# =========================================================
+def chemistry_long(n_rows, n_parameters=N_PARAMETERS, seed=0):
+    """Long-format lab export: one row per (sample, parameter), text cells."""
+    rng = np.random.default_rng(seed)
+    parameters = np.array([f"Param {i:03d}" for i in range(n_parameters)], dtype=object)
+    units = np.array(["mg/L", "µg/L", "µS/cm", "pH units"], dtype=object)
+
+    sample = np.arange(n_rows) // n_parameters
+    parameter = parameters[np.arange(n_rows) % n_parameters]
+    result = np.char.mod("%.3f", rng.gamma(3, 5, n_rows)).astype(object)
+    result[rng.random(n_rows) < 0.05] = "<0.5"
+
+    return pd.DataFrame({
+        "Sample ID": np.char.add("SN", sample.astype(str)).astype(object),
+        "Station": rng.choice(np.array(["CR-01", "CR-02", "NR-07"], dtype=object), n_rows),
+        "Sample Date": np.char.add("2024-06-", (1 + sample % 28).astype(str)).astype(object),
+        "Parameter": parameter,
+        "Unit": units[np.arange(n_rows) % n_parameters % len(units)],
+        "Method": np.where(rng.random(n_rows) < 0.5, np.array("APHA", dtype=object), np.nan),
+        "Result": result,
+    })
+
+
+def _long(values=None, variables=None):
+    df = chemistry_long(240, n_parameters=6)
+    if values is not None:
+        df["Result"] = values(len(df))
+    if variables is not None:
+        df["Parameter"] = variables(df["Parameter"])
+    return df
+
+
+def _with_missing_variables(params):
+    params = params.copy()
+    params.iloc[::7] = np.nan
+    params.iloc[3::11] = None
+    return params
+
+
+def _duplicate_labels():
+    df = _long()
+    df.columns = ["Sample ID", "Station", "Sample ID", "Parameter", "Unit", "Method", "Result"]
+    return df
+
+
+SPREAD = "spread_by_variable"
+SPREAD_KW = {"var_col": "Parameter", "value_col": "Result"}
+META_KW = {**SPREAD_KW, "additional_params": ["Unit", "Method"]}
+
+CORPUS = [
+    # (case name, backend operation, input frame(s), keyword arguments)
+    ("spread text values", SPREAD, lambda: _long(), SPREAD_KW),
+    ("spread with metadata in names", SPREAD, lambda: _long(), META_KW),
+    ("spread missing variables", SPREAD, lambda: _long(variables=_with_missing_variables), META_KW),
+    ("spread pd.NA variables", SPREAD,
+     lambda: _long(variables=lambda p: p.where(np.arange(len(p)) % 5 != 0, pd.NA)), SPREAD_KW),
+    ("spread all-missing metadata", SPREAD,
+     lambda: _long().assign(Method=np.nan), META_KW),
+    ("spread numeric metadata", SPREAD,
+     lambda: _long().assign(Unit=lambda d: np.arange(len(d)) * 0.5, Method=lambda d: np.arange(len(d))), META_KW),
+    ("spread float values", SPREAD, lambda: _long(values=lambda n: np.linspace(0, 1, n)), SPREAD_KW),
+    ("spread int values", SPREAD, lambda: _long(values=lambda n: np.arange(n)), SPREAD_KW),
+    ("spread uint values", SPREAD, lambda: _long(values=lambda n: np.arange(n, dtype=np.uint32)), SPREAD_KW),
+    ("spread bool values", SPREAD, lambda: _long(values=lambda n: np.arange(n) % 3 == 0), SPREAD_KW),
+    ("spread Int64 values", SPREAD, lambda: _long(values=lambda n: pd.array(np.arange(n), dtype="Int64")), SPREAD_KW),
+    ("spread datetime values", SPREAD,
+     lambda: _long(values=lambda n: pd.date_range("2024-01-01", periods=n, freq="h")), SPREAD_KW),
+    ("spread one variable, int values", SPREAD,
+     lambda: _long(values=lambda n: np.arange(n), variables=lambda p: pd.Series("pH", index=p.index, dtype=object)), SPREAD_KW),
+    ("spread unicode and empty variables", SPREAD,
+     lambda: _long(variables=lambda p: p.replace({"Param 000": "", "Param 001": "Température µg/L"})), SPREAD_KW),
+    ("spread numeric variables", SPREAD,
+     lambda: _long(variables=lambda p: p.str[-3:].astype(int)), SPREAD_KW),
+    ("spread mixed-type variables", SPREAD,
+     lambda: _long(variables=lambda p: p.where(np.arange(len(p)) % 2 == 0, 1.5)), SPREAD_KW),
+    ("spread variable named like a column", SPREAD,
+     lambda: _long(variables=lambda p: p.replace({"Param 002": "Station"})), SPREAD_KW),
+    ("spread colliding names", SPREAD,
+     lambda: _long(variables=lambda p: p.replace({"Param 000": "a_b", "Param 001": "a"}))
+     .assign(Unit=lambda d: np.where(d["Parameter"] == "a", "b_mg/L", "mg/L"), Method="x"), META_KW),
+    ("spread metadata is the variable column", SPREAD, lambda: _long(),
+     {**SPREAD_KW, "additional_params": ["Parameter"]}),
+    ("spread variable column = value column", SPREAD, lambda: _long(),
+     {"var_col": "Parameter", "value_col": "Parameter"}),
+    ("spread duplicate column labels", SPREAD, _duplicate_labels, SPREAD_KW),
+    ("spread non-default index", SPREAD, lambda: _long().iloc[::-2], META_KW),
+    ("spread no variables", SPREAD, lambda: _long().assign(Parameter=np.nan), SPREAD_KW),
+    ("spread empty frame", SPREAD, lambda: _long().iloc[:0], SPREAD_KW),
+
+    ("melt", "melt", lambda: _long(),
+     {"id_vars": ["Sample ID"], "value_vars": ["Unit", "Result"], "var_name": "variable", "value_name": "value"}),
+    ("melt numeric", "melt", lambda: _long(values=lambda n: np.arange(n)),
+     {"id_vars": ["Sample ID", "Station"], "value_vars": ["Result"], "var_name": "var", "value_name": "val"}),
+
+    ("pivot first", "pivot_first", lambda: _long(),
+     {"index": ["Sample ID", "Station"], "columns": "Parameter", "values": "Result"}),
+    ("pivot first with missing values", "pivot_first",
+     lambda: _long(variables=_with_missing_variables).assign(Station=lambda d: d["Station"].where(d.index % 9 != 0)),
+     {"index": ["Station"], "columns": "Parameter", "values": "Method"}),
+    ("pivot first int values", "pivot_first", lambda: _long(values=lambda n: np.arange(n)),
+     {"index": ["Sample Date"], "columns": "Parameter", "values": "Result"}),
+
+    ("concat", "concat_rows", lambda: [_long(), _long().assign(Extra="x"), _long().iloc[:0]], {}),
+    ("concat mixed dtypes", "concat_rows",
+     lambda: [_long(values=lambda n: np.arange(n)), _long(values=lambda n: np.linspace(0, 1, n))], {}),
+]
+
+
+# =========================================================
+# Comparison
+# =========================================================
+def run_case(backend, operation, make_input, kwargs):
+    """("ok", result) or ("error", "<type>: <message>")."""
+    data = make_input()
+    try:
+        if operation == "concat_rows":
+            return "ok", backend.concat_rows(data)
+        return "ok", getattr(backend, operation)(data, **kwargs)
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}"
+
+
+def difference(expected, result):
+    """Why result differs from the reference, or None."""
+    if expected[0] != result[0]:
+        return f"reference gave {expected[0]!r} ({expected[1] if expected[0] == 'error' else 'a frame'}), backend gave {result[0]!r}"
+
+    if expected[0] == "error":
+        return None if expected[1] == result[1] else f"error {result[1]!r} instead of {expected[1]!r}"
+
+    expected, result = expected[1], result[1]
+    try:
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    except AssertionError as e:
+        return str(e).strip().splitlines()[0]
+
+    # assert_frame_equal treats None and NaN alike: compare the cell types too
+    for i in range(expected.shape[1]):
+        if expected.dtypes.iloc[i] == object:
+            if not expected.iloc[:, i].map(type).equals(result.iloc[:, i].map(type)):
+                return f"cell types differ in column {expected.columns[i]!r}"
+    return None
+
+
+def check_corpus(backends):
+    """Run the corpus through every backend; returns the list of failures."""
+    reference = PandasBackend()
+    failures = []
+
+    for case, operation, make_input, kwargs in CORPUS:
+        expected = run_case(reference, operation, make_input, kwargs)
+        for name in backends:
+            problem = difference(expected, run_case(BACKENDS[name](), operation, make_input, kwargs))
+            status = "ok" if problem is None else "MISMATCH"
+            print(f"{case:<45} {name:<10} {status}")
+            if problem is not None:
+                failures.append((case, name, problem))
+
+    return failures
+
+
+# =========================================================
+# Timings
+# =========================================================
+def time_backends(backends, n_rows):
+    df = chemistry_long(n_rows)
+    n_samples = n_rows // N_PARAMETERS
+    halves = [df.iloc[: n_rows // 2], df.iloc[n_rows // 2:]]
+
+    operations = [
+        ("provincial pivot", lambda b: b.spread_by_variable(df, **META_KW)),
+        ("long to wide", lambda b: b.pivot_first(df, index=["Sample ID", "Station"], columns="Parameter", values="Result")),
+        ("wide to long", lambda b: b.melt(df, id_vars=["Sample ID"], value_vars=["Unit", "Result"],
+                                          var_name="variable", value_name="value")),
+        ("merge files", lambda b: b.concat_rows(halves)),
+    ]
+
+    print(f"\n{n_rows:,} rows ({n_samples:,} samples x {N_PARAMETERS} parameters), seconds:")
+    print(f"{'operation':<20}" + "".join(f"{name:>12}" for name in backends))
+    for label, func in operations:
+        times = [min(timeit.repeat(lambda: func(BACKENDS[name]()), number=1, repeat=2)) for name in backends]
+        print(f"{label:<20}" + "".join(f"{seconds:>12.3f}" for seconds in times))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that every reshape backend matches pandas, then time them.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS,
+                        help=f"Rows of the timed export (default {DEFAULT_ROWS:,}; 0 = no timings).")
+    args = parser.parse_args(argv)
+
+    backends = available_backends()
+    others = [name for name in backends if name != PandasBackend.name]
+    print(f"Available backends: {', '.join(backends)}\n")
+
+    failures = check_corpus(others)
+
+    if args.rows:
+        time_backends(backends, args.rows)
+
+    if failures:
+        print(f"\n{len(failures)} mismatch(es) with the pandas reference:")
+        for case, name, problem in failures:
+            print(f"  {case} [{name}]: {problem}")
+        return 1
+
+    print(f"\nAll {len(others)} backend(s) match the pandas reference on {len(CORPUS)} cases.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Synthetic messy scientific CSVs for the benchmarks.
+
+Every file looks like a real lab/field export:
+    - a metadata preamble above the header (station, method, blank line)
+    - unit-laden headers: "Temperature (°C)", "Conductivity [µS/cm]", "Dissolved Oxygen mg/L"
+    - detection-limit values ("<0.5", "<1", "ND") and negative readings
+    - dates written in four different formats, plus separate time and y/m/d columns
+    - NaN-like tokens ("N/A", "-999") and untrimmed text
+    - a parameter/result pair of columns (long format) for the pivot tasks
+
+The same n_rows and seed always give the same bytes.
+"""
+import numpy as np
+import pandas as pd
+
+PREAMBLE = (
+    "Project: Northern Rivers Monitoring,,,\n"
+    "Station: Churchill River,58.7N,94.2W,\n"
+    "Method: APHA,\"AWWA, WPCF\",,\n"
+    "\n"
+)
+
+HEADERS = [
+    "Sample ID", "Station", "Sample Date", "Sample Time", "Year", "Month", "Day",
+    "Temperature (°C)", "Conductivity [µS/cm]", "pH", "Dissolved Oxygen mg/L",
+    "Nitrate (mg/L)", "Total Phosphorus (µg/L)", "Parameter", "Result", "Notes",
+]
+
+PARAMETERS = ["Chloride", "Sulphate", "Calcium", "Magnesium", "Sodium"]
+STATIONS = ["CR-01", "CR-02", "NR-07", "  NR-11 ", "SR-03"]
+NOTES = ["ok", "", "N/A", "-999", " field dup ", "ice cover", "ok", ""]
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d %b %Y", "%Y-%m-%d %H:%M"]
+
+
+def _with_detection_limits(values, rng, limits, share=0.1):
+    """Numbers as text, with a share of the rows replaced by detection-limit codes."""
+    text = np.char.mod("%.3f", values).astype(object)
+    flagged = rng.random(len(values)) < share
+    text[flagged] = rng.choice(limits, size=flagged.sum())
+    return text
+
+
+def make_frame(n_rows, seed=0):
+    """The body of a messy file as a DataFrame of strings (header = HEADERS)."""
+    rng = np.random.default_rng(seed)
+
+    stamps = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 10 * 365 * 24 * 60, n_rows), unit="min")
+    fmt = rng.integers(0, len(DATE_FORMATS), n_rows)
+    dates = np.empty(n_rows, dtype=object)
+    for i, date_format in enumerate(DATE_FORMATS):
+        rows = fmt == i
+        dates[rows] = stamps[rows].strftime(date_format)
+
+    phosphorus = rng.normal(20, 15, n_rows)   # a few negative readings
+
+    return pd.DataFrame({
+        "Sample ID": np.char.add("SN", np.arange(n_rows).astype(str)),
+        "Station": rng.choice(STATIONS, n_rows),
+        "Sample Date": dates,
+        "Sample Time": stamps.strftime("%H:%M"),
+        "Year": stamps.year.astype(str),
+        "Month": stamps.month.astype(str),
+        "Day": stamps.day.astype(str),
+        "Temperature (°C)": np.char.mod("%.1f", rng.normal(12, 6, n_rows)),
+        "Conductivity [µS/cm]": np.char.mod("%d", rng.integers(50, 900, n_rows)),
+        "pH": np.char.mod("%.2f", rng.normal(7.4, 0.4, n_rows)),
+        "Dissolved Oxygen mg/L": np.char.mod("%.2f", rng.normal(9, 2, n_rows)),
+        "Nitrate (mg/L)": _with_detection_limits(rng.gamma(2, 0.4, n_rows), rng, ["<0.5", "<0.05", "ND"]),
+        "Total Phosphorus (µg/L)": _with_detection_limits(phosphorus, rng, ["<1", "<2.0", "ND"]),
+        "Parameter": np.array(PARAMETERS)[np.arange(n_rows) % len(PARAMETERS)],
+        "Result": _with_detection_limits(rng.gamma(3, 5, n_rows), rng, ["<0.5", "<5"]),
+        "Notes": rng.choice(NOTES, n_rows),
+    })
+
+
+def make_csv(n_rows, seed=0, with_metadata=True):
+    """A messy CSV file (UTF-8 bytes) with n_rows data rows."""
+    body = make_frame(n_rows, seed).to_csv(index=False)
+    return ((PREAMBLE if with_metadata else "") + body).encode("utf-8")
@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pandas as pd
+
+# Same import layout as `streamlit run app.py` (app folder + Modules on the path)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.append(os.path.join(APP_DIR, "Modules"))
+
+# app.py turns copy-on-write on for the whole session
+pd.set_option("mode.copy_on_write", True)
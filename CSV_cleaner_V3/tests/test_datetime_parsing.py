@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Modules.utils import datetime_parsing
+from Modules.utils.datetime_parsing import (
+    MIN_FAST_PATH, clear_cache, format_datetimes, infer_datetime_format, parse_datetimes,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def _timestamps(n, formats, seed=0):
+    """Repeated timestamps written in several formats, with blanks and junk."""
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range("2023-01-01", periods=n, freq="37min")[rng.integers(0, n, n * 3)]
+    values = [stamp.strftime(formats[i % len(formats)]) for i, stamp in enumerate(stamps)]
+    values[::50] = [np.nan] * len(values[::50])
+    values[7::97] = ["n/a"] * len(values[7::97])
+    return pd.Series(values, dtype=object, name="Sample Time")
+
+
+@pytest.mark.parametrize("format, dayfirst", [
+    (None, False),
+    ("%Y-%m-%d %H:%M", False),
+    ("mixed", False),
+    ("mixed", True),
+])
+def test_parse_matches_pandas(format, dayfirst):
+    formats = ["%Y-%m-%d %H:%M"] if format != "mixed" else ["%Y-%m-%d %H:%M", "%d/%m/%Y %H:%M", "%b %d %Y"]
+    values = _timestamps(MIN_FAST_PATH * 2, formats)
+
+    expected = pd.to_datetime(values, errors="coerce", format=format, dayfirst=dayfirst)
+    result = parse_datetimes(values, format=format, dayfirst=dayfirst)
+    pd.testing.assert_series_equal(result, expected)
+
+
+def test_parse_index_matches_pandas():
+    values = pd.Index(["2024-06-01", "2024-06-02", None, "2024-06-01", "bad"], dtype=object)
+    expected = pd.to_datetime(values, errors="coerce")
+    pd.testing.assert_index_equal(parse_datetimes(values), expected)
+
+
+def test_inferred_format_agrees_with_mixed_parse():
+    values = pd.Index(["01/02/2024 10:00", "13/02/2024 11:30", "28/02/2024 09:15"], dtype=object)
+    fmt = infer_datetime_format(values, dayfirst=True)
+    assert fmt == "%d/%m/%Y %H:%M"
+
+
+def test_cache_is_keyed_on_content_and_options():
+    values = _timestamps(200, ["%d/%m/%Y %H:%M"])
+    first = parse_datetimes(values, format="mixed")
+    assert len(datetime_parsing._cache) == 1
+
+    # Same values (another object): served from the cache
+    pd.testing.assert_series_equal(parse_datetimes(values.copy(), format="mixed"), first)
+    assert len(datetime_parsing._cache) == 1
+
+    # Changed values or options: parsed again, matching pandas
+    changed = values.copy()
+    changed.iloc[1] = "31/12/1999 23:59"
+    pd.testing.assert_series_equal(
+        parse_datetimes(changed, format="mixed"),
+        pd.to_datetime(changed, errors="coerce", format="mixed"),
+    )
+    pd.testing.assert_series_equal(
+        parse_datetimes(values, format="mixed", dayfirst=True),
+        pd.to_datetime(values, errors="coerce", format="mixed", dayfirst=True),
+    )
+    assert len(datetime_parsing._cache) == 3
+
+
+def test_format_matches_strftime():
+    parsed = pd.to_datetime(_timestamps(100, ["%Y-%m-%d %H:%M"]), errors="coerce")
+    expected = parsed.dt.strftime("%Y-%m-%dT%H:%M:%S").astype(object).where(parsed.notna(), np.nan)
+
+    result = format_datetimes(parsed, "%Y-%m-%dT%H:%M:%S")
+    pd.testing.assert_series_equal(result, expected)
@@ -0,0 +1,39 @@
+import pytest
+
+from Modules.upload.file_uploads import load_csv_bytes, sniff_separator
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("site,value\nA,1\nB,2\n", ","),
+    ("site;value\nA;1\nB;2\n", ";"),
+    ("site\tvalue\nA\t1\nB\t2\n", "\t"),
+    ("site|value|unit\nA|1|mg/L\n", "|"),
+    ("site\nA\nB\n", ","),
+])
+def test_sniff_separator_plain_files(text, expected):
+    assert sniff_separator(text) == expected
+
+
+def test_sniff_separator_comma_file_with_semicolons_in_text():
+    text = "site,notes\nA,filtered; iced; dup\nB,ok; x; y\nC,a; b; c\n"
+    assert sniff_separator(text) == ","
+
+
+def test_sniff_separator_semicolon_file_with_decimal_commas():
+    text = "site;value;temp\nA;1,5;2,0\nB;2,35;7\nC;0,5;1,25\n"
+    assert sniff_separator(text) == ";"
+
+
+def test_sniff_separator_semicolon_file_with_metadata_rows():
+    text = "Project;North\nStation;CR-01\n\nsite;value;temp\n" + "A;1,5;2,0\n" * 10
+    assert sniff_separator(text) == ";"
+
+
+def test_load_csv_bytes_keeps_free_text_whole():
+    raw = b"site,notes\nA,filtered; iced; dup\nB,ok; x; y\nC,a; b; c\n"
+    df, row_map, has_metadata = load_csv_bytes(raw, use_cache=False)
+
+    assert list(df.columns) == ["site", "notes"]
+    assert df["notes"].tolist() == ["filtered; iced; dup", "ok; x; y", "a; b; c"]
+    assert row_map == [2, 3, 4]
+    assert not has_metadata
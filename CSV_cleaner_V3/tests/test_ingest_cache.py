@@ -0,0 +1,39 @@
+import pytest
+
+from Modules.upload.file_uploads import parse_csv_bytes
+from Modules.upload.ingest_cache import IngestCache
+from Modules.utils.storage import frame_memory
+
+RAW = ("Site,Date,Result,Notes\n" + "CR-01,2024-06-01,1.5,filtered\nNR-07,2024-06-02,,\n" * 500).encode()
+
+
+def test_parsed_size_is_close_to_the_deep_size():
+    full = parse_csv_bytes(RAW.replace(b",,", b",0.5,").replace(b",\n", b",ok\n"))
+    assert full.nbytes == pytest.approx(frame_memory(full.df), rel=0.01)
+
+    # Empty cells are counted as strings: a little high, never low
+    entry = parse_csv_bytes(RAW)
+    assert frame_memory(entry.df) <= entry.nbytes <= 1.15 * frame_memory(entry.df)
+
+
+def test_cache_is_bounded_by_the_stored_size():
+    entry = parse_csv_bytes(RAW)
+    cache = IngestCache(max_entries=8, max_bytes=int(entry.nbytes * 2.5))
+
+    for key in "abc":
+        cache.put(key, entry)
+
+    assert cache.memory_usage() == 2 * entry.nbytes
+    assert cache.get("a") is None
+    assert cache.get("c") is entry
+
+
+def test_disk_tier_keeps_the_size(tmp_path):
+    entry = parse_csv_bytes(RAW)
+    IngestCache(cache_dir=str(tmp_path)).put("k", entry)
+
+    cache = IngestCache(cache_dir=str(tmp_path))
+    loaded = cache.get("k")
+    assert loaded.nbytes == entry.nbytes
+    assert loaded.row_map == entry.row_map
+    assert cache.memory_usage() == entry.nbytes
@@ -0,0 +1,34 @@
+import pytest
+
+from benchmarks.reshape_parity import CORPUS, difference, run_case
+from Modules.utils.reshape_backends import (
+    BACKENDS, RESHAPE_BACKEND_ENV, ArrowBackend, PandasBackend, available_backends, get_backend,
+)
+
+OTHER_BACKENDS = [name for name in available_backends() if name != PandasBackend.name]
+
+
+@pytest.mark.parametrize("backend", OTHER_BACKENDS)
+@pytest.mark.parametrize("case, operation, make_input, kwargs", CORPUS, ids=[case[0] for case in CORPUS])
+def test_backend_matches_pandas(backend, case, operation, make_input, kwargs):
+    expected = run_case(PandasBackend(), operation, make_input, kwargs)
+    result = run_case(BACKENDS[backend](), operation, make_input, kwargs)
+    assert difference(expected, result) is None
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("pandas", PandasBackend),
+    ("ARROW ", ArrowBackend),
+    ("auto", ArrowBackend),
+    ("polars", PandasBackend),
+])
+def test_get_backend(name, expected):
+    assert type(get_backend(name)) is expected
+
+
+def test_get_backend_from_environment(monkeypatch):
+    monkeypatch.setenv(RESHAPE_BACKEND_ENV, "pandas")
+    assert type(get_backend()) is PandasBackend
+
+    monkeypatch.delenv(RESHAPE_BACKEND_ENV)
+    assert type(get_backend()) is ArrowBackend
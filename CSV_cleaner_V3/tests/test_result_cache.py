@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from Modules.state.data_version import DataVersion, fingerprint
+from Modules.task_orchestration.engine import run_task
+from Modules.task_orchestration.frame import TaskFrame
+from Modules.task_orchestration.result_cache import cached_result, store_result
+from Modules.utils.unit_map_loader import UNIT_MAP_LOADER, UnitMap
+
+
+@pytest.fixture
+def unit_map():
+    """Swap the process-wide unit map like a background refresh would."""
+    previous = UNIT_MAP_LOADER.current()
+
+    def swap(units):
+        with UNIT_MAP_LOADER._lock:
+            UNIT_MAP_LOADER._current = UnitMap(units, "sheet")
+
+    yield swap
+    with UNIT_MAP_LOADER._lock:
+        UNIT_MAP_LOADER._current = previous
+
+
+def _run(cache, task_name, task_inputs, frame, version):
+    outcome = cached_result(cache, task_name, task_inputs, frame, version)
+    if outcome is not None:
+        return outcome, True
+
+    new_frame, metadata = run_task(task_name, frame, **task_inputs)
+    outcome = {"frame": new_frame, "metadata": metadata, "error": None}
+    store_result(cache, task_name, task_inputs, frame, version, outcome)
+    return outcome, False
+
+
+def test_unit_map_refresh_invalidates_header_results(unit_map):
+    df = pd.DataFrame({"Flow cfs": ["1"], "Site": ["A"]})
+    frame = TaskFrame.from_df(df, filename="a.csv")
+    version = DataVersion(1, fingerprint(df))
+    cache = {}
+
+    unit_map({"mgl": "mg/L"})
+    first, hit = _run(cache, "Clean column headers", {}, frame, version)
+    assert not hit
+    assert _run(cache, "Clean column headers", {}, frame, version)[1]
+
+    unit_map({"cfs": "ft3/s"})
+    refreshed, hit = _run(cache, "Clean column headers", {}, frame, version)
+    assert not hit
+    assert list(first["frame"].df.columns) != list(refreshed["frame"].df.columns)
+
+
+def test_other_tasks_ignore_the_unit_map(unit_map):
+    df = pd.DataFrame({"a": ["1"], "b": ["2"]})
+    frame = TaskFrame.from_df(df, filename="a.csv")
+    version = DataVersion(1, fingerprint(df))
+    cache = {}
+    inputs = {"variables_to_remove": ["b"]}
+
+    _run(cache, "Remove columns", inputs, frame, version)
+    unit_map({"cfs": "ft3/s"})
+    assert _run(cache, "Remove columns", inputs, frame, version)[1]
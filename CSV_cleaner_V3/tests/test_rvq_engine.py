@@ -0,0 +1,114 @@
+import gc
+import re
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Modules.utils.rvq_engine import (
+    _column_identity, clear_scan_cache, columns_have_matches, factorize_columns, scan_rules,
+)
+from Modules.utils.storage import to_arrow_strings
+
+RULES = [
+    {"data_code": "<", "rvq_code": "BDL", "match_type": "contains"},
+    {"data_code": "<0.5", "rvq_code": "DL", "match_type": "full"},
+    {"data_code": "ND", "rvq_code": "ND", "match_type": "full"},
+    {"data_code": "nan", "rvq_code": "NA", "match_type": "contains"},
+    {"data_code": "(e)", "rvq_code": "EST", "match_type": "contains"},
+    {"data_code": "1.5*", "rvq_code": "Q", "match_type": "contains"},
+    {"data_code": ">", "rvq_code": "GT", "match_type": "prefix"},
+]
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    clear_scan_cache()
+    yield
+    clear_scan_cache()
+
+
+def _frame():
+    return pd.DataFrame({
+        "Result": ["<0.5", "1.2", np.nan, "ND", "  ", "3 (e)", "<0.5", "NaN", ">10", "1.5*"],
+        "Depth": ["1.5*", "2", "<1", "Nan value", "", "1.2", np.nan, "ND ", "4", "<0.5"],
+        "Site": ["A"] * 10,
+    })
+
+
+def reference_mask(series, rule):
+    """The per-rule matching the task did before the engine (one column at a time)."""
+    series = series.astype(str)
+    code, match = rule["data_code"], rule["match_type"]
+    if match == "full":
+        return (series == code).to_numpy()
+    if match == "contains":
+        if code.lower() == "nan":
+            return (series.str.contains("nan", case=False, na=False) | (series.str.strip() == "")).to_numpy()
+        return series.str.contains(re.escape(code), na=False).to_numpy()
+    return np.zeros(len(series), dtype=bool)
+
+
+@pytest.mark.parametrize("storage", ["object", "arrow"])
+def test_scan_matches_reference(storage):
+    df = _frame()
+    data = to_arrow_strings(df) if storage == "arrow" else df
+    columns = ["Result", "Depth"]
+
+    codes, uniques = factorize_columns(data, columns)
+    hits = scan_rules(uniques, RULES)
+
+    n = len(df)
+    for k, col in enumerate(columns):
+        col_codes = codes[k * n:(k + 1) * n]
+        for rule, positions in zip(RULES, hits):
+            expected = reference_mask(df[col], rule)
+            np.testing.assert_array_equal(np.isin(col_codes, positions), expected, err_msg=f"{col}: {rule}")
+
+
+def test_columns_have_matches():
+    df = _frame()
+    assert columns_have_matches(df, ["Result"], RULES)
+    assert not columns_have_matches(df, ["Site"], RULES)
+    assert not columns_have_matches(df, [], RULES)
+
+
+def test_factorization_is_reused_for_the_same_data():
+    df = _frame()
+    codes, uniques = factorize_columns(df, ["Result", "Depth"])
+
+    again = factorize_columns(df.copy(deep=False), ["Result", "Depth"])
+    assert again[0] is codes and again[1] is uniques
+
+
+def test_factorization_follows_changed_data():
+    df = _frame()
+    shared = df.copy(deep=False)   # like an undo snapshot holding the same arrays
+    _, uniques = factorize_columns(df, ["Result"])
+
+    # Copy-on-write edit: the edited frame gets new arrays
+    df.loc[1, "Result"] = "<9"
+    _, edited = factorize_columns(df, ["Result"])
+    assert "<9" in edited and "<9" not in uniques
+    assert factorize_columns(shared, ["Result"])[1] is uniques
+
+    # Replaced column
+    replaced = shared.assign(Result=shared["Result"].str.replace("ND", "n.d.", regex=False))
+    _, new_uniques = factorize_columns(replaced, ["Result"])
+    assert "n.d." in new_uniques and "ND" not in new_uniques
+
+    # Different column set
+    _, both = factorize_columns(shared, ["Result", "Depth"])
+    assert "Nan value" in both
+
+
+def test_factorization_cache_does_not_keep_data_alive():
+    df = _frame()
+    _, owner = _column_identity(df["Result"])
+    ref = weakref.ref(owner)
+    factorize_columns(df, ["Result"])
+
+    del df, owner
+    gc.collect()
+    assert ref() is None
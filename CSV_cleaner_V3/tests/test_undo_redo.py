@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+from Modules.state.undo_redo import _load, _spill, discard_spilled_snapshots
+from Modules.utils.storage import ARROW_STRING
+
+
+@pytest.fixture
+def spill_dir():
+    yield
+    discard_spilled_snapshots()
+
+
+def _snapshot(df):
+    return {"seq": 1, "df": df, "row_map": list(range(2, len(df) + 2)), "nbytes": 1}
+
+
+@pytest.mark.parametrize("session_storage", ["python", "pyarrow"])
+def test_spill_and_load_restore_dtypes(spill_dir, session_storage):
+    # A snapshot comes back as it was spilled, whatever the current text storage
+    st.session_state.string_storage = session_storage
+    df = pd.DataFrame({
+        "text": pd.Series(["a", None, "c"], dtype=object).where(lambda s: s.notna(), np.nan),
+        "python": pd.array(["a", pd.NA, "c"], dtype="string[python]"),
+        "arrow": pd.array(["a", pd.NA, "c"], dtype=ARROW_STRING),
+        "number": [1.5, np.nan, 3.0],
+        "count": pd.array([1, None, 3], dtype="Int64"),
+        "group": pd.Categorical(["x", "y", "x"]),
+    }, index=[10, 11, 12])
+    df.columns = ["text", "python", "arrow", "number", "count", "text"]
+    state = _snapshot(df.copy())
+
+    _spill(state)
+    assert "df" not in state
+
+    loaded = _load(state)["df"]
+    assert loaded.dtypes.tolist() == df.dtypes.tolist()
+    pd.testing.assert_frame_equal(loaded, df)
+    assert loaded.iloc[1, 1] is pd.NA
+    assert isinstance(loaded.iloc[1, 0], float)
+    assert state["row_map"] == [2, 3, 4]
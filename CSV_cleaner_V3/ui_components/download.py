@@ -1,12 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import io
+import json
 import os
-from zipfile import ZipFile
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+import tempfile
+import xlsxwriter
+from zipfile import ZIP_DEFLATED, ZipFile
 
 import state.session_initializer as session_initializer
+from Modules.state.data_version import DataVersion, current_versions
 
 
 # ---------------------------------------------------------
@@ -18,14 +21,140 @@ def _on_download():
 
 
 # ---------------------------------------------------------
-# CSV DOWNLOADS
+# Artifact cache
+# ---------------------------------------------------------
+# Download bytes are built only for the format the user picked, and are
+# kept in session_state.download_cache with the sources they were built
+# from: the files' data versions (and supplementary DataFrames, by
+# identity). Reruns reuse them until one of those changes.
+def _same_source(a, b):
+    return a is b or (isinstance(a, DataVersion) and a == b)
+
+
+def _artifact_ready(key, sources):
+    """True if the cached artifact was built from exactly these sources."""
+    entry = st.session_state.download_cache.get(key)
+    return (
+        entry is not None
+        and len(entry["sources"]) == len(sources)
+        and all(_same_source(a, b) for a, b in zip(entry["sources"], sources))
+    )
+
+
+def _cached_artifact(key, sources, build):
+    """Bytes of an artifact, rebuilt only when one of its sources changed."""
+    if not _artifact_ready(key, sources):
+        st.session_state.download_cache[key] = {"sources": tuple(sources), "data": build()}
+    return st.session_state.download_cache[key]["data"]
+
+
+def _prune_download_cache(versions):
+    """Drop artifacts built from data that is no longer current."""
+    live = set(versions.values())
+    supplementary = st.session_state.get("supplementary_outputs", {}).values()
+
+    def is_live(source):
+        if isinstance(source, DataVersion):
+            return source in live
+        return any(source is df for df in supplementary)
+
+    cache = st.session_state.download_cache
+    for key in [k for k, entry in cache.items() if not all(map(is_live, entry["sources"]))]:
+        del cache[key]
+
+
+# ---------------------------------------------------------
+# File formats
+# ---------------------------------------------------------
+DOWNLOAD_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Feather": (".feather", "application/vnd.apache.arrow.file"),
+}
+
+
+def _arrow_ready(df):
+    """
+    df as Arrow can store it: string column names, a default index, and
+    object columns of mixed types written as text (missing cells stay missing).
+    """
+    df = df.reset_index(drop=True)
+    df.columns = [str(c) for c in df.columns]
+
+    for i, dtype in enumerate(df.dtypes):
+        if dtype != object:
+            continue
+        col = df.iloc[:, i]
+        kind = pd.api.types.infer_dtype(col, skipna=True)
+        if kind.startswith("mixed") or kind in ("unknown-array", "categorical"):
+            df.isetitem(i, col.where(col.isna(), col.astype(str)))
+    return df
+
+
+def write_file(df, file_format, handle):
+    """Write df to a binary file handle in the given format (see DOWNLOAD_FORMATS)."""
+    if file_format == "CSV":
+        text = io.TextIOWrapper(handle, encoding="utf-8", newline="")
+        df.to_csv(text, index=False)
+        text.flush()
+        text.detach()   # leave `handle` open
+    elif file_format == "Parquet":
+        _arrow_ready(df).to_parquet(handle, index=False)
+    elif file_format == "Feather":
+        _arrow_ready(df).to_feather(handle)
+    else:
+        raise ValueError(f"Unknown download format '{file_format}'.")
+
+
+def file_bytes(df, file_format):
+    buffer = io.BytesIO()
+    write_file(df, file_format, buffer)
+    return buffer.getvalue()
+
+
+def zip_bytes(files, file_format, supplementary=None):
+    """
+    ZIP of several files, streamed to a temporary file on disk.
+
+    CSVs are written straight into their (compressed) ZIP entry, so no file
+    is ever held in memory as text; only the finished ZIP is read back.
+    """
+    suffix = DOWNLOAD_FORMATS[file_format][0]
+
+    with tempfile.TemporaryFile() as tmp:
+        with ZipFile(tmp, "w", compression=ZIP_DEFLATED) as zip_file:
+
+            # Cleaned files
+            for filename, df in files.items():
+                base, _ = os.path.splitext(filename)
+                name = f"{base}_cleaned{suffix}"
+                if file_format == "CSV":
+                    with zip_file.open(name, "w", force_zip64=True) as entry:
+                        write_file(df, file_format, entry)
+                else:
+                    # Arrow writers need a seekable file: one file at a time in memory
+                    zip_file.writestr(name, file_bytes(df, file_format))
+
+            # Supplementary outputs (e.g., RVQ metadata)
+            for name, df in (supplementary or {}).items():
+                with zip_file.open(name, "w", force_zip64=True) as entry:
+                    write_file(df, "CSV", entry)
+
+        tmp.seek(0)
+        return tmp.read()
+
+
+# ---------------------------------------------------------
+# CLEANED FILE DOWNLOADS (CSV / Parquet / Feather)
 # ---------------------------------------------------------
 def download_output():
     """
-    Handles CSV download logic for:
+    Handles download logic for:
         - merged output
         - single cleaned file
         - multiple cleaned files (ZIP)
+
+    Only the chosen format is built, once per version of the data.
     """
 
     current_files = st.session_state.current_data
@@ -34,7 +163,19 @@ def download_output():
         st.info("No processed files available yet.")
         return
 
-    st.markdown("##### 📑 CSV")
+    versions = current_versions()
+    _prune_download_cache(versions)
+
+    st.markdown("##### 📑 CLEANED FILES")
+
+    file_format = st.radio(
+        "File format",
+        list(DOWNLOAD_FORMATS),
+        horizontal=True,
+        key="download_format",
+        help="**Parquet** and **Feather** files are much smaller and faster to load in pandas, R or Arrow.",
+    )
+    suffix, mime = DOWNLOAD_FORMATS[file_format]
 
     # -----------------------------------------------------
     # Detect merged output (one-liner)
@@ -46,11 +187,12 @@ def download_output():
     # -----------------------------------------------------
     if merged_name:
         df = current_files[merged_name]
+        base, _ = os.path.splitext(merged_name)
         st.download_button(
-            label=f"⬇️ Download {merged_name}",
-            data=df.to_csv(index=False).encode("utf-8"),
-            file_name=merged_name,
-            mime="text/csv",
+            label=f"⬇️ Download {base}{suffix}",
+            data=_cached_artifact(("file", merged_name, file_format), (versions[merged_name],), lambda: file_bytes(df, file_format)),
+            file_name=f"{base}{suffix}",
+            mime=mime,
             on_click=_on_download,
             icon=":material/download:"
         )
@@ -65,9 +207,9 @@ def download_output():
 
         st.download_button(
             label=f"⬇️ Download {filename}",
-            data=df.to_csv(index=False).encode("utf-8"),
-            file_name=f"{base}_cleaned.csv",
-            mime="text/csv",
+            data=_cached_artifact(("file", filename, file_format), (versions[filename],), lambda: file_bytes(df, file_format)),
+            file_name=f"{base}_cleaned{suffix}",
+            mime=mime,
             on_click=_on_download,
             icon=":material/download:"
         )
@@ -76,28 +218,12 @@ def download_output():
     # -----------------------------------------------------
     # CASE 3 - Multiple files --> ZIP
     # -----------------------------------------------------
-    zip_buffer = io.BytesIO()
-
-    with ZipFile(zip_buffer, "w") as zip_file:
-
-        # Add cleaned CSVs
-        for filename, df in current_files.items():
-            base, _ = os.path.splitext(filename)
-            zip_file.writestr(
-                f"{base}_cleaned.csv",
-                df.to_csv(index=False).encode("utf-8")
-            )
-
-        # Add supplementary outputs (e.g., RVQ metadata)
-        supp = st.session_state.get("supplementary_outputs", {})
-        for name, df in supp.items():
-            zip_file.writestr(name, df.to_csv(index=False))
-
-    zip_buffer.seek(0)
+    supp = st.session_state.get("supplementary_outputs", {})
+    sources = [*versions.values(), *supp.values()]
 
     st.download_button(
         label="⬇️ Download All as ZIP",
-        data=zip_buffer,
+        data=_cached_artifact(("zip", file_format), sources, lambda: zip_bytes(current_files, file_format, supp)),
         file_name="cleaned_files.zip",
         mime="application/zip",
         on_click=_on_download,
@@ -108,86 +234,213 @@ def download_output():
 # ---------------------------------------------------------
 # EXCEL DOWNLOADS
 # ---------------------------------------------------------
-def to_excel_with_formatting(df, freeze_header=False):
+# The workbook is streamed with XlsxWriter in constant_memory mode: each
+# row is flushed to a temp file as soon as it is written, so memory does
+# not grow with the number of rows. Styles are set once per column, and
+# column widths are estimated from a sample of rows.
+EXCEL_MAX_ROWS = 1_048_576       # per sheet, header included
+WRITE_BLOCK_ROWS = 50_000
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COLUMN_WIDTH = 60
+SHEET_NAME_CHARS = str.maketrans({c: "_" for c in "[]:*?/\\"})
+
+
+def _sheet_names(name, n_sheets, used):
+    """Unique, valid Excel sheet names (31 chars max) for one file."""
+    base = str(name).translate(SHEET_NAME_CHARS).strip("'") or "Sheet"
+    names = []
+    for part in range(1, n_sheets + 1):
+        suffix = f" ({part})" if part > 1 else ""
+        candidate, i = base[:31 - len(suffix)] + suffix, 1
+        while candidate.lower() in used:
+            i += 1
+            tag = f"{suffix} ~{i}"
+            candidate = base[:31 - len(tag)] + tag
+        used.add(candidate.lower())
+        names.append(candidate)
+    return names
+
+
+def _column_width(title, series):
+    """Width from the header and an evenly spaced sample of the values."""
+    width = len(str(title))
+    if len(series):
+        positions = np.unique(np.linspace(0, len(series) - 1, min(len(series), WIDTH_SAMPLE_ROWS)).astype(int))
+        sample = series.iloc[positions].dropna()
+        if len(sample):
+            width = max(width, int(sample.astype(str).str.len().max()))
+    return min(width, MAX_COLUMN_WIDTH) + 2
+
+
+def _cell_values(series):
+    """A column as Python values, None for missing cells."""
+    values = series.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def _cell_writer(ws, series):
+    """The XlsxWriter method for a column's values (skips write()'s type dispatch)."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return ws.write_datetime
+
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind == "string":
+        return ws.write_string
+    if kind in ("integer", "floating", "mixed-integer-float"):
+        return ws.write_number
+    if kind == "boolean":
+        return ws.write_boolean
+    return ws.write
+
+
+def _write_sheet(ws, df, formats, freeze_header):
+    n_cols = df.shape[1]
+
+    # Column-level formats: datetime columns are highlighted (empty cells too)
+    column_formats = [
+        formats["datetime"] if pd.api.types.is_datetime64_any_dtype(df.iloc[:, c]) else None
+        for c in range(n_cols)
+    ]
+    for c in range(n_cols):
+        ws.set_column(c, c, _column_width(df.columns[c], df.iloc[:, c]), column_formats[c])
+
+    # Header row
+    for c, title in enumerate(df.columns):
+        ws.write_string(0, c, str(title), formats["header"])
+
+    if freeze_header:
+        ws.freeze_panes(1, 0)
+
+    # Data rows, in order (constant_memory flushes each finished row)
+    # (values are converted one block of rows at a time)
+    writers = [_cell_writer(ws, df.iloc[:, c]) for c in range(n_cols)]
+    cells = list(zip(writers, column_formats))
+
+    for start in range(0, len(df), WRITE_BLOCK_ROWS):
+        block = df.iloc[start:start + WRITE_BLOCK_ROWS]
+        columns = [_cell_values(block.iloc[:, c]) for c in range(n_cols)]
+
+        for r, row in enumerate(zip(*columns), start + 1):
+            for c, (value, (write, fmt)) in enumerate(zip(row, cells)):
+                if value is None:
+                    continue
+                try:
+                    write(r, c, value, fmt)
+                except TypeError:
+                    ws.write_string(r, c, str(value), fmt)
+
+
+def to_excel_with_formatting(data, freeze_header=False):
     """
-    Convert a DataFrame to an Excel file with:
+    Convert one DataFrame, or {sheet name: DataFrame}, to an Excel file with:
         - bold headers
         - shaded header row
         - highlighted datetime columns
-        - auto column widths
+        - auto column widths (estimated from a sample of rows)
         - optional frozen header row
+
+    Text is written as text (no formulas or hyperlinks). A DataFrame longer
+    than an Excel sheet continues on "<name> (2)", "<name> (3)", ...
     """
+    sheets = {"Cleaned Data": data} if isinstance(data, pd.DataFrame) else data
 
     output = io.BytesIO()
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cleaned Data"
-
-    # Identify datetime columns
-    datetime_cols = [
-        col for col in df.columns
-        if pd.api.types.is_datetime64_any_dtype(df[col])
-    ]
-
-    # Styles
-    header_font = Font(bold=True)
-    header_fill = PatternFill("solid", fgColor="DDDDDD")
-    datetime_fill = PatternFill("solid", fgColor="FFF2CC")
-
-    # Write headers
-    for col_num, title in enumerate(df.columns, 1):
-        cell = ws.cell(row=1, column=col_num, value=title)
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-        cell.fill = header_fill
-
-    # Write data rows
-    for row_num, row in enumerate(df.itertuples(index=False), 2):
-        for col_num, value in enumerate(row, 1):
-            if pd.isna(value):
-                value = None
-            cell = ws.cell(row=row_num, column=col_num, value=value)
-            if df.columns[col_num - 1] in datetime_cols:
-                cell.fill = datetime_fill
-
-    # Auto column widths
-    for column_cells in ws.columns:
-        max_len = max(
-            len(str(cell.value)) if cell.value is not None else 0
-            for cell in column_cells
-        )
-        ws.column_dimensions[column_cells[0].column_letter].width = max_len + 2
-
-    # Freeze header row
-    if freeze_header:
-        ws.freeze_panes = "A2"
-
-    wb.save(output)
+    workbook = xlsxwriter.Workbook(output, {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "remove_timezone": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+
+    formats = {
+        "header": workbook.add_format({"bold": True, "align": "center", "bg_color": "#DDDDDD"}),
+        "datetime": workbook.add_format({"bg_color": "#FFF2CC", "num_format": "yyyy-mm-dd hh:mm:ss"}),
+    }
+
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+    used = set()
+    for name, df in sheets.items():
+        n_parts = max(1, -(-len(df) // rows_per_sheet))
+        for part, sheet_name in enumerate(_sheet_names(name, n_parts, used)):
+            ws = workbook.add_worksheet(sheet_name)
+            chunk = df.iloc[part * rows_per_sheet:(part + 1) * rows_per_sheet]
+            _write_sheet(ws, chunk, formats, freeze_header)
+
+    workbook.close()
     output.seek(0)
     return output
 
 
 def excel_download():
     """
-    Excel download is only available when exactly one file exists.
+    Excel download: one sheet per loaded file.
     """
-    if len(st.session_state.current_data) != 1:
+    current_files = st.session_state.current_data
+    if not current_files:
         return
 
-    filename, df = next(iter(st.session_state.current_data.items()))
-    base, _ = os.path.splitext(filename)
-
     st.markdown(" ")
     st.markdown("###### 📑 EXCEL")
 
     freeze = st.checkbox("Freeze header row in Excel")
 
-    excel_data = to_excel_with_formatting(df, freeze_header=freeze)
+    if len(current_files) == 1:
+        filename, df = next(iter(current_files.items()))
+        base, _ = os.path.splitext(filename)
+        sheets = df
+        file_name = f"{base}_cleaned.xlsx"
+        label = "⬇️ Download Excel File with Formatting"
+    else:
+        sheets = {os.path.splitext(filename)[0]: df for filename, df in current_files.items()}
+        file_name = "cleaned_files.xlsx"
+        label = "⬇️ Download Excel Workbook (one sheet per file)"
+
+    # Workbooks are slow to build: only on request, then cached
+    key = ("excel", freeze)
+    sources = list(current_versions().values())
+    if not _artifact_ready(key, sources) and not st.button("Build Excel file", key="build_excel"):
+        return
+
+    with st.spinner("Building Excel file..."):
+        excel_data = _cached_artifact(key, sources, lambda: to_excel_with_formatting(sheets, freeze_header=freeze).getvalue())
 
     st.download_button(
-        label="⬇️ Download Excel File with Formatting",
+        label=label,
         data=excel_data,
-        file_name=f"{base}_cleaned.xlsx",
+        file_name=file_name,
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         icon=":material/download:"
     )
+
+
+# ---------------------------------------------------------
+# RECIPE DOWNLOAD (for the headless batch runner)
+# ---------------------------------------------------------
+def recipe_download():
+    """
+    Offer the steps applied so far as a JSON recipe.
+
+    The recipe can be replayed over a whole directory with:
+        python batch_clean.py recipe.json raw_files/ cleaned_files/
+    """
+    histories = st.session_state.get("task_history", {})
+    steps = next(iter(histories.values()), [])
+
+    if not steps:
+        return
+
+    st.markdown(" ")
+    st.markdown("###### 🧾 RECIPE")
+    st.caption("Replay these steps on a whole folder of files with `python batch_clean.py recipe.json <input_dir> <output_dir>`.")
+
+    recipe_json = json.dumps({"steps": steps}, indent=2, ensure_ascii=False, default=str)
+
+    st.download_button(
+        label="⬇️ Download Recipe (JSON)",
+        data=recipe_json.encode("utf-8"),
+        file_name="recipe.json",
+        mime="application/json",
+        icon=":material/download:"
+    )
@@ -0,0 +1,89 @@
+import json
+
+import streamlit as st
+
+from Modules.task_orchestration.profiling import profiles_frame
+
+
+def _records():
+    """All performance records of the session, file by file."""
+    return [
+        record
+        for records in st.session_state.get("task_profiles", {}).values()
+        for record in records
+    ]
+
+
+def show_performance():
+    """
+    Performance tab: time, peak memory, shapes and undo snapshot size of
+    every task run, per file, with CSV/JSON export.
+    """
+
+    st.markdown("### Performance")
+
+    records = _records()
+    if not records:
+        st.info("Run a task to see how long each step takes on each file.")
+        return
+
+    df = profiles_frame(records)
+
+    if df["peak_mb"].isna().all():
+        st.caption("Peak memory is not measured (see **Performance Settings** in the sidebar).")
+
+    # ---------------------------------------------------------
+    # Slowest tasks (across files)
+    # ---------------------------------------------------------
+    st.markdown("##### By task")
+    by_task = (
+        df.groupby("task", sort=False)
+        .agg(
+            runs=("task", "size"),
+            total_seconds=("seconds", "sum"),
+            max_seconds=("seconds", "max"),
+            max_peak_mb=("peak_mb", "max"),
+            max_rows_in=("rows_in", "max"),
+        )
+        .sort_values("total_seconds", ascending=False)
+    )
+    st.dataframe(by_task, use_container_width=True)
+
+    # ---------------------------------------------------------
+    # Heaviest files (candidates for pre-splitting)
+    # ---------------------------------------------------------
+    st.markdown("##### By file")
+    by_file = (
+        df.groupby("file", sort=False)
+        .agg(
+            steps=("task", "size"),
+            total_seconds=("seconds", "sum"),
+            max_peak_mb=("peak_mb", "max"),
+            rows=("rows_out", "last"),
+            undo_mb=("snapshot_mb", "sum"),
+        )
+        .sort_values("total_seconds", ascending=False)
+    )
+    st.dataframe(by_file, use_container_width=True)
+
+    # ---------------------------------------------------------
+    # Every run
+    # ---------------------------------------------------------
+    with st.expander("Every task run", expanded=False):
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+    c1, c2 = st.columns(2)
+    c1.download_button(
+        label="⬇️ Download as CSV",
+        data=df.to_csv(index=False).encode("utf-8"),
+        file_name="performance.csv",
+        mime="text/csv",
+        icon=":material/download:",
+    )
+    c2.download_button(
+        label="⬇️ Download as JSON",
+        data=json.dumps(records, indent=2, default=str).encode("utf-8"),
+        file_name="performance.json",
+        mime="application/json",
+        icon=":material/download:",
+    )
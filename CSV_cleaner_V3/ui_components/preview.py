@@ -1,11 +1,65 @@
+import math
+
 import streamlit as st
 import pandas as pd
 
+from Modules.state.data_version import data_version
+from Modules.utils.column_stats import column_stats
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+
+def _preview_entry(fname, df):
+    """
+    Cached preview data of a file:
+        {"version": DataVersion, "df": df, "stats": {column position: stats}}
+
+    Rebuilt whenever the file gets a new data version.
+    """
+    version = data_version(fname)
+    entry = st.session_state.preview_cache.get(fname)
+    if entry is None or entry["version"] != version:
+        entry = {"version": version, "df": df, "stats": {}}
+        st.session_state.preview_cache[fname] = entry
+    return entry
+
+
+def _page_slice(df, start, stop):
+    """Rows start:stop only, labelled with their row position in the file."""
+    page = df.iloc[start:stop]
+    return page.set_axis(pd.RangeIndex(start, start + len(page)), axis=0)
+
+
+def _show_column_stats(entry):
+    """
+    Summary per column. Columns are computed one at a time and cached as
+    they finish, so a rerun (paging, switching file) keeps the progress.
+    """
+    df = entry["df"]
+    stats = entry["stats"]
+
+    missing = [i for i in range(df.shape[1]) if i not in stats]
+    if missing:
+        progress = st.progress(0.0, text="Computing column stats...")
+        for done, i in enumerate(missing, start=1):
+            stats[i] = column_stats(df.iloc[:, i])
+            progress.progress(done / len(missing), text=f"Computing column stats... ({done}/{len(missing)})")
+        progress.empty()
+
+    table = pd.DataFrame(
+        [{"Column": str(df.columns[i]), **stats[i]} for i in range(df.shape[1])]
+    )
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+
 @st.fragment
 def show_live_preview():
     """
     Isolated preview renderer.
     This fragment prevents the entire app from re-running when preview updates.
+
+    Only the rows of the current page are sliced and sent to the browser,
+    so any part of a large file can be inspected cheaply.
     """
 
     st.markdown("### Live Data Preview")
@@ -14,50 +68,58 @@ def show_live_preview():
         st.info("Upload a file and run a task to see the preview.")
         return
 
-    # Always use the first file for preview
-    fname, df = next(iter(st.session_state.current_data.items()))
+    files = list(st.session_state.current_data)
+
+    # Forget files that are gone (merge, restart)
+    for fname in list(st.session_state.preview_cache):
+        if fname not in st.session_state.current_data:
+            del st.session_state.preview_cache[fname]
 
     # ---------------------------------------------------------
-    # PREVIEW CACHE KEY
-    # ---------------------------------------------------------
-    # Preview depends on:
-    #   - filename
-    #   - current dataframe id (changes after each task)
-    #   - whether compare mode is on
+    # FILE + PAGE SELECTION
     # ---------------------------------------------------------
-    compare_mode = st.checkbox("Compare with original", key="compare_mode")
+    if st.session_state.get("preview_file") not in files:
+        st.session_state.pop("preview_file", None)
 
-    df_id = id(df)  # unique per task run
-    cache_key = (fname, df_id, compare_mode)
+    c1, c2, c3 = st.columns([2, 1, 1])
+    fname = c1.selectbox("File", files, key="preview_file")
+    df = st.session_state.current_data[fname]
+    entry = _preview_entry(fname, df)
 
-    # ---------------------------------------------------------
-    # CACHE HIT --> instant preview
-    # ---------------------------------------------------------
-    if cache_key in st.session_state.preview_cache:
-        st.session_state.preview_cache[cache_key]()
-        return
+    page_size = c2.selectbox("Rows per page", PAGE_SIZES, key="preview_page_size")
 
-    # ---------------------------------------------------------
-    # CACHE MISS --> build preview once
-    # ---------------------------------------------------------
-    def render_preview():
-        st.markdown(f"##### File: `{fname}`")
+    n_rows = len(df)
+    n_pages = max(1, math.ceil(n_rows / page_size))
+    if st.session_state.get("preview_page", 1) > n_pages:
+        st.session_state.preview_page = n_pages
+
+    page = c3.number_input("Page", min_value=1, max_value=n_pages, step=1, key="preview_page")
 
-        # Processed preview
-        processed_preview = df.head(5)
-        st.markdown("##### Processed Data (Top 5 Rows)")
-        st.dataframe(processed_preview, use_container_width=True)
+    start = (page - 1) * page_size
+    stop = min(start + page_size, n_rows)
+
+    compare_mode = st.checkbox("Compare with original", key="compare_mode")
 
-        if compare_mode:
-            # Original preview
-            original_df = st.session_state.original_data[fname]
-            original_preview = original_df.head(5)
+    # ---------------------------------------------------------
+    # PROCESSED DATA (current page only)
+    # ---------------------------------------------------------
+    st.markdown(f"##### File: `{fname}`")
+    st.caption(
+        f"Rows {start:,}-{max(stop - 1, start):,} of {n_rows:,} (0-based) · "
+        f"{df.shape[1]:,} columns · page {page:,} of {n_pages:,} · data {entry['version']}"
+    )
 
-            st.markdown("##### Original Data (Top 5 Rows)")
-            st.dataframe(original_preview, use_container_width=True)
+    st.markdown("##### Processed Data")
+    st.dataframe(_page_slice(df, start, stop), use_container_width=True)
 
-    # Store in cache
-    st.session_state.preview_cache[cache_key] = render_preview
+    if compare_mode:
+        # Same rows of the original file
+        original_df = st.session_state.original_data[fname]
+        st.markdown("##### Original Data")
+        st.dataframe(_page_slice(original_df, start, stop), use_container_width=True)
 
-    # Render now
-    render_preview()
+    # ---------------------------------------------------------
+    # COLUMN STATS (whole file, computed on request and cached)
+    # ---------------------------------------------------------
+    if st.toggle("Show column stats", key="preview_stats"):
+        _show_column_stats(entry)
@@ -0,0 +1,130 @@
+import streamlit as st
+from Modules.task_orchestration.executor import EXECUTION_MODES, default_workers
+from Modules.state.data_version import data_version, bump_version
+from Modules.state.undo_redo import convert_snapshots, enforce_undo_budget, undo_memory_usage
+from Modules.utils.reshape_backends import RESHAPE_BACKEND_ENV, get_backend
+from Modules.utils.storage import STRING_STORAGES, frame_memory, to_storage
+
+
+def _convert_loaded_data():
+    """
+    Move the loaded files, their originals and the undo/redo snapshots to
+    the newly selected string storage. Frames and columns shared between
+    them are converted once and stay shared (one memo for everything).
+    """
+    storage = st.session_state.string_storage
+    memo = {}
+    for data in (st.session_state.original_data, st.session_state.current_data):
+        for fname, df in data.items():
+            data[fname] = to_storage(df, storage, memo)
+
+    convert_snapshots(lambda df: to_storage(df, storage, memo))
+    enforce_undo_budget()
+
+    for fname in st.session_state.current_data:
+        bump_version(fname)
+
+
+def _file_memory(fname, df):
+    """Memory used by a file's current data (recomputed once per data version)."""
+    version = data_version(fname)
+    cached = st.session_state.memory_cache.get(fname)
+    if cached is None or cached[0] != version:
+        cached = (version, frame_memory(df))
+        st.session_state.memory_cache[fname] = cached
+    return cached[1]
+
+
+def performance_settings():
+    """
+    Sidebar controls for how tasks are executed.
+    Values live in session_state so the task loop in app.py can read them.
+    """
+
+    with st.expander("⚙️ Performance Settings"):
+
+        # ---------------------------------------------------------
+        # Per-file execution mode
+        # ---------------------------------------------------------
+        st.radio(
+            "Run per-file tasks",
+            list(EXECUTION_MODES.keys()),
+            key="execution_mode",
+            help=(
+                "**Sequential** processes one file at a time. "
+                "**Threads** and **Processes** run files in parallel - use "
+                "**Processes** for slow tasks on many files."
+            ),
+        )
+
+        if st.session_state.execution_mode != "Sequential":
+            st.slider(
+                "Parallel workers",
+                min_value=1,
+                max_value=max(default_workers(), 16),
+                key="max_workers",
+            )
+
+        # ---------------------------------------------------------
+        # Task profiling (Performance tab)
+        # ---------------------------------------------------------
+        st.checkbox(
+            "Measure peak memory per task",
+            key="profile_memory",
+            help=(
+                "Shown in the **Performance** tab. Off by default: tracking memory "
+                "makes text-heavy tasks (e.g. datetime parsing) several times "
+                "slower, and is skipped when files run in **Threads**."
+            ),
+        )
+
+        # ---------------------------------------------------------
+        # Undo/redo memory budget
+        # ---------------------------------------------------------
+        st.number_input(
+            "Undo memory budget (MB)",
+            min_value=0,
+            step=64,
+            key="undo_budget_mb",
+            help=(
+                "RAM this session may use for undo/redo snapshots. Older "
+                "snapshots beyond it are moved to disk and reloaded on undo."
+            ),
+        )
+
+        in_memory, spilled = undo_memory_usage()
+        st.caption(f"Undo history: {in_memory / 1024 ** 2:,.1f} MB in memory, {spilled} snapshot(s) on disk.")
+
+        # ---------------------------------------------------------
+        # Reshape engine (pivots, melt, merging files)
+        # ---------------------------------------------------------
+        st.caption(
+            f"Reshaping tasks run on the **{get_backend().name}** backend "
+            f"(set `{RESHAPE_BACKEND_ENV}` to change it)."
+        )
+
+        # ---------------------------------------------------------
+        # Text storage + memory per file
+        # ---------------------------------------------------------
+        labels = {storage: label for label, storage in STRING_STORAGES.items()}
+        st.radio(
+            "Store text columns as",
+            list(STRING_STORAGES.values()),
+            format_func=labels.get,
+            key="string_storage",
+            on_change=_convert_loaded_data,
+            help=(
+                "**Arrow** keeps each text column in one compact buffer instead of "
+                "one Python object per cell - usually about half the memory, and "
+                "faster text tasks. Downloads are the same either way."
+            ),
+        )
+
+        current_data = st.session_state.get("current_data") or {}
+        memory_cache = st.session_state.memory_cache
+        for fname in list(memory_cache):
+            if fname not in current_data:
+                del memory_cache[fname]
+
+        for fname, df in current_data.items():
+            st.caption(f"`{fname}`: {_file_memory(fname, df) / 1024 ** 2:,.1f} MB")
@@ -0,0 +1,71 @@
+import json
+
+import streamlit as st
+
+from Modules.state.data_version import data_version
+from Modules.task_orchestration.executor import run_pipeline_per_file
+from Modules.task_orchestration.frame import TaskFrame
+from Modules.task_orchestration.pipeline import plan, stage_label
+
+
+def queued_widget_df(fname):
+    """
+    A file as the queued tasks will leave it, so the widget of the next
+    step offers the right columns. Cached per data version and queue.
+    """
+    df = st.session_state.current_data[fname]
+    queue = st.session_state.task_queue
+    if not queue:
+        return df
+
+    key = (data_version(fname), json.dumps(queue, sort_keys=True, default=str))
+    cached = st.session_state.queue_preview
+    if cached is None or cached["key"] != key:
+        # Same job (and error capture) as applying the queue
+        frame = TaskFrame(df=df, row_map=st.session_state.row_map[fname], filename=fname)
+        outcome = run_pipeline_per_file(queue, {fname: frame})[fname]
+        preview_df = df if outcome["error"] else outcome["frame"].df
+        cached = {"key": key, "df": preview_df, "error": outcome["error"]}
+        st.session_state.queue_preview = cached
+
+    if cached["error"]:
+        st.warning(f"The queued tasks fail on **{fname}**: {cached['error']}", icon="⚠️")
+    return cached["df"]
+
+
+def show_task_queue():
+    """
+    Queued tasks, grouped as they will run, with Apply / Remove last / Clear.
+
+    Returns True when the user asked to apply the queue.
+    """
+    queue = st.session_state.task_queue
+
+    if not queue:
+        st.caption("Queued tasks are listed here. Pick a task and click **Next** to add it.")
+        return False
+
+    with st.container(border=True):
+        st.markdown(f"##### 🧾 Queued tasks ({len(queue)})")
+
+        number = 1
+        for stage in plan(queue):
+            steps = range(number, number + len(stage["steps"]))
+            if stage["fused"] and len(stage["steps"]) > 1:
+                st.markdown(f"{steps[0]}-{steps[-1]}. {stage_label(stage)} *(column changes, applied in one pass)*")
+            else:
+                st.markdown(f"{number}. {stage_label(stage)}")
+            number += len(stage["steps"])
+
+        big_apply, c2, c3 = st.columns([2, 1, 1])
+        apply = big_apply.button("▶️ Apply queued tasks", type="primary", key="apply_queue")
+
+        if c2.button("↩️ Remove last", key="pop_queue"):
+            queue.pop()
+            st.rerun()
+
+        if c3.button("🗑️ Clear queue", key="clear_queue"):
+            queue.clear()
+            st.rerun()
+
+    return apply